@@ -0,0 +1,60 @@
+# Django imports
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+
+# Third party imports
+from rest_framework import exceptions
+from rest_framework.authentication import BasicAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+# Project imports
+from authentication.cache import cache_user, fingerprint, get_cached_user
+from manager.cache_utils import get_cache, set_cache
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication with the user of the token read from the user cache instead of the database.
+    The token signature and expiry are still verified on every request.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        if cached := get_cached_user(user_id):
+            user, _password = cached
+            if not user.is_active:
+                raise exceptions.AuthenticationFailed(_('User is inactive'), code='user_inactive')
+            return user
+
+        user = super().get_user(validated_token)
+        cache_user(user)
+        return user
+
+
+class CachedBasicAuthentication(BasicAuthentication):
+    """
+    BasicAuthentication that remembers successful credentials for AUTH_BASIC_CACHE_TTL seconds,
+    so the password hash is verified once instead of on every request.
+    Remembered credentials stop working as soon as the password of the user changes.
+    """
+
+    def authenticate_credentials(self, userid, password, request=None):
+        key = f'auth_basic_{fingerprint(f"{userid}:{password}")}'
+
+        remembered = get_cache(key)
+        if isinstance(remembered, dict) and (cached := get_cached_user(remembered['user_id'])):
+            user, password_fingerprint = cached
+            if user.is_active and password_fingerprint == remembered['password']:
+                return user, None
+
+        user, auth = super().authenticate_credentials(userid, password, request)
+
+        cache_user(user)
+        set_cache(key, {'user_id': user.pk, 'password': fingerprint(user.password)}, settings.AUTH_BASIC_CACHE_TTL)
+        return user, auth
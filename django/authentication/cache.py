@@ -0,0 +1,60 @@
+# Base imports
+import hashlib
+import hmac
+from typing import Optional, Tuple
+
+# Django imports
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+# Project imports
+from manager.cache_utils import delete_cache, get_cache, set_cache
+
+
+# Fields kept in the cached snapshot of a user, the others are deferred and loaded on access
+SNAPSHOT_FIELDS = (
+    'id',
+    'username',
+    'email',
+    'first_name',
+    'last_name',
+    'is_active',
+    'is_staff',
+    'is_superuser',
+)
+
+
+def user_cache_key(user_id) -> str:
+    return f'auth_user_{user_id}'
+
+
+def fingerprint(value: str) -> str:
+    """
+    Keyed digest of a secret, so neither passwords nor password hashes are stored in the cache
+    """
+    return hmac.new(settings.SECRET_KEY.encode(), value.encode(), hashlib.sha256).hexdigest()
+
+
+def cache_user(user):
+    """
+    Cache a snapshot of an authenticated user with the fingerprint of its password hash
+    """
+    snapshot = {name: getattr(user, name) for name in SNAPSHOT_FIELDS}
+    snapshot['password'] = fingerprint(user.password)
+    set_cache(user_cache_key(user.pk), snapshot, settings.AUTH_USER_CACHE_TTL)
+
+
+def get_cached_user(user_id) -> Optional[Tuple[object, str]]:
+    """
+    Return the cached user and the fingerprint of its password hash, or None on a miss
+    """
+    snapshot = get_cache(user_cache_key(user_id))
+    if not isinstance(snapshot, dict):
+        return None
+
+    user = get_user_model().from_db('default', SNAPSHOT_FIELDS, [snapshot[name] for name in SNAPSHOT_FIELDS])
+    return user, snapshot['password']
+
+
+def uncache_user(user_id):
+    delete_cache(user_cache_key(user_id))
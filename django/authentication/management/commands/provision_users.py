@@ -0,0 +1,106 @@
+# Base imports
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, Tuple
+
+# Django imports
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Project imports
+from authentication.provisioning import provision_users
+from authentication.serializers import UserProvisionSerializer
+
+
+class Command(BaseCommand):
+    help = 'Create API users in bulk from a CSV (email,username,password) or NDJSON file, "-" reads stdin'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=('csv', 'ndjson'), help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=settings.USER_PROVISION_BATCH_SIZE)
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Processes hashing the passwords, 1 hashes them in this process'
+        )
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        file_format = options['format'] or ('ndjson' if options['path'].endswith(('.ndjson', '.jsonl')) else 'csv')
+        stats = {'read': 0, 'created': 0, 'skipped': 0, 'invalid': 0}
+        started = time.monotonic()
+
+        executor = None
+        if options['workers'] > 1:
+            # The workers only run make_password, they never use the database connection they inherit
+            executor = ProcessPoolExecutor(max_workers=options['workers'])
+
+        file = sys.stdin if options['path'] == '-' else open(options['path'], newline='', encoding='utf-8')
+        try:
+            batch, lines = [], []
+            for line, row in read_rows(file, file_format):
+                stats['read'] += 1
+                serializer = UserProvisionSerializer(data=row)
+                if not serializer.is_valid():
+                    stats['invalid'] += 1
+                    self.stderr.write(f'Line {line}: {dict(serializer.errors)}')
+                    continue
+
+                batch.append(serializer.validated_data)
+                lines.append(line)
+                if len(batch) == options['batch_size']:
+                    self.provision(batch, lines, executor, stats)
+                    batch, lines = [], []
+
+            if batch:
+                self.provision(batch, lines, executor, stats)
+        finally:
+            if file is not sys.stdin:
+                file.close()
+            if executor is not None:
+                executor.shutdown()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'{stats["read"]} rows read, {stats["created"]} created, {stats["skipped"]} skipped, '
+            f'{stats["invalid"]} invalid in {elapsed:.2f}s ({stats["created"] / elapsed if elapsed else 0:.0f} users/s)'
+        )
+
+    def provision(self, batch, lines, executor, stats):
+        users, skipped = provision_users(batch, executor)
+        for position, reason in skipped:
+            self.stderr.write(f'Line {lines[position]}: {reason}')
+
+        stats['created'] += len(users)
+        stats['skipped'] += len(skipped)
+        if self.verbosity > 1:
+            self.stdout.write(f'{stats["read"]} rows read')
+
+
+def read_rows(file, file_format: str) -> Iterator[Tuple[int, Dict]]:
+    """
+    Yield (line number, row) from the file, rows as dicts with email, username and password
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(file)
+        if not reader.fieldnames or not {'email', 'username', 'password'} <= set(reader.fieldnames):
+            raise CommandError('The CSV header must have the email, username and password columns')
+
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line, text in enumerate(file, start=1):
+        if not text.strip():
+            continue
+
+        try:
+            yield line, json.loads(text)
+        except ValueError:
+            yield line, None
@@ -1,8 +1,12 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.base_user import BaseUserManager
 from django.utils.translation import gettext_lazy as _
 
+from authentication.cache import uncache_user
+
 
 class CustomUserManager(BaseUserManager):
 
@@ -51,4 +55,13 @@ class User(AbstractUser):
 
     def __str__(self):
         return f"Email: {self.email} - Username: {self.username}"
-    
\ No newline at end of file
+
+
+@receiver(post_save, sender=User, dispatch_uid="uncache_user_on_save")
+@receiver(post_delete, sender=User, dispatch_uid="uncache_user_on_delete")
+def uncache_user_on_change(sender, instance, **kwargs):
+    # Again on commit, a request may cache the old row before the change is committed.
+    # The id is read now, a deleted instance has no pk anymore when the transaction commits.
+    user_id = instance.pk
+    uncache_user(user_id)
+    transaction.on_commit(lambda: uncache_user(user_id))
@@ -0,0 +1,89 @@
+"""
+Bulk provisioning of API users: the existence of a whole batch is checked in one query, the PBKDF2
+password hashes are computed by an executor (a process pool, the hashing holds the GIL) and the users
+are inserted with one bulk INSERT.
+"""
+# Base imports
+from concurrent.futures import Executor
+from typing import Dict, List, Optional, Tuple
+
+# Django imports
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+# Project imports
+from authentication.models import User
+
+
+# Passwords sent to a worker process at a time
+HASH_CHUNK_SIZE = 16
+
+
+def hash_passwords(passwords: List[str], executor: Optional[Executor] = None) -> List[str]:
+    """
+    Hash the passwords with the default hasher, in the executor when given
+    """
+    if executor is None:
+        return [make_password(password) for password in passwords]
+
+    return list(executor.map(make_password, passwords, chunksize=HASH_CHUNK_SIZE))
+
+
+def provision_users(rows: List[Dict], executor: Optional[Executor] = None) -> Tuple[List[User], List[Tuple[int, str]]]:
+    """
+    Create the users of a batch of validated rows (email, username, password).
+    Rows with an email or username already taken, in the database or by an earlier row of the batch, are skipped.
+    Returns the created users and the (position in rows, reason) of the skipped rows.
+    post_save is not sent by the bulk INSERT, new users are not in the authentication cache anyway.
+    A user created meanwhile by a signup fails the bulk INSERT, the batch is then inserted row by row.
+    """
+    taken = User.objects.filter(
+        Q(email__in=[row['email'] for row in rows]) | Q(username__in=[row['username'] for row in rows])
+    ).values_list('email', 'username')
+    emails, usernames = set(), set()
+    for email, username in taken:
+        emails.add(email)
+        usernames.add(username)
+
+    new_rows, positions, skipped = [], [], []
+    for position, row in enumerate(rows):
+        if row['email'] in emails:
+            skipped.append((position, 'User with email exists'))
+        elif row['username'] in usernames:
+            skipped.append((position, 'User with username exists'))
+        else:
+            emails.add(row['email'])
+            usernames.add(row['username'])
+            new_rows.append(row)
+            positions.append(position)
+
+    if not new_rows:
+        return [], skipped
+
+    passwords = hash_passwords([row['password'] for row in new_rows], executor)
+    users = [
+        User(email=row['email'], username=row['username'], password=password)
+        for row, password in zip(new_rows, passwords)
+    ]
+    try:
+        with transaction.atomic():
+            return User.objects.bulk_create(users), skipped
+    except IntegrityError:
+        pass
+
+    created = []
+    for position, user in zip(positions, users):
+        try:
+            with transaction.atomic():
+                user.save(force_insert=True)
+        except IntegrityError:
+            if User.objects.filter(email=user.email).exists():
+                skipped.append((position, 'User with email exists'))
+            else:
+                skipped.append((position, 'User with username exists'))
+        else:
+            created.append(user)
+
+    skipped.sort()
+    return created, skipped
@@ -1,3 +1,6 @@
+# Django imports
+from django.db.models import Q
+
 # Third party imports
 from rest_framework import serializers, status
 from rest_framework.validators import ValidationError
@@ -20,8 +23,12 @@ class UserCreationSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email', 'password']
 
     def validate(self, attrs):
-        email = User.objects.filter(username=attrs.get('username')).exists()
-        username = User.objects.filter(username=attrs.get('username')).exists()    
+        # One query for both unique fields
+        taken = list(User.objects.filter(
+            Q(email=attrs.get('email')) | Q(username=attrs.get('username'))
+        ).values_list('email', 'username'))
+        email = any(row[0] == attrs.get('email') for row in taken)
+        username = any(row[1] == attrs.get('username') for row in taken)
 
         if email:
             raise ValidationError(detail="User with email exists", code=status.HTTP_403_FORBIDDEN)
@@ -34,7 +41,8 @@ class UserCreationSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
 
         try:
-            user = User.objects.create(
+            # Hashed before the INSERT, one write
+            user = User(
                 username=validated_data['username'],
                 email=validated_data['email'],
             )
@@ -44,3 +52,15 @@ class UserCreationSerializer(serializers.ModelSerializer):
             return user
         except Exception as e:
             raise ValidationError(detail=e, code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class UserProvisionSerializer(serializers.Serializer):
+    """
+    A row of the bulk provisioning, the existence checks are done for the whole batch by provision_users
+    """
+    username = serializers.CharField(max_length=25)
+    email = serializers.EmailField(max_length=80)
+    password = serializers.CharField(trim_whitespace=False)
+
+    def validate_email(self, value):
+        return User.objects.normalize_email(value)
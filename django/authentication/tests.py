@@ -1,13 +1,24 @@
 # Base imports
+import base64
+import os
+import tempfile
+from io import StringIO
 from typing import List
+from unittest.mock import patch
 
 # Django imports
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
 from django.urls import reverse
 
 # Third party imports
 from rest_framework import status
 
 # Project imports
+from authentication.cache import cache_user, get_cached_user
+from authentication.models import User
+from authentication.provisioning import hash_passwords, provision_users
 from shared.tests import BaseAPITestCase
 
 
@@ -52,3 +63,149 @@ class UserCreateView(BaseAPITestCase):
             }
         )
         self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_signup_email_exists(self):
+        response = self.client.post(
+            f'{self.url}', data={
+                'username': 'test',
+                'email': 'usuario1@teste.com',
+                'password': 'test@test',
+            }
+        )
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertIn('User with email exists', str(response.json()))
+
+
+class CachedAuthenticationTestCase(BaseAPITestCase):
+    """Test the cache of authenticated users for JWT and Basic auth."""
+
+    tests_to_perform: List = []
+
+    def setUp(self) -> None:
+        cache.clear()
+        super().setUp()
+        self.url = reverse("health_auth")
+
+    def basic_credentials(self, password='123456'):
+        credentials = base64.b64encode(f'usuario1@teste.com:{password}'.encode()).decode()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Basic {credentials}')
+
+    def test_jwt_user_cached(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(status.HTTP_200_OK, self.client.get(self.url).status_code)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(status.HTTP_200_OK, self.client.get(self.url).status_code)
+
+    def test_jwt_user_change_uncached(self):
+        self.client.get(self.url)
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, self.client.get(self.url).status_code)
+
+    def test_deleted_user_uncached_on_commit(self):
+        user = User.objects.get(pk=self.user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+            # A concurrent request caches the row before the delete is committed
+            cache_user(user)
+
+        self.assertIsNone(get_cached_user(user.pk))
+
+    def test_basic_password_hashed_once(self):
+        self.basic_credentials()
+        with patch.object(User, 'check_password', autospec=True, side_effect=User.check_password) as check_password:
+            self.assertEqual(status.HTTP_200_OK, self.client.get(self.url).status_code)
+            with self.assertNumQueries(0):
+                self.assertEqual(status.HTTP_200_OK, self.client.get(self.url).status_code)
+
+        check_password.assert_called_once()
+
+    def test_basic_wrong_password_not_cached(self):
+        self.basic_credentials('wrong')
+        with patch.object(User, 'check_password', autospec=True, side_effect=User.check_password) as check_password:
+            self.assertEqual(status.HTTP_401_UNAUTHORIZED, self.client.get(self.url).status_code)
+            self.assertEqual(status.HTTP_401_UNAUTHORIZED, self.client.get(self.url).status_code)
+
+        self.assertEqual(2, check_password.call_count)
+
+    def test_basic_password_change(self):
+        self.basic_credentials()
+        self.client.get(self.url)
+
+        self.user.set_password('654321')
+        self.user.save()
+
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, self.client.get(self.url).status_code)
+        self.basic_credentials('654321')
+        self.assertEqual(status.HTTP_200_OK, self.client.get(self.url).status_code)
+
+
+class ProvisionUsersTestCase(TestCase):
+    """Test the bulk provisioning of users."""
+
+    def setUp(self) -> None:
+        User.objects.create_user(email='taken@teste.com', password='123456', username='taken')
+        return super().setUp()
+
+    def test_provision_users(self):
+        rows = [
+            {'email': 'a@teste.com', 'username': 'a', 'password': 'senha-a'},
+            {'email': 'taken@teste.com', 'username': 'b', 'password': 'senha-b'},
+            {'email': 'c@teste.com', 'username': 'taken', 'password': 'senha-c'},
+            {'email': 'a@teste.com', 'username': 'd', 'password': 'senha-d'},
+            {'email': 'e@teste.com', 'username': 'e', 'password': 'senha-e'},
+        ]
+
+        # One existence query and one INSERT, in a savepoint
+        with self.assertNumQueries(4):
+            users, skipped = provision_users(rows)
+
+        self.assertEqual(['a', 'e'], [user.username for user in users])
+        self.assertEqual(
+            [(1, 'User with email exists'), (2, 'User with username exists'), (3, 'User with email exists')],
+            skipped
+        )
+        self.assertTrue(User.objects.get(email='e@teste.com').check_password('senha-e'))
+
+    def test_provision_users_concurrent_signup(self):
+        rows = [
+            {'email': 'a@teste.com', 'username': 'a', 'password': 'senha-a'},
+            {'email': 'b@teste.com', 'username': 'b', 'password': 'senha-b'},
+            {'email': 'c@teste.com', 'username': 'c', 'password': 'senha-c'},
+        ]
+
+        def signup_while_hashing(passwords, executor=None):
+            # Another signup commits between the existence check and the INSERT
+            User.objects.create_user(email='b@teste.com', password='123456', username='other')
+            return hash_passwords(passwords, executor)
+
+        with patch('authentication.provisioning.hash_passwords', side_effect=signup_while_hashing):
+            users, skipped = provision_users(rows)
+
+        self.assertEqual(['a', 'c'], [user.username for user in users])
+        self.assertEqual([(1, 'User with email exists')], skipped)
+        self.assertEqual('other', User.objects.get(email='b@teste.com').username)
+        self.assertTrue(User.objects.get(email='c@teste.com').check_password('senha-c'))
+
+    def test_provision_users_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as file:
+            file.write(
+                'email,username,password\n'
+                'a@TESTE.com,a,senha-a\n'
+                'b@teste.com,b,senha-b\n'
+                'invalid,c,senha-c\n'
+                'taken@teste.com,d,senha-d\n'
+            )
+        self.addCleanup(os.remove, file.name)
+
+        out, err = StringIO(), StringIO()
+        call_command('provision_users', file.name, '--workers', '2', '--batch-size', '1', stdout=out, stderr=err)
+
+        self.assertIn('4 rows read, 2 created, 1 skipped, 1 invalid', out.getvalue())
+        self.assertIn('Line 4:', err.getvalue())
+        self.assertIn('Line 5: User with email exists', err.getvalue())
+        self.assertTrue(User.objects.get(email='a@teste.com').check_password('senha-a'))
@@ -43,10 +43,19 @@ AUTH_USER_MODEL = 'authentication.User'
 REST_FRAMEWORK = {
     'NON_FIELD_ERRORS_KEY': 'errors',
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-        'rest_framework.authentication.BasicAuthentication',
+        'authentication.authentication.CachedJWTAuthentication',
+        'authentication.authentication.CachedBasicAuthentication',
         'rest_framework.authentication.SessionAuthentication',
-    )
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'shared.http.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'shared.http.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
 SIMPLE_JWT = {
@@ -158,9 +167,128 @@ LOCALE_PATHS = [
     os.path.join(SITE_ROOT, 'i18n/rest-framework'),
 ]
 
+# Maximum number of transactions accepted by POST /v1/transacao/lote/
+TRANSACTION_BATCH_MAX_SIZE = config('TRANSACTION_BATCH_MAX_SIZE', default=1000, cast=int)
+
+# Per account single-writer sequencer for POST /v1/transacao/
+# Each conta_id is owned by one worker thread that group-commits its pending transactions
+TRANSACTION_SEQUENCER_ENABLED = config('TRANSACTION_SEQUENCER_ENABLED', default=False, cast=bool)
+TRANSACTION_SEQUENCER_PARTITIONS = config('TRANSACTION_SEQUENCER_PARTITIONS', default=8, cast=int)
+TRANSACTION_SEQUENCER_MAX_BATCH = config('TRANSACTION_SEQUENCER_MAX_BATCH', default=500, cast=int)
+# Seconds a request waits for its transaction before giving up
+TRANSACTION_SEQUENCER_TIMEOUT = config('TRANSACTION_SEQUENCER_TIMEOUT', default=5.0, cast=float)
+
+# Idempotency-Key header for POST /v1/transacao/
+# Seconds a stored response is replayed, expired keys are deleted by the idempotency_keys_cleanup task
+IDEMPOTENCY_KEY_TTL = config('IDEMPOTENCY_KEY_TTL', default=60 * 60 * 24, cast=int)
+# Seconds the key stays locked while its request is executing
+IDEMPOTENCY_LOCK_TIMEOUT = config('IDEMPOTENCY_LOCK_TIMEOUT', default=30, cast=int)
+# Seconds a concurrent duplicate waits for the response of the executing request
+IDEMPOTENCY_WAIT_TIMEOUT = config('IDEMPOTENCY_WAIT_TIMEOUT', default=5.0, cast=float)
+
+# Cashback processing of transactions
+# task: one transaction_account task per transaction
+# batch: the cashback_consumer task drains pending transactions in chunks
+# inline: create_transaction applies the cashback in the same UPDATE as the debit
+CASHBACK_MODE = config('CASHBACK_MODE', default='task')
+CASHBACK_BATCH_SIZE = config('CASHBACK_BATCH_SIZE', default=1000, cast=int)
+# Seconds between two runs of the cashback consumer
+CASHBACK_FLUSH_INTERVAL = config('CASHBACK_FLUSH_INTERVAL', default=5.0, cast=float)
+
+# Transactional outbox: tasks are written to manager_outboxevent with the transaction
+# and published to the broker in batches by the outbox_relay task / relay_outbox command
+OUTBOX_BATCH_SIZE = config('OUTBOX_BATCH_SIZE', default=500, cast=int)
+# Seconds between two runs of the outbox relay
+OUTBOX_RELAY_INTERVAL = config('OUTBOX_RELAY_INTERVAL', default=1.0, cast=float)
+
+# Ledger balance snapshots, taken for accounts with at least LEDGER_SNAPSHOT_INTERVAL new entries
+LEDGER_SNAPSHOT_INTERVAL = config('LEDGER_SNAPSHOT_INTERVAL', default=100, cast=int)
+# Seconds between two runs of the snapshot task
+LEDGER_SNAPSHOT_SCHEDULE = config('LEDGER_SNAPSHOT_SCHEDULE', default=60.0, cast=float)
+# Entries younger than this many seconds are left for the next snapshot
+LEDGER_SNAPSHOT_DELAY = config('LEDGER_SNAPSHOT_DELAY', default=60.0, cast=float)
+
+# Entries of the in-process cache in front of Redis (0 disables it) and the most seconds an entry stays there
+L1_CACHE_SIZE = config('L1_CACHE_SIZE', default=10000, cast=int)
+L1_CACHE_TTL = config('L1_CACHE_TTL', default=5, cast=int)
+
+# Seconds an authenticated user is kept in the cache, and seconds successful Basic credentials are remembered
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=60 * 5, cast=int)
+AUTH_BASIC_CACHE_TTL = config('AUTH_BASIC_CACHE_TTL', default=60, cast=int)
+
+# get_or_compute: seconds a recomputation holds its lock and seconds an expired value is still served meanwhile
+CACHE_LOCK_TIMEOUT = config('CACHE_LOCK_TIMEOUT', default=10, cast=int)
+CACHE_STALE_TTL = config('CACHE_STALE_TTL', default=60, cast=int)
+
+# Seconds a balance stays in the write-through balance cache
+BALANCE_CACHE_TTL = config('BALANCE_CACHE_TTL', default=60 * 5, cast=int)
+
+# Validate and encode the transacao and conta payloads with the compiled fast path instead of the DRF serializers
+FAST_VALIDATION = config('FAST_VALIDATION', default=False, cast=bool)
+
+# Seconds a conta_id looked up and not found is answered from the cache without a query
+ACCOUNT_MISSING_CACHE_TTL = config('ACCOUNT_MISSING_CACHE_TTL', default=30, cast=int)
+
+# Largest conta_id kept in the Redis bitmap of existing accounts, which takes max id / 8 bytes (16 MB by default).
+# Clients choose the conta_id of new accounts, larger ids fall back to the negative cache.
+ACCOUNT_INDEX_MAX_ID = config('ACCOUNT_INDEX_MAX_ID', default=2 ** 27 - 1, cast=int)
+
+# Seconds between two rebalances of the striped accounts
+STRIPE_REBALANCE_INTERVAL = config('STRIPE_REBALANCE_INTERVAL', default=60.0, cast=float)
+
+# Monthly partitions of manager_transaction created ahead of the current month (PostgreSQL only)
+TRANSACTION_PARTITIONS_AHEAD = config('TRANSACTION_PARTITIONS_AHEAD', default=3, cast=int)
+# Months of transactions kept in the live table
+TRANSACTION_RETENTION_MONTHS = config('TRANSACTION_RETENTION_MONTHS', default=12, cast=int)
+
+# Cold storage of the transactions older than the retention
+ARCHIVE_DIR = config('ARCHIVE_DIR', default=os.path.join(BASE_DIR, 'archive'))
+# Rows read from the database per chunk (and written per Parquet row group)
+ARCHIVE_CHUNK_SIZE = config('ARCHIVE_CHUNK_SIZE', default=50000, cast=int)
+# Rows deleted per DELETE once archived
+ARCHIVE_DELETE_BATCH_SIZE = config('ARCHIVE_DELETE_BATCH_SIZE', default=5000, cast=int)
+
+# Rows fetched per round trip by the streaming statement export
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Accounts per batch (one COPY or executemany and one database transaction) of import_accounts
+IMPORT_BATCH_SIZE = config('IMPORT_BATCH_SIZE', default=5000, cast=int)
+
+# Users per batch of provision_users: one existence query with two IN (...) lists, below the SQLite limit of
+# bound parameters, and one bulk INSERT
+USER_PROVISION_BATCH_SIZE = config('USER_PROVISION_BATCH_SIZE', default=450, cast=int)
+
 CELERY_TIMEZONE = "America/Sao_Paulo"
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60
+CELERY_BEAT_SCHEDULE = {
+    'outbox-relay': {
+        'task': 'manager.tasks.outbox_relay',
+        'schedule': OUTBOX_RELAY_INTERVAL,
+    },
+    'balance-snapshots': {
+        'task': 'manager.tasks.balance_snapshots',
+        'schedule': LEDGER_SNAPSHOT_SCHEDULE,
+    },
+    'stripe-rebalance': {
+        'task': 'manager.tasks.rebalance_striped_accounts',
+        'schedule': STRIPE_REBALANCE_INTERVAL,
+    },
+    'transaction-partitions': {
+        'task': 'manager.tasks.transaction_partitions',
+        'schedule': 60 * 60 * 24,
+    },
+    'idempotency-keys-cleanup': {
+        'task': 'manager.tasks.idempotency_keys_cleanup',
+        'schedule': 60 * 60,
+    },
+}
+
+if CASHBACK_MODE == 'batch':
+    CELERY_BEAT_SCHEDULE['cashback-consumer'] = {
+        'task': 'manager.tasks.cashback_consumer',
+        'schedule': CASHBACK_FLUSH_INTERVAL,
+    }
 
 if 'test' in sys.argv or 'test_coverage' in sys.argv:  # Covers regular testing and django-coverage
     DATABASES['default']['ENGINE'] = 'django.db.backends.sqlite3'
@@ -173,6 +301,9 @@ if 'test' in sys.argv or 'test_coverage' in sys.argv:  # Covers regular testing
             'LOCATION': 'unique-snowflake',  # Um nome único para o cache
         }
     }
+    REDIS_CACHE_KEY_PREFIX = 'test'
+    # Tests clear the shared cache directly, the in-process tier is enabled only where it is tested
+    L1_CACHE_SIZE = 0
 
 else:
     # Cache configuration
@@ -21,6 +21,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('v1/auth/', include('authentication.urls')),
     path('v1/auth/', include('djoser.urls.jwt')),
+    path('v1/async/', include('manager.async_urls')),
     path('v1/', include('manager.urls')),
     path('swagger<format>.json|.yaml/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
     path('docs/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
@@ -0,0 +1,214 @@
+# Base imports
+from typing import Iterable, Optional
+
+# Django imports
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+# Project imports
+from manager.cache_utils import add_cache, aget_cache, delete_cache, get_async_client, get_cache, set_many_cache
+from manager.models import Account
+
+
+# Redis bitmaps are limited to 2^32 bits, ids above ACCOUNT_INDEX_MAX_ID (at most this) are not indexed
+BITMAP_MAX_ID = 2 ** 32 - 1
+
+# KEYS: the bitmap, ARGV: the offsets to set.
+# SETBIT alone would recreate an evicted bitmap holding only these bits while the ready key survives,
+# every other account would then be reported missing.
+SET_BITS_IF_EXISTS_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+for i = 1, #ARGV do
+    redis.call('SETBIT', KEYS[1], ARGV[i], 1)
+end
+return 1
+"""
+
+
+def get_client():
+    """
+    Returns the Redis client of the cache, or None when the cache is not Redis.
+    """
+    if 'django_redis' not in settings.CACHES['default']['BACKEND']:
+        return None
+
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+def _key(name: str) -> str:
+    return cache.make_key(f'{settings.REDIS_CACHE_KEY_PREFIX}_{name}')
+
+
+def bitmap_key() -> str:
+    return _key('account_index')
+
+
+def ready_key() -> str:
+    return _key('account_index_ready')
+
+
+def missing_cache_key(account_id: int) -> str:
+    return f'account_missing_{account_id}'
+
+
+def _indexed(account_id: int) -> bool:
+    # A single large id would make SETBIT allocate the whole bitmap up to it
+    return 0 <= account_id <= min(settings.ACCOUNT_INDEX_MAX_ID, BITMAP_MAX_ID)
+
+
+def _index_lookup(account_id: int) -> Optional[bool]:
+    """
+    Return the bit of the account, or None when the index is not complete or does not cover the id
+    """
+    client = get_client()
+    if client is None or not _indexed(account_id):
+        return None
+
+    ready, bitmap, bit = client.pipeline(transaction=False).get(ready_key()).exists(bitmap_key()).getbit(
+        bitmap_key(), account_id
+    ).execute()
+    # An evicted bitmap would report every account as missing
+    return bool(bit) if ready and bitmap else None
+
+
+def account_known_missing(account_id: int) -> bool:
+    """
+    Return True when the account is known not to exist, without querying the database:
+    its bit is not set in a complete index, or it was recently looked up and not found
+    """
+    indexed = _index_lookup(account_id)
+    if indexed is not None:
+        return not indexed
+
+    return bool(get_cache(missing_cache_key(account_id)))
+
+
+def remember_missing(account_id: int):
+    """
+    Cache for ACCOUNT_MISSING_CACHE_TTL seconds that an account does not exist.
+    Only added when the key is free: an account created meanwhile leaves a falsy entry that is not overwritten.
+    """
+    add_cache(missing_cache_key(account_id), 1, settings.ACCOUNT_MISSING_CACHE_TTL)
+
+
+def account_exists(account_id: int) -> bool:
+    """
+    Check that an account exists. Missing accounts are answered by the index or the negative cache,
+    only unknown ids reach the database.
+    """
+    indexed = _index_lookup(account_id)
+    if indexed is not None:
+        return indexed
+
+    if get_cache(missing_cache_key(account_id)):
+        return False
+
+    if Account.objects.filter(id=account_id).exists():
+        return True
+
+    remember_missing(account_id)
+    return False
+
+
+async def _aindex_lookup(account_id: int) -> Optional[bool]:
+    client = get_async_client()
+    if client is None or not _indexed(account_id):
+        return None
+
+    ready, bitmap, bit = await client.pipeline(transaction=False).get(ready_key()).exists(bitmap_key()).getbit(
+        bitmap_key(), account_id
+    ).execute()
+    return bool(bit) if ready and bitmap else None
+
+
+async def aaccount_known_missing(account_id: int) -> bool:
+    """
+    Async version of account_known_missing, for the ASGI views
+    """
+    indexed = await _aindex_lookup(account_id)
+    if indexed is not None:
+        return not indexed
+
+    return bool(await aget_cache(missing_cache_key(account_id)))
+
+
+async def aaccount_exists(account_id: int) -> bool:
+    """
+    Async version of account_exists, for the ASGI views
+    """
+    indexed = await _aindex_lookup(account_id)
+    if indexed is not None:
+        return indexed
+
+    if await aget_cache(missing_cache_key(account_id)):
+        return False
+
+    if await Account.objects.filter(id=account_id).aexists():
+        return True
+
+    await sync_to_async(remember_missing)(account_id)
+    return False
+
+
+def mark_accounts_exist(account_ids: Iterable[int]):
+    """
+    Set the bits of new accounts and replace their negative cache entries with a falsy one, so a lookup
+    that missed the uncommitted account cannot cache it as missing afterwards.
+    The bits are only set in an existing bitmap, build_account_index creates it.
+    """
+    account_ids = list(account_ids)
+    set_many_cache(
+        {missing_cache_key(account_id): 0 for account_id in account_ids},
+        settings.ACCOUNT_MISSING_CACHE_TTL
+    )
+
+    client = get_client()
+    offsets = [account_id for account_id in account_ids if _indexed(account_id)]
+    if client is None or not offsets:
+        return
+
+    client.register_script(SET_BITS_IF_EXISTS_SCRIPT)(keys=[bitmap_key()], args=offsets)
+
+
+def mark_accounts_exist_on_commit(account_ids: Iterable[int]):
+    """
+    Index new accounts once the current transaction commits.
+    Their negative cache entries are dropped right away too, a rolled back account is only looked up again.
+    """
+    account_ids = list(account_ids)
+    for account_id in account_ids:
+        delete_cache(missing_cache_key(account_id))
+    transaction.on_commit(lambda: mark_accounts_exist(account_ids))
+
+
+def build_account_index(chunk_size: int = 10000) -> int:
+    """
+    Set the bit of every existing account and mark the index as complete.
+    Accounts created meanwhile set their own bits, so the index is built in place.
+    Returns the number of accounts indexed.
+    """
+    client = get_client()
+    if client is None:
+        return 0
+
+    # Create the bitmap first, accounts created while it is built then set their own bits
+    client.setbit(bitmap_key(), 0, 0)
+
+    count = 0
+    pipeline = client.pipeline(transaction=False)
+    for account_id in Account.objects.order_by().values_list('id', flat=True).iterator(chunk_size=chunk_size):
+        if _indexed(account_id):
+            pipeline.setbit(bitmap_key(), account_id, 1)
+            count += 1
+
+        if len(pipeline) >= chunk_size:
+            pipeline.execute()
+
+    pipeline.execute()
+    client.set(ready_key(), 1)
+    return count
@@ -0,0 +1,325 @@
+# Base imports
+import array
+import glob
+import gzip
+import os
+import struct
+import uuid
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Django imports
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.utils.translation import gettext_lazy as _
+
+# Third party imports
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Project imports
+from manager.models import Transaction
+from manager.partitions import add_months, month_start
+
+
+COLUMNS = (
+    'id',
+    'account_id',
+    'type',
+    'value_cents',
+    'tax_cents',
+    'cashback_cents',
+    'created_at',
+    'updated_at',
+)
+
+# Fallback format when pyarrow is not installed: gzip of fixed size little-endian records,
+# datetimes as microseconds since the epoch and -1 for a pending cashback
+BINARY_MAGIC = b'BMTX1\n'
+BINARY_RECORD = struct.Struct('<qq1sqqqqq')
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# Errors of an unreadable or corrupt archive file, pyarrow raises OSError and ValueError subclasses
+ARCHIVE_READ_ERRORS = (OSError, EOFError, ValueError, struct.error)
+
+
+class PendingCashbackError(ValueError):
+    pass
+
+
+class ArchiveUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _('Archived transactions are temporarily unavailable, try again.')
+    default_code = 'archive_unavailable'
+
+
+def get_archive_extension() -> str:
+    return 'parquet' if pyarrow is not None else 'bin.gz'
+
+
+def get_archive_files(month: Optional[date] = None) -> List[str]:
+    """
+    Return the archive files of a month, or of every month, newest month first
+    """
+    pattern = f'transactions_{month:%Y%m}_*' if month else 'transactions_*'
+    return sorted(
+        (path for path in glob.glob(os.path.join(settings.ARCHIVE_DIR, pattern)) if not path.endswith('.tmp')),
+        reverse=True
+    )
+
+
+def _to_micros(value: datetime) -> int:
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def _from_micros(value: int) -> datetime:
+    return EPOCH + timedelta(microseconds=value)
+
+
+def write_archive(month: date, chunks: Iterable[List[Tuple]]) -> str:
+    """
+    Write chunks of rows, tuples in COLUMNS order, to a new archive file of the month.
+    The file only gets its final name once it is completely written.
+    """
+    os.makedirs(settings.ARCHIVE_DIR, exist_ok=True)
+    path = os.path.join(
+        settings.ARCHIVE_DIR,
+        f'transactions_{month:%Y%m}_{uuid.uuid4().hex[:12]}.{get_archive_extension()}'
+    )
+    temporary_path = f'{path}.tmp'
+
+    if pyarrow is not None:
+        schema = pyarrow.schema([
+            ('id', pyarrow.int64()),
+            ('account_id', pyarrow.int64()),
+            ('type', pyarrow.string()),
+            ('value_cents', pyarrow.int64()),
+            ('tax_cents', pyarrow.int64()),
+            ('cashback_cents', pyarrow.int64()),
+            ('created_at', pyarrow.timestamp('us', tz='UTC')),
+            ('updated_at', pyarrow.timestamp('us', tz='UTC')),
+        ])
+        with pyarrow.parquet.ParquetWriter(temporary_path, schema, compression='zstd') as writer:
+            for rows in chunks:
+                columns = list(zip(*rows))
+                writer.write_table(pyarrow.Table.from_arrays(
+                    [pyarrow.array(values, type=field.type) for values, field in zip(columns, schema)],
+                    schema=schema
+                ))
+    else:
+        with gzip.open(temporary_path, 'wb') as file:
+            file.write(BINARY_MAGIC)
+            for rows in chunks:
+                file.write(b''.join(
+                    BINARY_RECORD.pack(
+                        row[0],
+                        row[1],
+                        row[2].encode('ascii'),
+                        row[3],
+                        row[4],
+                        -1 if row[5] is None else row[5],
+                        _to_micros(row[6]),
+                        _to_micros(row[7]),
+                    )
+                    for row in rows
+                ))
+
+    os.replace(temporary_path, path)
+    return path
+
+
+def read_archive(path: str, account_id: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Yield the rows of an archive file as dicts, optionally only the rows of one account
+    """
+    if path.endswith('.parquet'):
+        filters = [('account_id', '=', account_id)] if account_id is not None else None
+        yield from pyarrow.parquet.read_table(path, filters=filters).to_pylist()
+        return
+
+    with gzip.open(path, 'rb') as file:
+        if file.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+            raise ValueError(f'{path} is not a transaction archive')
+
+        while block := file.read(BINARY_RECORD.size * 4096):
+            for record in BINARY_RECORD.iter_unpack(block):
+                if account_id is not None and record[1] != account_id:
+                    continue
+
+                yield {
+                    'id': record[0],
+                    'account_id': record[1],
+                    'type': record[2].decode('ascii'),
+                    'value_cents': record[3],
+                    'tax_cents': record[4],
+                    'cashback_cents': None if record[5] == -1 else record[5],
+                    'created_at': _from_micros(record[6]),
+                    'updated_at': _from_micros(record[7]),
+                }
+
+
+def summarize(rows: Iterable[Dict]) -> Dict[str, int]:
+    """
+    Return the row count and the amount sums used to verify an archive against its source
+    """
+    summary = {'count': 0, 'value': 0, 'tax': 0, 'cashback': 0}
+    for row in rows:
+        summary['count'] += 1
+        summary['value'] += row['value_cents']
+        summary['tax'] += row['tax_cents']
+        summary['cashback'] += row['cashback_cents'] or 0
+
+    return summary
+
+
+def summarize_queryset(queryset) -> Dict[str, int]:
+    totals = queryset.aggregate(
+        count=Count('id'),
+        value=Sum('value_cents'),
+        tax=Sum('tax_cents'),
+        cashback=Sum('cashback_cents'),
+    )
+    return {key: value or 0 for key, value in totals.items()}
+
+
+def _chunked(rows: Iterable[Tuple], size: int) -> Iterator[List[Tuple]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def archive_month(month: date, before: datetime, chunk_size: int, batch_size: int) -> int:
+    """
+    Archive the live transactions of a month created before the cutoff: stream them to a file,
+    verify the file against the table and delete them in batches.
+    Transactions with a pending cashback stay live, the cashback consumer still has to find them.
+    Only the ids written to the file are deleted, a cashback applied meanwhile does not make a row
+    that was never archived match. The read and the delete share one transaction, a REPEATABLE READ
+    snapshot on PostgreSQL, and the file is removed when the delete fails.
+    Rows are written ordered by account, so Parquet row groups can be skipped by account_id.
+    Returns the number of transactions archived.
+    """
+    start = datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+    end = min(datetime.combine(add_months(month, 1), datetime.min.time(), tzinfo=dt_timezone.utc), before)
+    month_transactions = Transaction.objects.filter(created_at__gte=start, created_at__lt=end)
+    queryset = month_transactions.filter(cashback_cents__isnull=False)
+    written = array.array('q')
+
+    def rows():
+        for row in queryset.order_by('account_id', 'id').values_list(*COLUMNS).iterator(chunk_size=chunk_size):
+            written.append(row[0])
+            yield row
+
+    # The isolation level can only be set by the first statement of the transaction
+    snapshot = connection.vendor == 'postgresql' and not connection.in_atomic_block
+    with transaction.atomic():
+        if snapshot:
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+
+        expected = summarize_queryset(queryset)
+        if not expected['count']:
+            return 0
+
+        path = write_archive(month, _chunked(rows(), chunk_size))
+        verify_archive(path, expected)
+
+        try:
+            for offset in range(0, len(written), batch_size):
+                month_transactions.filter(id__in=written[offset:offset + batch_size].tolist()).delete()
+        except Exception:
+            os.remove(path)
+            raise
+
+    return expected['count']
+
+
+def archive_detached_partition(table: str, month: date, chunk_size: int) -> int:
+    """
+    Archive a partition detached from manager_transaction and drop it once the file is verified.
+    Raises PendingCashbackError, without archiving, when the partition has pending cashbacks.
+    Returns the number of transactions archived.
+    """
+    quoted_table = connection.ops.quote_name(table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT COUNT(id), COALESCE(SUM(value_cents), 0), COALESCE(SUM(tax_cents), 0), '
+            f'COALESCE(SUM(cashback_cents), 0), COUNT(id) - COUNT(cashback_cents) FROM {quoted_table}'
+        )
+        *summary, pending = cursor.fetchone()
+        expected = dict(zip(('count', 'value', 'tax', 'cashback'), summary))
+
+    if pending:
+        raise PendingCashbackError(f'{table} has {pending} transactions with a pending cashback')
+
+    if expected['count']:
+        def rows():
+            with connection.chunked_cursor() as cursor:
+                cursor.execute(f'SELECT {", ".join(COLUMNS)} FROM {quoted_table} ORDER BY account_id, id')
+                while chunk := cursor.fetchmany(chunk_size):
+                    yield chunk
+
+        verify_archive(write_archive(month, rows()), expected)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE {quoted_table}')
+
+    return expected['count']
+
+
+def verify_archive(path: str, expected: Dict[str, int]):
+    """
+    Read an archive file back and compare its count and sums with the source, removing it on mismatch
+    """
+    archived = summarize(read_archive(path))
+    if archived != expected:
+        os.remove(path)
+        raise ValueError(f'Archive {path} does not match its source: {archived} != {expected}')
+
+
+def get_live_cutoff(today: date) -> datetime:
+    """
+    Return the start of the live window: transactions created before it can be archived
+    """
+    month = add_months(month_start(today), -settings.TRANSACTION_RETENTION_MONTHS)
+    return datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+
+
+def read_archived_transactions(
+    account_id: int,
+    before: Optional[Tuple[datetime, int]] = None,
+    since: Optional[datetime] = None,
+) -> Iterator[Dict]:
+    """
+    Yield the archived transactions of an account newest first, optionally only the ones
+    before a (created_at, id) cursor. Months are read lazily, one at a time, and only the months
+    between since and the cursor.
+    """
+    months = sorted({os.path.basename(path).split('_')[1] for path in get_archive_files()}, reverse=True)
+    for month in months:
+        if before is not None and month > f'{before[0].astimezone(dt_timezone.utc):%Y%m}':
+            continue
+        if since is not None and month < f'{since.astimezone(dt_timezone.utc):%Y%m}':
+            break
+
+        rows = []
+        for path in get_archive_files(date(int(month[:4]), int(month[4:]), 1)):
+            rows.extend(read_archive(path, account_id))
+
+        rows.sort(key=lambda row: (row['created_at'], row['id']), reverse=True)
+        for row in rows:
+            if before is None or (row['created_at'], row['id']) < before:
+                yield row
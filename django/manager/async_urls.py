@@ -0,0 +1,9 @@
+from django.urls import path
+
+from manager.views import async_api
+
+
+urlpatterns = [
+    path('transacao/', async_api.transaction_create, name='async-transaction'),
+    path('conta/', async_api.account, name='async-account'),
+]
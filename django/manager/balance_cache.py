@@ -0,0 +1,74 @@
+# Base imports
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Django imports
+from django.conf import settings
+from django.db import transaction
+
+# Project imports
+from manager.cache_utils import aget_cache, delete_cache, get_cache, set_many_cache_if_newer
+from manager.money import from_cents
+
+
+def balance_cache_key(account_id: int) -> str:
+    return f'balance_{account_id}'
+
+
+def cache_balance(account_id: int, balance_cents: int, version: int):
+    """
+    Write the balance of an account in the cache, unless the cache already holds the same
+    or a newer version of it, so a stale write never overwrites a newer balance
+    """
+    cache_balances([(account_id, balance_cents, version)])
+
+
+def cache_balances_on_commit(balances: Iterable[Tuple[int, int, int]]):
+    """
+    Write (account_id, balance_cents, version) balances in the cache once the current transaction commits
+    """
+    balances = list(balances)
+    transaction.on_commit(lambda: cache_balances(balances))
+
+
+def cache_balances(balances: List[Tuple[int, int, int]]):
+    """
+    Write several (account_id, balance_cents, version) balances like cache_balance, in one round trip.
+    The versions are compared by the shared cache in the same atomic step as the write.
+    """
+    set_many_cache_if_newer(
+        {
+            balance_cache_key(account_id): (
+                {'conta_id': account_id, 'saldo_cents': balance_cents, 'version': version}, version
+            )
+            for account_id, balance_cents, version in balances
+        },
+        settings.BALANCE_CACHE_TTL
+    )
+
+
+def uncache_balance_on_commit(account_id: int):
+    """
+    Remove the balance of an account from the cache once the current transaction commits
+    """
+    transaction.on_commit(lambda: delete_cache(balance_cache_key(account_id)))
+
+
+def get_cached_balance(account_id: int) -> Optional[Dict]:
+    """
+    Return the {conta_id, saldo} payload of an account from the cache, or None on a miss
+    """
+    return _balance_payload(get_cache(balance_cache_key(account_id)))
+
+
+async def aget_cached_balance(account_id: int) -> Optional[Dict]:
+    """
+    Async version of get_cached_balance, for the ASGI views
+    """
+    return _balance_payload(await aget_cache(balance_cache_key(account_id)))
+
+
+def _balance_payload(cached) -> Optional[Dict]:
+    if not isinstance(cached, dict):
+        return None
+
+    return {'conta_id': cached['conta_id'], 'saldo': from_cents(cached['saldo_cents'])}
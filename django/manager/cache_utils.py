@@ -1,8 +1,191 @@
 import json
+import math
+import os
+import random
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
 
+from django.conf import settings
 from django.core.cache import cache
+from redis import asyncio as redis_asyncio
 
-from bank_manager import settings
+
+_MISSING = object()
+
+
+class LocalCache:
+    """
+    In-process LRU cache with a per-key expiry, the first tier in front of the shared cache.
+    Values are kept decoded and are shared between callers, so they must not be mutated.
+
+    Every invalidation bumps a generation. A value read from the shared cache is only stored when its key
+    was not invalidated since the read started, otherwise an invalidation arriving during the read
+    would be followed by the stale value it was meant to drop.
+    """
+
+    # Keys whose last invalidation is remembered, past that every read started before is refused
+    max_invalidations = 10000
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.invalidated = {}
+        self.generation = 0
+        self.floor = 0
+        self.lock = threading.Lock()
+
+    def begin(self) -> int:
+        """
+        Returns the current generation, to pass to set for a value about to be read from the shared cache
+        """
+        with self.lock:
+            return self.generation
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return _MISSING
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                return _MISSING
+
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout, max_size, since=None):
+        with self.lock:
+            if since is not None and (since < self.floor or self.invalidated.get(key, 0) > since):
+                return
+
+            self.entries[key] = (value, time.monotonic() + timeout)
+            self.entries.move_to_end(key)
+            while len(self.entries) > max_size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+            self.generation += 1
+            self.invalidated[key] = self.generation
+            if len(self.invalidated) > self.max_invalidations:
+                self.invalidated.clear()
+                self.floor = self.generation
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.generation += 1
+            self.invalidated.clear()
+            self.floor = self.generation
+
+
+_local_cache = LocalCache()
+_stats = Counter()
+_subscriber = None
+_subscriber_pid = None
+_process_token = None
+
+
+def _local_enabled() -> bool:
+    return settings.L1_CACHE_SIZE > 0
+
+
+def _local_timeout(timeout):
+    """
+    Seconds a value stays in the local tier: at most L1_CACHE_TTL, so an invalidation lost
+    while the subscriber reconnects is only stale for that long
+    """
+    if timeout is None:
+        return settings.L1_CACHE_TTL
+
+    return min(timeout, settings.L1_CACHE_TTL)
+
+
+def _decode(value):
+    try:
+        return json.loads(value)
+    except (TypeError, json.JSONDecodeError):
+        return value
+
+
+def _encode(value):
+    if isinstance(value, dict):
+        return json.dumps(value)
+    return value
+
+
+def _invalidation_channel() -> str:
+    return f'{settings.REDIS_CACHE_KEY_PREFIX}_cache_invalidation'
+
+
+def _on_invalidation(message):
+    token, _, key = message['data'].decode().partition(':')
+    if token != _process_token:
+        _local_cache.delete(key)
+
+
+def _on_subscriber_error(error, pubsub, thread):
+    # Invalidations may have been lost while disconnected, the pubsub resubscribes on the next read
+    _local_cache.clear()
+    time.sleep(1)
+
+
+def _ensure_subscriber():
+    """
+    Start the invalidation subscriber of this process, again in every forked worker
+    """
+    global _subscriber, _subscriber_pid, _process_token
+
+    if _subscriber_pid == os.getpid() or 'django_redis' not in settings.CACHES['default']['BACKEND']:
+        return
+
+    from django_redis import get_redis_connection
+
+    _local_cache.clear()
+    _process_token = f'{os.getpid()}-{uuid.uuid4().hex}'
+    pubsub = get_redis_connection('default').pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(**{_invalidation_channel(): _on_invalidation})
+    _subscriber = pubsub.run_in_thread(sleep_time=1, daemon=True, exception_handler=_on_subscriber_error)
+    _subscriber_pid = os.getpid()
+
+
+def _invalidate(*keys):
+    """
+    Drop keys from the local tier of this process and, over pub/sub, of every other process
+    """
+    if not _local_enabled():
+        return
+
+    for key in keys:
+        _local_cache.delete(key)
+
+    _ensure_subscriber()
+    if _subscriber is not None:
+        from django_redis import get_redis_connection
+
+        pipeline = get_redis_connection('default').pipeline(transaction=False)
+        for key in keys:
+            pipeline.publish(_invalidation_channel(), f'{_process_token}:{key}')
+        pipeline.execute()
+
+
+def _local_get(key):
+    if not _local_enabled():
+        return _MISSING
+
+    _ensure_subscriber()
+    value = _local_cache.get(key)
+    _stats['l1_hits' if value is not _MISSING else 'l1_misses'] += 1
+    return value
+
+
+def _local_set(key, value, timeout, since=None):
+    if _local_enabled() and (timeout is None or timeout > 0):
+        _local_cache.set(key, value, _local_timeout(timeout), settings.L1_CACHE_SIZE, since)
 
 
 def set_cache(key, value, timeout=None):
@@ -12,20 +195,361 @@ def set_cache(key, value, timeout=None):
     :param value: The value to be stored in the cache. Can be a dictionary.
     :param timeout: Time in seconds before the cache expires. If None, uses the default.
     """
-    if isinstance(value, dict):
-        value = json.dumps(value)
-    cache.set(f'{settings.REDIS_CACHE_KEY_PREFIX}_{key}', value, timeout)
+    key = f'{settings.REDIS_CACHE_KEY_PREFIX}_{key}'
+    cache.set(key, _encode(value), timeout)
+    _invalidate(key)
+    _local_set(key, _decode(_encode(value)), timeout)
 
 
-def get_cache(key):
+def get_cache(key, local=True):
     """
     Retrieves a value from the cache.
     :param key: The key to identify the value in the cache.
+    :param local: Read the in-process tier first. False always reads the shared cache.
     :return: The value stored in the cache or None if the key does not exist.
     """
-    value = cache.get(f'{settings.REDIS_CACHE_KEY_PREFIX}_{key}')
-    try:
-        value = json.loads(value)
-    except (TypeError, json.JSONDecodeError):
-        pass
+    key = f'{settings.REDIS_CACHE_KEY_PREFIX}_{key}'
+    if local and (value := _local_get(key)) is not _MISSING:
+        return value
+
+    since = _local_cache.begin()
+    value = cache.get(key)
+    _stats['l2_hits' if value is not None else 'l2_misses'] += 1
+    value = _decode(value)
+    if value is not None:
+        _local_set(key, value, None, since)
+    return value
+
+
+def get_many_cache(keys, local=True):
+    """
+    Retrieves several values from the cache, the ones missing in the in-process tier in one round trip.
+    :param keys: The keys to identify the values in the cache.
+    :param local: Read the in-process tier first. False always reads the shared cache.
+    :return: A dictionary with the keys found and their values.
+    """
+    values, missing = {}, {}
+    for key in keys:
+        prefixed_key = f'{settings.REDIS_CACHE_KEY_PREFIX}_{key}'
+        if local and (value := _local_get(prefixed_key)) is not _MISSING:
+            values[key] = value
+        else:
+            missing[prefixed_key] = key
+
+    if missing:
+        since = _local_cache.begin()
+        found = cache.get_many(missing)
+        _stats['l2_hits'] += len(found)
+        _stats['l2_misses'] += len(missing) - len(found)
+        for prefixed_key, value in found.items():
+            values[missing[prefixed_key]] = _decode(value)
+            _local_set(prefixed_key, values[missing[prefixed_key]], None, since)
+
+    return values
+
+
+def set_many_cache(values, timeout=None):
+    """
+    Sets several values in the cache, pipelined in one round trip.
+    :param values: A dictionary of keys and values, values can be dictionaries.
+    :param timeout: Time in seconds before the cache expires. If None, uses the default.
+    """
+    values = {f'{settings.REDIS_CACHE_KEY_PREFIX}_{key}': _encode(value) for key, value in values.items()}
+    if not values:
+        return
+
+    cache.set_many(values, timeout)
+    _invalidate(*values)
+    for key, value in values.items():
+        _local_set(key, _decode(value), timeout)
+
+
+def add_cache(key, value, timeout=None):
+    """
+    Sets a value in the cache only if the key does not exist yet.
+    :param key: The key to identify the value in the cache.
+    :param value: The value to be stored in the cache. Can be a dictionary.
+    :param timeout: Time in seconds before the cache expires. If None, uses the default.
+    :return: True if the value was stored, False if the key already exists.
+    """
+    # Always decided by the shared cache, the local tier only drops its copy
+    key = f'{settings.REDIS_CACHE_KEY_PREFIX}_{key}'
+    added = cache.add(key, _encode(value), timeout)
+    if added:
+        _invalidate(key)
+    return added
+
+
+# KEYS: (value key, version key) pairs, ARGV: timeout (0 never expires) then a (version, value) pair per key.
+# A value is written unless its version key holds a newer version, or the same version with the value still cached.
+SET_IF_NEWER_SCRIPT = """
+local written = {}
+for i = 1, #KEYS / 2 do
+    local value_key, version_key = KEYS[2 * i - 1], KEYS[2 * i]
+    local version = tonumber(ARGV[2 * i])
+    local current = tonumber(redis.call('GET', version_key))
+    if current and (current > version or (current == version and redis.call('EXISTS', value_key) == 1)) then
+        written[i] = 0
+    else
+        if tonumber(ARGV[1]) > 0 then
+            redis.call('SET', value_key, ARGV[2 * i + 1], 'EX', ARGV[1])
+            redis.call('SET', version_key, version, 'EX', ARGV[1])
+        else
+            redis.call('SET', value_key, ARGV[2 * i + 1])
+            redis.call('SET', version_key, version)
+        end
+        written[i] = 1
+    end
+end
+return written
+"""
+
+_set_if_newer_script = None
+_set_if_newer_lock = threading.Lock()
+
+
+def _set_if_newer_redis(entries, timeout):
+    global _set_if_newer_script
+
+    from django_redis import get_redis_connection
+
+    client = get_redis_connection('default')
+    if _set_if_newer_script is None:
+        _set_if_newer_script = client.register_script(SET_IF_NEWER_SCRIPT)
+
+    keys, args = [], [int(timeout or 0)]
+    for key, (value, version) in entries.items():
+        keys += [cache.make_key(key), cache.make_key(f'{key}_version')]
+        args += [version, cache.client.encode(value)]
+
+    return [bool(flag) for flag in _set_if_newer_script(keys=keys, args=args, client=client)]
+
+
+def _set_if_newer_local(entries, timeout):
+    # Other backends live in this process, the lock makes the comparison and the write atomic
+    with _set_if_newer_lock:
+        versions = cache.get_many([f'{key}_version' for key in entries])
+        cached = cache.get_many(list(entries))
+        written = []
+        for key, (value, version) in entries.items():
+            current = versions.get(f'{key}_version')
+            if current is not None and (current > version or (current == version and key in cached)):
+                written.append(False)
+                continue
+
+            cache.set_many({key: value, f'{key}_version': version}, timeout)
+            written.append(True)
+
+    return written
+
+
+def set_many_cache_if_newer(values, timeout=None):
+    """
+    Sets several versioned values in the cache, each only if the cache does not hold a newer version of it.
+    The versions are compared and written atomically by the shared cache (a Lua script in Redis),
+    so concurrent writers never replace a newer value with an older one.
+    :param values: A dictionary of keys and (value, version) tuples, values can be dictionaries.
+    :param timeout: Time in seconds before the cache expires. If None, uses the default.
+    :return: The keys written.
+    """
+    entries = {
+        f'{settings.REDIS_CACHE_KEY_PREFIX}_{key}': (_encode(value), version)
+        for key, (value, version) in values.items()
+    }
+    if not entries:
+        return []
+
+    if 'django_redis' in settings.CACHES['default']['BACKEND']:
+        written = _set_if_newer_redis(entries, timeout)
+    else:
+        written = _set_if_newer_local(entries, timeout)
+
+    written = [key for key, flag in zip(entries, written) if flag]
+    if written:
+        _invalidate(*written)
+        for key in written:
+            _local_set(key, _decode(entries[key][0]), timeout)
+
+    return [key[len(settings.REDIS_CACHE_KEY_PREFIX) + 1:] for key in written]
+
+
+def delete_cache(key):
+    """
+    Removes a value from the cache.
+    :param key: The key to identify the value in the cache.
+    """
+    key = f'{settings.REDIS_CACHE_KEY_PREFIX}_{key}'
+    cache.delete(key)
+    _invalidate(key)
+
+
+# KEYS: the key, ARGV: the expected value. Deletes the key only while it still holds that value.
+DELETE_IF_EQUAL_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_delete_if_equal_script = None
+_delete_if_equal_lock = threading.Lock()
+
+
+def delete_cache_if_equal(key, value):
+    """
+    Removes a value from the cache only if it still holds the given value, compared and deleted atomically
+    by the shared cache (a Lua script in Redis). Used to release a lock taken with add_cache by its holder only.
+    :param key: The key to identify the value in the cache.
+    :param value: The value the key must hold, not a dictionary.
+    :return: True if the value was removed.
+    """
+    global _delete_if_equal_script
+
+    key = f'{settings.REDIS_CACHE_KEY_PREFIX}_{key}'
+    if 'django_redis' in settings.CACHES['default']['BACKEND']:
+        from django_redis import get_redis_connection
+
+        client = get_redis_connection('default')
+        if _delete_if_equal_script is None:
+            _delete_if_equal_script = client.register_script(DELETE_IF_EQUAL_SCRIPT)
+        deleted = bool(
+            _delete_if_equal_script(keys=[cache.make_key(key)], args=[cache.client.encode(value)], client=client)
+        )
+    else:
+        # Other backends live in this process, the lock makes the comparison and the delete atomic
+        with _delete_if_equal_lock:
+            deleted = cache.get(key) == value
+            if deleted:
+                cache.delete(key)
+
+    if deleted:
+        _invalidate(key)
+    return deleted
+
+
+def _is_fresh(entry, beta) -> bool:
+    """
+    Probabilistic early expiration (XFetch): the closer an entry is to its expiry and the longer it took
+    to compute, the more likely a read recomputes it, so hot entries are refreshed before they expire
+    """
+    if not isinstance(entry, dict) or 'expires_at' not in entry:
+        return False
+
+    return time.time() - entry['delta'] * beta * math.log(1.0 - random.random()) < entry['expires_at']
+
+
+def _compute_and_store(key, compute, timeout, stale_timeout):
+    started = time.monotonic()
+    value = compute()
+    set_cache(
+        key,
+        {'value': value, 'delta': time.monotonic() - started, 'expires_at': time.time() + timeout},
+        timeout + stale_timeout
+    )
+    return value
+
+
+def get_or_compute(key, compute, timeout, beta=1.0, stale_timeout=None, lock_timeout=None):
+    """
+    Returns the cached value of a key, computing and caching it when it is missing or expiring.
+    Only one process recomputes a key at a time, behind a lock in the shared cache: the others keep
+    returning the stale value, which is kept stale_timeout seconds past its expiry, or wait for the
+    recomputed value when there is none.
+    :param key: The key to identify the value in the cache.
+    :param compute: Function without arguments that returns the value, JSON serializable.
+    :param timeout: Time in seconds the value is fresh.
+    :param beta: Eagerness of the early refresh, above 1 refreshes earlier, 0 disables it.
+    :param stale_timeout: Time in seconds a stale value is still returned. If None, uses CACHE_STALE_TTL.
+    :param lock_timeout: Time in seconds a recomputation holds the lock. If None, uses CACHE_LOCK_TIMEOUT.
+    :return: The value.
+    """
+    stale_timeout = settings.CACHE_STALE_TTL if stale_timeout is None else stale_timeout
+    lock_timeout = settings.CACHE_LOCK_TIMEOUT if lock_timeout is None else lock_timeout
+
+    entry = get_cache(key)
+    if _is_fresh(entry, beta):
+        return entry['value']
+
+    # A computation slower than lock_timeout loses its lock to another process, the token keeps it
+    # from releasing the lock of that process when it finishes
+    token = uuid.uuid4().hex
+    if add_cache(f'{key}_lock', token, lock_timeout):
+        try:
+            return _compute_and_store(key, compute, timeout, stale_timeout)
+        finally:
+            delete_cache_if_equal(f'{key}_lock', token)
+
+    if isinstance(entry, dict) and 'value' in entry:
+        return entry['value']
+
+    # Nothing cached yet, wait for the process computing it
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = get_cache(key, local=False)
+        if isinstance(entry, dict) and 'value' in entry:
+            return entry['value']
+
+    return compute()
+
+
+def get_cache_stats():
+    """
+    Returns the hit and miss counters of this process, l1 for the in-process tier and l2 for the shared cache.
+    """
+    return {name: _stats[name] for name in ('l1_hits', 'l1_misses', 'l2_hits', 'l2_misses')}
+
+
+def clear_local_cache():
+    """
+    Empties the in-process tier and its counters.
+    """
+    _local_cache.clear()
+    _stats.clear()
+
+
+_async_client = None
+
+
+def get_async_client():
+    """
+    Returns the asyncio Redis client of this process, or None when the cache is not Redis.
+    """
+    global _async_client
+
+    if 'django_redis' not in settings.CACHES['default']['BACKEND']:
+        return None
+
+    if _async_client is None:
+        _async_client = redis_asyncio.from_url(settings.CACHES['default']['LOCATION'])
+
+    return _async_client
+
+
+async def aget_cache(key):
+    """
+    Retrieves a value from the cache without blocking the event loop.
+    Reads Redis through its asyncio client, other backends fall back to the Django cache.
+    :param key: The key to identify the value in the cache.
+    :return: The value stored in the cache or None if the key does not exist.
+    """
+    key = f'{settings.REDIS_CACHE_KEY_PREFIX}_{key}'
+    if (value := _local_get(key)) is not _MISSING:
+        return value
+
+    client = get_async_client()
+    since = _local_cache.begin()
+
+    if client is None:
+        value = await cache.aget(key)
+    else:
+        value = await client.get(cache.make_key(key))
+        if value is not None:
+            # Same serialization as the django-redis client used by set_cache
+            value = cache.client.decode(value)
+
+    _stats['l2_hits' if value is not None else 'l2_misses'] += 1
+    value = _decode(value)
+    if value is not None:
+        _local_set(key, value, None, since)
     return value
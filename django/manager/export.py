@@ -0,0 +1,62 @@
+# Base imports
+import csv
+import json
+from typing import Iterable, Iterator, Tuple
+
+# Django imports
+from django.db.models import QuerySet
+
+# Project imports
+from manager.money import from_cents
+
+
+EXPORT_COLUMNS = ('id', 'data', 'forma_pagamento', 'valor', 'taxa', 'cashback')
+
+EXPORT_FIELDS = ('id', 'created_at', 'type', 'value_cents', 'tax_cents', 'cashback_cents')
+
+
+class Echo:
+    """ File-like object for csv.writer that returns the line instead of buffering it. """
+
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset: QuerySet, chunk_size: int) -> Iterator[Tuple]:
+    """
+    Stream the rows of the transactions as tuples, chunk_size rows per fetch.
+    On PostgreSQL iterator() reads through a server-side cursor, so memory does not grow with the rows.
+    """
+    return queryset.order_by('created_at', 'id').values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+
+
+def _amount(cents):
+    # Fixed two decimal text in every format, so an amount reads the same in CSV and NDJSON
+    return None if cents is None else str(from_cents(cents))
+
+
+def csv_stream(rows: Iterable[Tuple]) -> Iterator[str]:
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for pk, created_at, payment_type, value, tax, cashback in rows:
+        yield writer.writerow(
+            (pk, created_at.isoformat(), payment_type, _amount(value), _amount(tax), _amount(cashback))
+        )
+
+
+def ndjson_stream(rows: Iterable[Tuple]) -> Iterator[str]:
+    for pk, created_at, payment_type, value, tax, cashback in rows:
+        yield json.dumps({
+            'id': pk,
+            'data': created_at.isoformat(),
+            'forma_pagamento': payment_type,
+            'valor': _amount(value),
+            'taxa': _amount(tax),
+            'cashback': _amount(cashback),
+        }) + '\n'
+
+
+EXPORT_FORMATS = {
+    'csv': (csv_stream, 'text/csv'),
+    'ndjson': (ndjson_stream, 'application/x-ndjson'),
+}
@@ -0,0 +1,205 @@
+"""
+Compiled validators and encoders for the hot payloads, the opt-in (FAST_VALIDATION) fast path of the
+transacao and conta endpoints. They are compiled from the DRF serializers, so the fields, the validated
+data and the error details (messages, codes and order) are the same as the serializers', without the
+per-request field binding and the validation machinery.
+"""
+# Base imports
+import math
+import re
+from collections.abc import Mapping
+from typing import Callable, Dict, List, Tuple
+
+# Third party imports
+from rest_framework import serializers
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.fields import empty
+from rest_framework.settings import api_settings
+
+# Project imports
+from manager.serializers import (
+    AccountCreateSerializer,
+    AccountSerializer,
+    CentsField,
+    TransactionBatchSerializer,
+    TransactionSerializer,
+)
+from manager.money import to_cents, MAX_AMOUNT
+
+
+RE_DECIMAL = re.compile(r'\.0*\s*$')  # Same as IntegerField.re_decimal
+
+
+class FieldError(Exception):
+
+    def __init__(self, detail: List):
+        self.detail = detail
+
+
+def _fail(messages: Dict, key: str, **kwargs):
+    # Messages are lazy translations, formatted in the language of the request like Field.fail
+    raise FieldError([ErrorDetail(str(messages[key]).format(**kwargs), code=key)])
+
+
+def _integer_parser(field: serializers.IntegerField) -> Callable:
+    messages, max_length = field.error_messages, field.MAX_STRING_LENGTH
+
+    def parse(data) -> int:
+        if isinstance(data, str) and len(data) > max_length:
+            _fail(messages, 'max_string_length')
+
+        try:
+            return int(RE_DECIMAL.sub('', str(data)))
+        except (ValueError, TypeError):
+            _fail(messages, 'invalid')
+
+    return parse
+
+
+def _cents_parser(field: CentsField) -> Callable:
+    messages, max_length = field.error_messages, field.MAX_STRING_LENGTH
+
+    def parse(data) -> int:
+        if isinstance(data, str) and len(data) > max_length:
+            _fail(messages, 'max_string_length')
+
+        try:
+            value = float(data)
+        except (TypeError, ValueError):
+            _fail(messages, 'invalid')
+
+        if not math.isfinite(value):
+            _fail(messages, 'invalid')
+        if value > MAX_AMOUNT:
+            _fail(messages, 'max_value', max_value=MAX_AMOUNT)
+        if value < -MAX_AMOUNT:
+            _fail(messages, 'min_value', min_value=-MAX_AMOUNT)
+
+        return to_cents(value)
+
+    return parse
+
+
+def _choice_parser(field: serializers.ChoiceField) -> Callable:
+    messages, choices = field.error_messages, dict(field.choice_strings_to_values)
+
+    def parse(data):
+        try:
+            return choices[str(data)]
+        except KeyError:
+            _fail(messages, 'invalid_choice', input=data)
+
+    return parse
+
+
+# Most specific classes first, CentsField is a FloatField
+PARSERS = (
+    (CentsField, _cents_parser),
+    (serializers.ChoiceField, _choice_parser),
+    (serializers.IntegerField, _integer_parser),
+)
+
+
+def _compile_field(field: serializers.Field) -> Callable:
+    if field.validators or not field.required or field.allow_null or getattr(field, 'allow_blank', False):
+        raise TypeError(f'{field.field_name}: only required fields without validators are compiled')
+
+    for field_class, parser in PARSERS:
+        if isinstance(field, field_class):
+            return parser(field)
+
+    raise TypeError(f'{field.field_name}: {field.__class__.__name__} is not supported')
+
+
+def compile_validator(serializer_class) -> Callable[[object], Dict]:
+    """
+    Compile a serializer of flat required fields into a function that returns the validated data
+    of a payload, or raises the ValidationError that serializer.is_valid(raise_exception=True) raises.
+    validate_<field> methods of the serializer are kept, a validate() override is not supported.
+    """
+    if serializer_class.validate is not serializers.Serializer.validate:
+        raise TypeError(f'{serializer_class.__name__}.validate is not supported')
+
+    serializer = serializer_class()
+    fields: Tuple = tuple(
+        (name, _compile_field(field), getattr(serializer, f'validate_{name}', None))
+        for name, field in serializer.fields.items()
+        if not field.read_only
+    )
+    messages = serializers.Field.default_error_messages
+    invalid = serializers.Serializer.default_error_messages['invalid']
+
+    def validate(data) -> Dict:
+        if data is None:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [ErrorDetail('No data provided', code='null')]
+            })
+
+        if not isinstance(data, Mapping):
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [str(invalid).format(datatype=type(data).__name__)]
+            }, code='invalid')
+
+        validated, errors = {}, {}
+        for name, parse, validate_method in fields:
+            value = data.get(name, empty)
+            try:
+                if value is empty:
+                    _fail(messages, 'required')
+                if value is None:
+                    _fail(messages, 'null')
+
+                value = parse(value)
+                if validate_method is not None:
+                    value = validate_method(value)
+            except FieldError as error:
+                errors[name] = error.detail
+                continue
+            except serializers.ValidationError as error:
+                errors[name] = error.detail
+                continue
+
+            validated[name] = value
+
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        return validated
+
+    return validate
+
+
+def compile_encoder(serializer_class) -> Callable[[object], Dict]:
+    """
+    Compile a serializer of SerializerMethodField and plain fields into a function that returns
+    the same representation as serializer_class(instance).data
+    """
+    serializer = serializer_class()
+    getters = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+
+        if isinstance(field, serializers.SerializerMethodField):
+            getters.append((name, getattr(serializer, field.method_name or f'get_{name}'), None))
+        elif field.source_attrs and len(field.source_attrs) == 1:
+            source = field.source_attrs[0]
+            getters.append((name, lambda instance, source=source: getattr(instance, source), field.to_representation))
+        else:
+            raise TypeError(f'{name}: source {field.source} is not supported')
+
+    def encode(instance) -> Dict:
+        data = {}
+        for name, getter, to_representation in getters:
+            value = getter(instance)
+            data[name] = to_representation(value) if to_representation is not None and value is not None else value
+
+        return data
+
+    return encode
+
+
+validate_transaction = compile_validator(TransactionSerializer)
+validate_transaction_item = compile_validator(TransactionBatchSerializer)
+validate_account_create = compile_validator(AccountCreateSerializer)
+encode_account = compile_encoder(AccountSerializer)
@@ -1,8 +1,10 @@
 # Base imports
+from typing import Dict
 import django_filters.rest_framework
 
 # Project imports
-from manager.models import Account
+from manager.models import Account, Transaction, TypeTransaction
+from manager.money import to_cents
 
 
 class AccountFilter(django_filters.FilterSet):
@@ -18,3 +20,58 @@ class AccountFilter(django_filters.FilterSet):
     class Meta:
         model = Account
         fields = []
+
+
+class CentsFilter(django_filters.NumberFilter):
+    """ Amount in reais in the query string, compared against a cents column. """
+
+    def filter(self, qs, value):
+        if value is not None:
+            value = to_cents(value)
+        return super().filter(qs, value)
+
+
+class TransactionFilter(django_filters.FilterSet):
+    conta_id = django_filters.NumberFilter(
+        field_name='account_id',
+        lookup_expr='exact'
+    )
+    forma_pagamento = django_filters.ChoiceFilter(
+        field_name='type',
+        choices=TypeTransaction.choices
+    )
+    valor_min = CentsFilter(
+        field_name='value_cents',
+        lookup_expr='gte'
+    )
+    valor_max = CentsFilter(
+        field_name='value_cents',
+        lookup_expr='lte'
+    )
+    data_inicio = django_filters.IsoDateTimeFilter(
+        field_name='created_at',
+        lookup_expr='gte'
+    )
+    data_fim = django_filters.IsoDateTimeFilter(
+        field_name='created_at',
+        lookup_expr='lt'
+    )
+
+    def matches(self, row: Dict) -> bool:
+        """
+            Apply the validated filters to a transaction read from the archive
+        """
+        data = self.form.cleaned_data
+        checks = (
+            ('conta_id', lambda value: row['account_id'] == value),
+            ('forma_pagamento', lambda value: row['type'] == value),
+            ('valor_min', lambda value: row['value_cents'] >= to_cents(value)),
+            ('valor_max', lambda value: row['value_cents'] <= to_cents(value)),
+            ('data_inicio', lambda value: row['created_at'] >= value),
+            ('data_fim', lambda value: row['created_at'] < value),
+        )
+        return all(check(data[name]) for name, check in checks if data.get(name) not in (None, ''))
+
+    class Meta:
+        model = Transaction
+        fields = []
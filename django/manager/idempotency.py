@@ -0,0 +1,204 @@
+# Base imports
+import hashlib
+import json
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+from typing import Callable, Optional
+
+# Django imports
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+# Third party imports
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+# Project imports
+from manager.cache_utils import add_cache, delete_cache, get_cache, set_cache
+from manager.models import IdempotencyKey
+from shared.http.renderers import ORJSONRenderer
+from shared.http.responses import api_exception_response
+
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+
+class IdempotencyConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = _('A request with this Idempotency-Key is still being processed.')
+    default_code = 'idempotency_conflict'
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = _('This Idempotency-Key was already used with a different request.')
+    default_code = 'idempotency_key_reused'
+
+
+def get_idempotency_key(request) -> Optional[str]:
+    """
+    Return the Idempotency-Key of the request scoped to its user, or None if it was not sent
+    """
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if not key:
+        return None
+
+    return hashlib.sha256(f'{request.user.pk}:{key}'.encode()).hexdigest()
+
+
+def get_request_fingerprint(request) -> str:
+    """
+    Return a digest of the method, path and payload of the request
+    """
+    if hasattr(request, 'data'):
+        # DRF request, the parsed payload, form data as lists of values
+        data = dict(request.data.lists()) if hasattr(request.data, 'lists') else request.data
+        payload = json.dumps(data, sort_keys=True, default=str).encode()
+    else:
+        payload = request.body
+
+    return hashlib.sha256(f'{request.method}:{request.path}:'.encode() + payload).hexdigest()
+
+
+def expired_before() -> datetime:
+    return timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+
+
+def get_stored_response(key: str, fingerprint: str) -> Optional[Response]:
+    """
+    Return the stored response of a key, from the cache or from the database.
+    Raises IdempotencyKeyReused when the key was stored for a request with another fingerprint.
+    """
+    stored = get_cache(f'idempotency_{key}')
+
+    if stored is None:
+        record = IdempotencyKey.objects.filter(key=key, created_at__gte=expired_before()).first()
+        if record is None:
+            return None
+
+        stored = {'status': record.status_code, 'data': record.response, 'fingerprint': record.fingerprint}
+        remaining = (record.created_at - expired_before()).total_seconds()
+        set_cache(f'idempotency_{key}', stored, max(int(remaining), 1))
+
+    # Keys stored before fingerprints were recorded have none
+    if stored.get('fingerprint') and stored['fingerprint'] != fingerprint:
+        raise IdempotencyKeyReused()
+
+    return Response(stored['data'], status=stored['status'])
+
+
+def wait_stored_response(key: str, fingerprint: str) -> Optional[Response]:
+    """
+    Wait for a concurrent request with the same key to store its response
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        if response := get_stored_response(key, fingerprint):
+            return response
+
+    return None
+
+
+def store_response(key: str, fingerprint: str, response: Response):
+    """
+    Store the response of a key in the database, inside the transaction of the request
+    """
+    # Keep the stored data exactly as it was rendered to the client
+    data = json.loads(ORJSONRenderer().render(response.data) or 'null')
+
+    # An expired record of the key, not deleted by the cleanup yet, would fail the unique key
+    IdempotencyKey.objects.filter(key=key, created_at__lt=expired_before()).delete()
+    IdempotencyKey.objects.create(
+        key=key,
+        fingerprint=fingerprint,
+        status_code=response.status_code,
+        response=data,
+    )
+
+    transaction.on_commit(
+        lambda: set_cache(
+            f'idempotency_{key}',
+            {'status': response.status_code, 'data': data, 'fingerprint': fingerprint},
+            settings.IDEMPOTENCY_KEY_TTL
+        )
+    )
+
+
+def delete_expired_keys() -> int:
+    """
+    Delete the keys older than IDEMPOTENCY_KEY_TTL, returns the number of keys deleted
+    """
+    deleted, _rows = IdempotencyKey.objects.filter(created_at__lt=expired_before()).delete()
+    return deleted
+
+
+def run_idempotent(request, view: Callable[[], Response]) -> Response:
+    """
+    Execute a view once per Idempotency-Key of the request.
+    The view runs inside the database transaction that stores its response, so the debit of
+    a create_transaction is committed together with the key or not at all.
+    """
+    key = get_idempotency_key(request)
+    if key is None:
+        return view()
+
+    fingerprint = get_request_fingerprint(request)
+    try:
+        if response := get_stored_response(key, fingerprint):
+            return response
+
+        if not add_cache(f'idempotency_lock_{key}', 1, settings.IDEMPOTENCY_LOCK_TIMEOUT):
+            if response := wait_stored_response(key, fingerprint):
+                return response
+            return api_exception_response(exception=IdempotencyConflict())
+
+        try:
+            with transaction.atomic():
+                response = view()
+                if response.status_code < status.HTTP_500_INTERNAL_SERVER_ERROR:
+                    store_response(key, fingerprint, response)
+
+        except IntegrityError:
+            # Another request stored this key first, this transaction was rolled back
+            if response := get_stored_response(key, fingerprint):
+                return response
+            raise
+
+        finally:
+            delete_cache(f'idempotency_lock_{key}')
+
+    except IdempotencyKeyReused as exception:
+        return api_exception_response(exception=exception)
+
+    return response
+
+
+def idempotent(view_method):
+    """
+    Make a view method idempotent by the Idempotency-Key header.
+    A replay returns the stored response without executing the view again,
+    and concurrent duplicates collapse to one execution.
+    A key reused with another payload is rejected with 422.
+    Server errors are not stored, so they can be retried.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        return run_idempotent(request, lambda: view_method(self, request, *args, **kwargs))
+
+    return wrapper
+
+
+def idempotent_function(view):
+    """
+    Same as idempotent, for a view function taking the request as its first argument
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        return run_idempotent(request, lambda: view(request, *args, **kwargs))
+
+    return wrapper
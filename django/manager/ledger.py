@@ -0,0 +1,209 @@
+"""
+Ledger of signed balance movements, the audit trail of every account and the source of its statement and
+of its balance as of a past date (one snapshot plus the entries after it).
+The current balance is still the materialized Account.balance_cents, whose conditional UPDATE guards against
+overdrafts; the ledger INSERTs are written next to it, in the same transaction, and do not replace it.
+"""
+# Base imports
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+
+# Django imports
+from django.db.models import Count, F, Max, OuterRef, Q, QuerySet, Subquery, Sum, Window
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+# Project imports
+from manager.models import Account, BalanceSnapshot, EntryType, LedgerEntry, Transaction
+
+
+def build_transaction_entries(instance: Transaction) -> List[LedgerEntry]:
+    """
+    Return the ledger entries of a transaction: the debit, the fee and the inline cashback
+    """
+    entries = [
+        LedgerEntry(
+            account_id=instance.account_id,
+            transaction_id=instance.id,
+            type=EntryType.DEBIT,
+            amount_cents=-instance.value_cents,
+        )
+    ]
+
+    if instance.tax_cents:
+        entries.append(
+            LedgerEntry(
+                account_id=instance.account_id,
+                transaction_id=instance.id,
+                type=EntryType.FEE,
+                amount_cents=-instance.tax_cents,
+            )
+        )
+
+    if instance.cashback_cents:
+        entries.append(build_cashback_entry(instance))
+
+    return entries
+
+
+def build_cashback_entry(instance: Transaction) -> LedgerEntry:
+    return LedgerEntry(
+        account_id=instance.account_id,
+        transaction_id=instance.id,
+        type=EntryType.CASHBACK,
+        amount_cents=instance.cashback_cents,
+    )
+
+
+def record_transactions(transactions: Iterable[Transaction]):
+    """
+    Insert the ledger entries of the transactions with one bulk INSERT
+    """
+    entries = []
+    for instance in transactions:
+        entries.extend(build_transaction_entries(instance))
+
+    LedgerEntry.objects.bulk_create(entries)
+
+
+def record_deposit(account: Account):
+    """
+    Insert the opening balance of an account
+    """
+    LedgerEntry.objects.create(
+        account=account,
+        type=EntryType.DEPOSIT,
+        amount_cents=account.balance_cents,
+    )
+
+
+def get_balance(account_id: int, at: Optional[datetime] = None) -> int:
+    """
+    Return the balance in cents of an account.
+    Without a date it is the materialized Account.balance_cents; with a date it is computed
+    from the latest snapshot before that date plus the ledger entries after it.
+    """
+    if at is None:
+        return Account.objects.values_list('balance_cents', flat=True).get(id=account_id)
+
+    snapshot = BalanceSnapshot.objects.filter(
+        account_id=account_id,
+        last_entry_at__lte=at,
+    ).order_by('-last_entry_id').first()
+
+    entries = LedgerEntry.objects.filter(account_id=account_id, created_at__lte=at)
+    balance = 0
+    if snapshot is not None:
+        entries = entries.filter(id__gt=snapshot.last_entry_id)
+        balance = snapshot.balance_cents
+
+    return balance + (entries.aggregate(total=Sum('amount_cents'))['total'] or 0)
+
+
+def get_balance_through(account_id: int, created_at: datetime, entry_id: int) -> int:
+    """
+    Return the balance in cents of an account right after the entry (created_at, entry_id),
+    from the latest snapshot before that entry plus the ledger entries after the snapshot
+    """
+    snapshot = BalanceSnapshot.objects.filter(
+        account_id=account_id,
+        last_entry_at__lte=created_at,
+        last_entry_id__lte=entry_id,
+    ).order_by('-last_entry_id').first()
+
+    entries = LedgerEntry.objects.filter(account_id=account_id).filter(
+        Q(created_at__lt=created_at) | Q(created_at=created_at, id__lte=entry_id)
+    )
+    balance = 0
+    if snapshot is not None:
+        entries = entries.filter(id__gt=snapshot.last_entry_id)
+        balance = snapshot.balance_cents
+
+    return balance + (entries.aggregate(total=Sum('amount_cents'))['total'] or 0)
+
+
+def get_statement(account_id: int) -> QuerySet:
+    """
+    Return the ledger entries of an account, newest first, annotated with running_total:
+    the sum of the amounts from the first entry of the page down to each entry
+    """
+    return LedgerEntry.objects.filter(account_id=account_id).annotate(
+        running_total=Window(
+            Sum('amount_cents'),
+            order_by=[F('created_at').desc(), F('id').desc()],
+        )
+    )
+
+
+def set_running_balances(account_id: int, page: List[LedgerEntry]) -> List[LedgerEntry]:
+    """
+    Set balance_cents, the balance right after each entry, on a page of get_statement
+    """
+    if not page:
+        return page
+
+    anchor = get_balance_through(account_id, page[0].created_at, page[0].id)
+    for entry in page:
+        entry.balance_cents = anchor - entry.running_total + entry.amount_cents
+
+    return page
+
+
+def take_balance_snapshots(min_entries: int, delay: float) -> int:
+    """
+    Snapshot the balance of every account with at least min_entries ledger entries since its
+    last snapshot. Entries newer than delay seconds are left out, so a snapshot never skips
+    an entry whose transaction had not committed yet. Returns the number of snapshots taken.
+    """
+    until = timezone.now() - timedelta(seconds=delay)
+    snapshots = []
+
+    # The cutoff is an id, the next snapshot continues from id__gt=last_entry_id: concurrent inserts may
+    # give a lower id a later created_at. Every id up to the newest entry older than delay was allocated
+    # before that entry was inserted, so its transaction has committed too.
+    cutoff_id = LedgerEntry.objects.filter(
+        created_at__lte=until
+    ).order_by('-id').values_list('id', flat=True).first()
+    if cutoff_id is None:
+        return 0
+
+    last_snapshot = BalanceSnapshot.objects.filter(
+        account_id=OuterRef('account_id')
+    ).order_by('-last_entry_id').values('last_entry_id')[:1]
+
+    accounts = LedgerEntry.objects.filter(
+        id__lte=cutoff_id,
+        id__gt=Coalesce(Subquery(last_snapshot), 0),
+    ).values('account_id').annotate(
+        count=Count('id')
+    ).filter(count__gte=min_entries).values_list('account_id', flat=True)
+
+    for account_id in accounts:
+        snapshot = BalanceSnapshot.objects.filter(account_id=account_id).order_by('-last_entry_id').first()
+        entries = LedgerEntry.objects.filter(account_id=account_id, id__lte=cutoff_id)
+        balance = 0
+        if snapshot is not None:
+            entries = entries.filter(id__gt=snapshot.last_entry_id)
+            balance = snapshot.balance_cents
+
+        tail = entries.aggregate(
+            count=Count('id'),
+            total=Sum('amount_cents'),
+            last_entry_id=Max('id'),
+            last_entry_at=Max('created_at'),
+        )
+        if tail['count'] < min_entries:
+            continue
+
+        snapshots.append(
+            BalanceSnapshot(
+                account_id=account_id,
+                last_entry_id=tail['last_entry_id'],
+                last_entry_at=tail['last_entry_at'],
+                balance_cents=balance + tail['total'],
+            )
+        )
+
+    BalanceSnapshot.objects.bulk_create(snapshots)
+
+    return len(snapshots)
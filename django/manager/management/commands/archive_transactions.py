@@ -0,0 +1,63 @@
+# Base imports
+from datetime import datetime, timezone as dt_timezone
+
+# Django imports
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+# Project imports
+from manager.archive import (
+    archive_detached_partition,
+    archive_month,
+    get_archive_extension,
+    get_live_cutoff,
+    PendingCashbackError,
+)
+from manager.models import Transaction
+from manager.partitions import is_partitioned, list_detached_partitions, month_start
+
+
+class Command(BaseCommand):
+    help = 'Move the transactions older than the retention to compressed archive files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--before',
+            type=parse_date,
+            help='Archive the transactions created before this date (YYYY-MM-DD), '
+                 'defaults to TRANSACTION_RETENTION_MONTHS months ago'
+        )
+        parser.add_argument('--chunk-size', type=int, default=settings.ARCHIVE_CHUNK_SIZE)
+        parser.add_argument('--batch-size', type=int, default=settings.ARCHIVE_DELETE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        cutoff = before = get_live_cutoff(timezone.now().date())
+        if options['before']:
+            before = datetime.combine(options['before'], datetime.min.time(), tzinfo=dt_timezone.utc)
+
+        # The transaction list only reads the archive before the live cutoff
+        if before > cutoff:
+            raise CommandError(f'--before must not be later than the live cutoff {cutoff:%Y-%m-%d}')
+
+        self.stdout.write(f'Archiving transactions before {before:%Y-%m-%d} as {get_archive_extension()}')
+
+        if is_partitioned():
+            for table, month in list_detached_partitions():
+                if month < month_start(before):
+                    try:
+                        archived = archive_detached_partition(table, month, options['chunk_size'])
+                    except PendingCashbackError as error:
+                        self.stderr.write(f'{error}, partition kept')
+                        continue
+                    self.stdout.write(f'{table}: {archived} transactions archived, partition dropped')
+
+        months = Transaction.objects.filter(created_at__lt=before).datetimes(
+            'created_at',
+            'month',
+            tzinfo=dt_timezone.utc
+        )
+        for month in months:
+            archived = archive_month(month.date(), before, options['chunk_size'], options['batch_size'])
+            self.stdout.write(f'{month:%Y-%m}: {archived} transactions archived')
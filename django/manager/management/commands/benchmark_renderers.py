@@ -0,0 +1,71 @@
+# Base imports
+import io
+import timeit
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+# Django imports
+from django.core.management.base import BaseCommand
+
+# Third party imports
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+# Project imports
+from shared.http.parsers import ORJSONParser
+from shared.http.renderers import ORJSONRenderer
+from shared.http.responses import api_exception_response
+
+
+class Command(BaseCommand):
+    help = 'Compare the orjson renderer and parser with the stock DRF JSON renderer and parser'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        account = {'conta_id': 123, 'saldo': Decimal('1050.25')}
+        error = api_exception_response(
+            exception=ValidationError({'conta_id': ['Conta com conta_id não existe!']})
+        ).data
+        transactions = {
+            'next': None,
+            'results': [
+                {
+                    'id': index,
+                    'conta_id': 123,
+                    'forma_pagamento': 'P',
+                    'valor': Decimal('10.50'),
+                    'taxa': Decimal('0.00'),
+                    'cashback': Decimal('0.11'),
+                    'data': datetime(2024, 1, 1, 12, 0, index % 60, tzinfo=dt_timezone.utc).isoformat(),
+                }
+                for index in range(50)
+            ],
+        }
+        body = b'{"forma_pagamento": "P", "conta_id": 123, "valor": 10.5}'
+
+        cases = (
+            ('render conta', lambda: JSONRenderer().render(account), lambda: ORJSONRenderer().render(account)),
+            ('render error', lambda: JSONRenderer().render(error), lambda: ORJSONRenderer().render(error)),
+            (
+                'render 50 transacoes',
+                lambda: JSONRenderer().render(transactions),
+                lambda: ORJSONRenderer().render(transactions),
+            ),
+            (
+                'parse transacao',
+                lambda: JSONParser().parse(io.BytesIO(body)),
+                lambda: ORJSONParser().parse(io.BytesIO(body)),
+            ),
+        )
+
+        iterations = options['iterations']
+        for name, stock, fast in cases:
+            stock_time = min(timeit.repeat(stock, number=iterations, repeat=3)) / iterations
+            fast_time = min(timeit.repeat(fast, number=iterations, repeat=3)) / iterations
+            self.stdout.write(
+                f'{name}: DRF {stock_time * 1e6:.1f} us, orjson {fast_time * 1e6:.1f} us '
+                f'({stock_time / fast_time:.1f}x)'
+            )
@@ -0,0 +1,71 @@
+# Base imports
+import timeit
+
+# Django imports
+from django.core.management.base import BaseCommand
+
+# Third party imports
+from rest_framework.exceptions import ValidationError
+
+# Project imports
+from manager.fast_serializers import encode_account, validate_account_create, validate_transaction_item
+from manager.models import Account
+from manager.serializers import AccountCreateSerializer, AccountSerializer, TransactionBatchSerializer
+
+
+def drf_validate(serializer_class, payload):
+    serializer = serializer_class(data=payload)
+    serializer.is_valid()
+    return serializer.validated_data
+
+
+def compiled_validate(validate, payload):
+    try:
+        return validate(payload)
+    except ValidationError as error:
+        return error.detail
+
+
+class Command(BaseCommand):
+    help = 'Compare the DRF serializers with the compiled validators and encoders of the hot payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        # Without the conta_id existence check, so only the CPU cost of the validation is measured
+        valid = {'forma_pagamento': 'P', 'conta_id': 123, 'valor': 10.5}
+        invalid = {'forma_pagamento': 'X', 'conta_id': 'abc'}
+        account = Account(id=123, balance_cents=1050)
+
+        cases = (
+            (
+                'transacao valid',
+                lambda: drf_validate(TransactionBatchSerializer, valid),
+                lambda: validate_transaction_item(valid),
+            ),
+            (
+                'transacao invalid',
+                lambda: drf_validate(TransactionBatchSerializer, invalid),
+                lambda: compiled_validate(validate_transaction_item, invalid),
+            ),
+            (
+                'conta valid',
+                lambda: drf_validate(AccountCreateSerializer, {'conta_id': 123, 'valor': 10.5}),
+                lambda: validate_account_create({'conta_id': 123, 'valor': 10.5}),
+            ),
+            (
+                'conta encode',
+                lambda: AccountSerializer(account).data,
+                lambda: encode_account(account),
+            ),
+        )
+
+        iterations = options['iterations']
+        for name, drf, compiled in cases:
+            drf_time = min(timeit.repeat(drf, number=iterations, repeat=3)) / iterations
+            compiled_time = min(timeit.repeat(compiled, number=iterations, repeat=3)) / iterations
+            self.stdout.write(
+                f'{name}: DRF {drf_time * 1e6:.1f} us, compiled {compiled_time * 1e6:.1f} us '
+                f'({drf_time / compiled_time:.1f}x)'
+            )
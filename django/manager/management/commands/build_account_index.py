@@ -0,0 +1,19 @@
+# Django imports
+from django.core.management.base import BaseCommand, CommandError
+
+# Project imports
+from manager.account_index import build_account_index, get_client
+
+
+class Command(BaseCommand):
+    help = 'Build the Redis bitmap of existing conta_id used to answer lookups of missing accounts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        if get_client() is None:
+            raise CommandError('The account index needs the Redis cache')
+
+        count = build_account_index(options['chunk_size'])
+        self.stdout.write(f'{count} accounts indexed')
@@ -0,0 +1,244 @@
+# Base imports
+import csv
+import io
+import json
+import sys
+import time
+from typing import Dict, Iterator, List, Tuple
+
+# Django imports
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+# Project imports
+from manager.account_index import mark_accounts_exist_on_commit
+from manager.balance_cache import cache_balances_on_commit
+from manager.models import Account, EntryType, LedgerEntry
+from manager.money import to_cents
+
+
+ACCOUNT_TABLE = Account._meta.db_table
+LEDGER_TABLE = LedgerEntry._meta.db_table
+
+# Keeps every IN (...) below the SQLite limit of bound parameters
+SQLITE_IN_CHUNK = 900
+
+
+class Command(BaseCommand):
+    help = 'Create accounts in bulk from a CSV (conta_id,valor) or NDJSON file, "-" reads stdin'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=('csv', 'ndjson'), help='Defaults to the file extension')
+        parser.add_argument(
+            '--on-conflict',
+            choices=('skip', 'update'),
+            default='skip',
+            help='Existing conta_id: skip and report it, or update its balance'
+        )
+        parser.add_argument('--batch-size', type=int, default=settings.IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or ('ndjson' if options['path'].endswith(('.ndjson', '.jsonl')) else 'csv')
+        update = options['on_conflict'] == 'update'
+        import_batch = _import_batch_postgresql if connection.vendor == 'postgresql' else _import_batch_sqlite
+
+        stats = {'read': 0, 'created': 0, 'updated': 0, 'skipped': 0, 'invalid': 0}
+        started = time.monotonic()
+
+        file = sys.stdin if options['path'] == '-' else open(options['path'], newline='', encoding='utf-8')
+        try:
+            rows = read_rows(file, file_format)
+            for batch, invalid, read in batches(rows, options['batch_size']):
+                for line, error in invalid:
+                    self.stderr.write(f'Line {line}: {error}')
+
+                with transaction.atomic():
+                    created, updated = import_batch(batch, update)
+
+                # Existing accounts that were not updated and repeated conta_id in a batch are skipped
+                stats['read'] += read
+                stats['invalid'] += len(invalid)
+                stats['created'] += created
+                stats['updated'] += updated
+                stats['skipped'] += read - len(invalid) - created - updated
+
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'{stats["read"]} rows read')
+        finally:
+            if file is not sys.stdin:
+                file.close()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'{stats["read"]} rows read, {stats["created"]} created, {stats["updated"]} updated, '
+            f'{stats["skipped"]} skipped, {stats["invalid"]} invalid '
+            f'in {elapsed:.2f}s ({stats["read"] / elapsed if elapsed else 0:.0f} rows/s)'
+        )
+
+
+def read_rows(file, file_format: str) -> Iterator[Tuple[int, Dict]]:
+    """
+    Yield (line number, row) from the file, rows as dicts with conta_id and valor
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(file)
+        if not reader.fieldnames or not {'conta_id', 'valor'} <= set(reader.fieldnames):
+            raise CommandError('The CSV header must have the conta_id and valor columns')
+
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line, text in enumerate(file, start=1):
+        if not text.strip():
+            continue
+
+        try:
+            yield line, json.loads(text)
+        except ValueError:
+            yield line, None
+
+
+def parse_row(row) -> Tuple[int, int]:
+    if not isinstance(row, dict):
+        raise ValueError('invalid JSON')
+
+    account_id = int(row.get('conta_id'))
+    balance_cents = to_cents(row.get('valor'))
+    if account_id <= 0 or balance_cents < 0:
+        raise ValueError('conta_id must be positive and valor must not be negative')
+
+    return account_id, balance_cents
+
+
+def batches(rows, size: int) -> Iterator[Tuple[List[Tuple[int, int]], List[Tuple[int, str]], int]]:
+    """
+    Group the valid rows in batches of (conta_id, balance_cents), the last row of a conta_id wins.
+    Yields each batch with the (line number, error) of its invalid rows and the number of rows read.
+    """
+    batch, invalid, read = {}, [], 0
+    for line, row in rows:
+        read += 1
+        try:
+            account_id, balance_cents = parse_row(row)
+        except (TypeError, ValueError, ArithmeticError) as error:
+            invalid.append((line, str(error) or 'invalid row'))
+            continue
+
+        batch[account_id] = balance_cents
+        if len(batch) == size:
+            yield list(batch.items()), invalid, read
+            batch, invalid, read = {}, [], 0
+
+    if read:
+        yield list(batch.items()), invalid, read
+
+
+def _import_batch_postgresql(batch: List[Tuple[int, int]], update: bool) -> Tuple[int, int]:
+    """
+    COPY the batch to a temporary table and merge it in set-based statements.
+    Returns the number of accounts created and updated.
+    """
+    now = timezone.now()
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(batch)
+    buffer.seek(0)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'CREATE TEMPORARY TABLE import_accounts (id bigint PRIMARY KEY, balance_cents bigint NOT NULL) '
+            'ON COMMIT DROP'
+        )
+        cursor.copy_expert('COPY import_accounts (id, balance_cents) FROM STDIN WITH (FORMAT csv)', buffer)
+
+        updated = []
+        if update:
+            # Record the balance change in the ledger before overwriting it, striped accounts are skipped
+            cursor.execute(
+                f'INSERT INTO {LEDGER_TABLE} (account_id, type, amount_cents, created_at, updated_at) '
+                f'SELECT i.id, %s, i.balance_cents - a.balance_cents, %s, %s '
+                f'FROM import_accounts i JOIN {ACCOUNT_TABLE} a ON a.id = i.id '
+                f'WHERE a.stripes = 0 AND a.balance_cents <> i.balance_cents',
+                [EntryType.DEPOSIT, now, now]
+            )
+            cursor.execute(
+                f'UPDATE {ACCOUNT_TABLE} a SET balance_cents = i.balance_cents, version = a.version + 1, '
+                f'updated_at = %s FROM import_accounts i '
+                f'WHERE a.id = i.id AND a.stripes = 0 RETURNING a.id, a.balance_cents, a.version',
+                [now]
+            )
+            updated = cursor.fetchall()
+
+        cursor.execute(
+            f'WITH created AS ('
+            f'INSERT INTO {ACCOUNT_TABLE} (id, balance_cents, version, stripes, created_at, updated_at) '
+            f'SELECT id, balance_cents, 0, 0, %s, %s FROM import_accounts '
+            f'ON CONFLICT (id) DO NOTHING RETURNING id, balance_cents) '
+            f'INSERT INTO {LEDGER_TABLE} (account_id, type, amount_cents, created_at, updated_at) '
+            f'SELECT id, %s, balance_cents, %s, %s FROM created RETURNING account_id',
+            [now, now, EntryType.DEPOSIT, now, now]
+        )
+        created_ids = [row[0] for row in cursor.fetchall()]
+
+        # New accounts inserted by the table sequence later must not collide with the imported ids
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('{ACCOUNT_TABLE}', 'id'), "
+            f"GREATEST((SELECT MAX(id) FROM {ACCOUNT_TABLE}), 1))"
+        )
+
+    # Write the new balances through, the next read is served by the cache instead of the database
+    cache_balances_on_commit(updated)
+    mark_accounts_exist_on_commit(created_ids)
+
+    return len(created_ids), len(updated)
+
+
+def _import_batch_sqlite(batch: List[Tuple[int, int]], update: bool) -> Tuple[int, int]:
+    """
+    Insert the new accounts and their opening entries with executemany.
+    Returns the number of accounts created and updated.
+    """
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    existing = {}
+    for start in range(0, len(batch), SQLITE_IN_CHUNK):
+        ids = [account_id for account_id, _ in batch[start:start + SQLITE_IN_CHUNK]]
+        existing.update(
+            (account_id, (balance_cents, version, stripes))
+            for account_id, balance_cents, version, stripes in Account.objects.filter(id__in=ids).values_list(
+                'id', 'balance_cents', 'version', 'stripes'
+            )
+        )
+
+    new = [(account_id, balance_cents) for account_id, balance_cents in batch if account_id not in existing]
+    changed = [
+        (account_id, balance_cents, balance_cents - existing[account_id][0], existing[account_id][1] + 1)
+        for account_id, balance_cents in batch
+        if update and account_id in existing and not existing[account_id][2]
+    ]
+
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {ACCOUNT_TABLE} (id, balance_cents, version, stripes, created_at, updated_at) '
+            f'VALUES (%s, %s, 0, 0, %s, %s)',
+            [(account_id, balance_cents, now, now) for account_id, balance_cents in new]
+        )
+        cursor.executemany(
+            f'UPDATE {ACCOUNT_TABLE} SET balance_cents = %s, version = version + 1, updated_at = %s WHERE id = %s',
+            [(balance_cents, now, account_id) for account_id, balance_cents, _, _ in changed]
+        )
+        cursor.executemany(
+            f'INSERT INTO {LEDGER_TABLE} (account_id, type, amount_cents, created_at, updated_at) '
+            f'VALUES (%s, %s, %s, %s, %s)',
+            [(account_id, EntryType.DEPOSIT, balance_cents, now, now) for account_id, balance_cents in new] +
+            [(account_id, EntryType.DEPOSIT, delta, now, now) for account_id, _, delta, _ in changed if delta]
+        )
+
+    cache_balances_on_commit(
+        (account_id, balance_cents, version) for account_id, balance_cents, _, version in changed
+    )
+    mark_accounts_exist_on_commit(account_id for account_id, _ in new)
+
+    return len(new), len(changed)
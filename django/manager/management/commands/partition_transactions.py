@@ -0,0 +1,34 @@
+# Django imports
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+# Project imports
+from manager.partitions import add_months, detach_partitions, ensure_partitions, is_partitioned, month_start
+
+
+class Command(BaseCommand):
+    help = 'Create the monthly partitions of manager_transaction ahead of time and detach the expired ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=settings.TRANSACTION_PARTITIONS_AHEAD)
+        parser.add_argument('--retention-months', type=int, default=settings.TRANSACTION_RETENTION_MONTHS)
+        parser.add_argument(
+            '--detach',
+            action='store_true',
+            help='Detach the partitions older than the retention, their rows are kept in plain tables'
+        )
+
+    def handle(self, *args, **options):
+        if not is_partitioned():
+            self.stdout.write('manager_transaction is not partitioned, nothing to do')
+            return
+
+        today = timezone.now().date()
+        for name in ensure_partitions(today, options['ahead']):
+            self.stdout.write(f'Partition {name} created')
+
+        if options['detach']:
+            before = add_months(month_start(today), -options['retention_months'])
+            for name in detach_partitions(before):
+                self.stdout.write(f'Partition {name} detached')
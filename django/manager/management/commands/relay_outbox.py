@@ -0,0 +1,32 @@
+# Base imports
+import time
+
+# Django imports
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Project imports
+from manager.outbox import relay_outbox
+
+
+class Command(BaseCommand):
+    help = 'Publish the outbox events to the broker in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE)
+        parser.add_argument('--interval', type=float, default=settings.OUTBOX_RELAY_INTERVAL)
+        parser.add_argument('--once', action='store_true', help='Drain the outbox once and exit')
+
+    def handle(self, *args, **options):
+        while True:
+            published = relay_outbox(options['batch_size'])
+            if published:
+                self.stdout.write(f'{published} events published')
+
+            if published == options['batch_size']:
+                continue
+
+            if options['once']:
+                return
+
+            time.sleep(options['interval'])
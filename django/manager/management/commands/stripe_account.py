@@ -0,0 +1,25 @@
+# Django imports
+from django.core.management.base import BaseCommand, CommandError
+
+# Project imports
+from manager.models import Account
+from manager.stripes import rebalance_stripes
+
+
+class Command(BaseCommand):
+    help = 'Split the balance of a hot account across stripes, or merge it back with --stripes 0'
+
+    def add_arguments(self, parser):
+        parser.add_argument('conta_id', type=int)
+        parser.add_argument('--stripes', type=int, default=8)
+
+    def handle(self, *args, **options):
+        if not 0 <= options['stripes'] <= 256:
+            raise CommandError('--stripes must be between 0 and 256')
+
+        try:
+            account = rebalance_stripes(options['conta_id'], options['stripes'])
+        except Account.DoesNotExist:
+            raise CommandError(f'Account {options["conta_id"]} does not exist')
+
+        self.stdout.write(f'Account {account.id} has {account.stripes} stripes')
@@ -0,0 +1,27 @@
+# Generated by Django 4.1.5 on 2026-10-17 19:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('status_code', models.PositiveSmallIntegerField()),
+                ('response', models.JSONField()),
+            ],
+            options={
+                'ordering': ('id',),
+            },
+        ),
+    ]
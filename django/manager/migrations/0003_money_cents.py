@@ -0,0 +1,92 @@
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import BigIntegerField, F
+from django.db.models.functions import Cast, Round
+
+
+def decimal_to_cents(apps, schema_editor):
+    Account = apps.get_model('manager', 'Account')
+    Transaction = apps.get_model('manager', 'Transaction')
+
+    Account.objects.update(
+        balance_cents=Cast(Round(F('balance') * 100), BigIntegerField())
+    )
+    Transaction.objects.update(
+        value_cents=Cast(Round(F('value') * 100), BigIntegerField()),
+        tax_cents=Cast(Round(F('tax') * 100), BigIntegerField()),
+    )
+
+
+def cents_to_decimal(apps, schema_editor):
+    Account = apps.get_model('manager', 'Account')
+    Transaction = apps.get_model('manager', 'Transaction')
+
+    accounts = []
+    for account in Account.objects.iterator():
+        account.balance = Decimal(account.balance_cents) / 100
+        accounts.append(account)
+    Account.objects.bulk_update(accounts, ['balance'], batch_size=1000)
+
+    transactions = []
+    for transaction in Transaction.objects.iterator():
+        transaction.value = Decimal(transaction.value_cents) / 100
+        transaction.tax = Decimal(transaction.tax_cents) / 100
+        transactions.append(transaction)
+    Transaction.objects.bulk_update(transactions, ['value', 'tax'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0002_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='balance_cents',
+            field=models.BigIntegerField(default=0),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='value_cents',
+            field=models.BigIntegerField(default=0),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='tax_cents',
+            field=models.BigIntegerField(default=0),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='account',
+            name='balance',
+            field=models.DecimalField(decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='value',
+            field=models.DecimalField(decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='tax',
+            field=models.DecimalField(decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.RunPython(decimal_to_cents, cents_to_decimal),
+        migrations.RemoveField(
+            model_name='account',
+            name='balance',
+        ),
+        migrations.RemoveField(
+            model_name='transaction',
+            name='value',
+        ),
+        migrations.RemoveField(
+            model_name='transaction',
+            name='tax',
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.1.5 on 2026-10-17 19:43
+
+from django.db import migrations, models
+from django.db.models import Case, F, When
+
+
+def mark_existing_cashbacks(apps, schema_editor):
+    # Existing transactions already had their cashback applied by the transaction_account task
+    Transaction = apps.get_model('manager', 'Transaction')
+    Transaction.objects.update(
+        cashback_cents=Case(
+            When(type='C', then=(F('value_cents') * 50 + 5000) / 10000),
+            When(type='D', then=(F('value_cents') * 100 + 5000) / 10000),
+            When(type='P', then=(F('value_cents') * 100 + 5000) / 10000),
+            default=0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0003_money_cents'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='cashback_cents',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_existing_cashbacks, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('cashback_cents__isnull', True)), fields=['id'], name='transaction_cashback_pending'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.1.5 on 2026-10-17 19:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0004_transaction_cashback_cents'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('task', models.CharField(max_length=255)),
+                ('payload', models.JSONField()),
+            ],
+            options={
+                'ordering': ('id',),
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.1.5 on 2026-10-17 19:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def open_existing_accounts(apps, schema_editor):
+    # The current balance of existing accounts becomes their opening entry
+    Account = apps.get_model('manager', 'Account')
+    LedgerEntry = apps.get_model('manager', 'LedgerEntry')
+
+    entries = [
+        LedgerEntry(account_id=account_id, type='O', amount_cents=balance_cents)
+        for account_id, balance_cents in Account.objects.values_list('id', 'balance_cents').iterator()
+    ]
+    LedgerEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0005_outboxevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('type', models.CharField(choices=[('O', 'Deposit'), ('D', 'Debit'), ('F', 'Fee'), ('C', 'Cashback')], max_length=1)),
+                ('amount_cents', models.BigIntegerField()),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='manager.account')),
+                ('transaction', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, to='manager.transaction')),
+            ],
+            options={
+                'ordering': ('id',),
+            },
+        ),
+        migrations.CreateModel(
+            name='BalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('last_entry_id', models.BigIntegerField()),
+                ('last_entry_at', models.DateTimeField()),
+                ('balance_cents', models.BigIntegerField()),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='manager.account')),
+            ],
+            options={
+                'ordering': ('id',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='ledgerentry',
+            index=models.Index(fields=['account', 'id'], name='ledger_account_entry'),
+        ),
+        migrations.AddIndex(
+            model_name='balancesnapshot',
+            index=models.Index(fields=['account', 'last_entry_id'], name='snapshot_account_entry'),
+        ),
+        migrations.RunPython(open_existing_accounts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.5 on 2026-10-17 19:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0006_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='version',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.1.5 on 2026-10-17 19:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0007_account_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='stripes',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='AccountStripe',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('index', models.PositiveSmallIntegerField()),
+                ('balance_cents', models.BigIntegerField(default=0)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_stripes', to='manager.account')),
+            ],
+            options={
+                'ordering': ('account', 'index'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='accountstripe',
+            constraint=models.UniqueConstraint(fields=('account', 'index'), name='account_stripe_unique_index'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.5 on 2026-10-17 19:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0008_account_stripes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ledgerentry',
+            index=models.Index(fields=['account', 'created_at', 'id'], name='ledger_account_created'),
+        ),
+    ]
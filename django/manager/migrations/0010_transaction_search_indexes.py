@@ -0,0 +1,36 @@
+# Generated by Django 4.1.5 on 2026-10-17 19:54
+
+from django.db import migrations, models
+
+
+def create_brin_index(apps, schema_editor):
+    # BRIN is PostgreSQL only: a few pages summarize the append-ordered created_at column
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS transaction_created_brin '
+            'ON manager_transaction USING brin (created_at)'
+        )
+
+
+def drop_brin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS transaction_created_brin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0009_ledger_account_created'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['account', 'type', 'created_at'], name='transaction_account_type'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['created_at', 'id'], name='transaction_created'),
+        ),
+        migrations.RunPython(create_brin_index, drop_brin_index),
+    ]
@@ -0,0 +1,98 @@
+from datetime import date, datetime, timezone
+
+from django.db import migrations
+
+
+TABLE = 'manager_transaction'
+
+# Indexes and constraints of the Transaction model, recreated on the new table
+CONSTRAINTS_SQL = [
+    f'ALTER TABLE {TABLE} ADD CONSTRAINT manager_transaction_account_id_fk '
+    f'FOREIGN KEY (account_id) REFERENCES manager_account (id) DEFERRABLE INITIALLY DEFERRED',
+    f'CREATE INDEX manager_transaction_account_id_idx ON {TABLE} (account_id)',
+    f'CREATE INDEX transaction_cashback_pending ON {TABLE} (id) WHERE cashback_cents IS NULL',
+    f'CREATE INDEX transaction_account_type ON {TABLE} (account_id, type, created_at)',
+    f'CREATE INDEX transaction_created ON {TABLE} (created_at, id)',
+    f'CREATE INDEX transaction_created_brin ON {TABLE} USING brin (created_at)',
+]
+
+# Months created ahead of the current one, the partition_transactions command keeps adding them
+MONTHS_AHEAD = 3
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_by_month(apps, schema_editor):
+    """
+    Move manager_transaction to a table partitioned by created_at month.
+    The primary key becomes (id, created_at), a partitioned table can only enforce unique keys
+    that include the partition key; id still comes from a single sequence.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    execute = schema_editor.execute
+    execute(f'ALTER TABLE {TABLE} RENAME TO {TABLE}_legacy')
+    execute(f'CREATE TABLE {TABLE} (LIKE {TABLE}_legacy) PARTITION BY RANGE (created_at)')
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'SELECT MIN(created_at), COALESCE(MAX(id), 0) FROM {TABLE}_legacy')
+        oldest, last_id = cursor.fetchone()
+
+    today = date.today()
+    month = date((oldest or today).year, (oldest or today).month, 1)
+    while month <= add_months(today, MONTHS_AHEAD):
+        start = datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+        end = datetime.combine(add_months(month, 1), datetime.min.time(), tzinfo=timezone.utc)
+        execute(
+            f'CREATE TABLE {TABLE}_p{month:%Y%m} PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)',
+            [start, end]
+        )
+        month = add_months(month, 1)
+
+    # Rows outside of every monthly partition, kept empty by creating the partitions ahead
+    execute(f'CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT')
+
+    execute(f'INSERT INTO {TABLE} SELECT * FROM {TABLE}_legacy')
+    execute(f'DROP TABLE {TABLE}_legacy')
+
+    execute(f'CREATE SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id')
+    execute(f"SELECT setval('{TABLE}_id_seq', %s, %s)", [max(last_id, 1), last_id > 0])
+    execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{TABLE}_id_seq')")
+    execute(f'ALTER TABLE {TABLE} ADD PRIMARY KEY (id, created_at)')
+    for sql in CONSTRAINTS_SQL:
+        execute(sql)
+
+
+def merge_partitions(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    execute = schema_editor.execute
+    execute(f'ALTER TABLE {TABLE} RENAME TO {TABLE}_partitioned')
+    execute(f'CREATE TABLE {TABLE} (LIKE {TABLE}_partitioned)')
+    execute(f'INSERT INTO {TABLE} SELECT * FROM {TABLE}_partitioned')
+    execute(f'DROP TABLE {TABLE}_partitioned CASCADE')
+
+    execute(f'ALTER TABLE {TABLE} ADD PRIMARY KEY (id)')
+    execute(f'ALTER TABLE {TABLE} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY')
+    execute(
+        f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), COALESCE(MAX(id), 1), MAX(id) IS NOT NULL) "
+        f"FROM {TABLE}"
+    )
+    for sql in CONSTRAINTS_SQL:
+        execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0010_transaction_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_by_month, merge_partitions),
+    ]
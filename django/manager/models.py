@@ -5,15 +5,28 @@ from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 
 # Project imports
+from manager.money import from_cents, to_cents
 from shared.models import BaseModelDate
 
 
 class Account(BaseModelDate):
 
-    balance = models.DecimalField(
-        max_digits=10,
-        decimal_places=2,
-    )
+    balance_cents = models.BigIntegerField()
+
+    # Incremented on every balance change, orders the writes of the balance cache
+    version = models.BigIntegerField(default=0)
+
+    # Number of AccountStripe rows the balance is split across, 0 when the account is not striped
+    stripes = models.PositiveSmallIntegerField(default=0)
+
+    @property
+    def balance(self):
+        """ Balance in reais, kept for compatibility with the decimal API output. """
+        return from_cents(self.balance_cents)
+
+    @balance.setter
+    def balance(self, value):
+        self.balance_cents = to_cents(value)
 
     def __str__(self):
         return f"“conta_id”: {self.id} - “saldo”: {self.balance}"
@@ -22,6 +35,32 @@ class Account(BaseModelDate):
         ordering = ("id",)
 
 
+class AccountStripe(BaseModelDate):
+    """ Sub-balance of a striped account, so debits do not all lock the same row. """
+
+    account = models.ForeignKey(
+        Account,
+        on_delete=models.CASCADE,
+        related_name='balance_stripes',
+    )
+
+    index = models.PositiveSmallIntegerField()
+
+    balance_cents = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return (
+            f"“conta_id”: {self.account_id} - “stripe”: {self.index} - "
+            f"“saldo”: {from_cents(self.balance_cents)}"
+        )
+
+    class Meta:
+        ordering = ("account", "index")
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'index'], name='account_stripe_unique_index'),
+        ]
+
+
 class TypeTransaction(models.TextChoices):
     CREDIT = 'C', _('Credit')
     DEBIT = 'D', _('Debit')
@@ -40,24 +79,168 @@ class Transaction(BaseModelDate):
         choices=TypeTransaction.choices,
     )
 
-    value = models.DecimalField(
-        max_digits=10,
-        decimal_places=2,
-    )
+    value_cents = models.BigIntegerField()
+
+    tax_cents = models.BigIntegerField()
 
-    tax = models.DecimalField(
-        max_digits=10,
-        decimal_places=2,
+    # Null while the cashback of the transaction is pending
+    cashback_cents = models.BigIntegerField(
+        null=True,
+        blank=True,
     )
 
+    @property
+    def value(self):
+        """ Value in reais, kept for compatibility with the decimal API output. """
+        return from_cents(self.value_cents)
+
+    @value.setter
+    def value(self, value):
+        self.value_cents = to_cents(value)
+
+    @property
+    def tax(self):
+        """ Tax in reais, kept for compatibility with the decimal API output. """
+        return from_cents(self.tax_cents)
+
+    @tax.setter
+    def tax(self, value):
+        self.tax_cents = to_cents(value)
+
     def __str__(self):
         return f"“conta_id”: {self.account.id} - “tipo”: {self.type} - “valor”: {self.value}"
 
     class Meta:
         ordering = ("id",)
+        indexes = [
+            models.Index(
+                fields=['id'],
+                condition=models.Q(cashback_cents__isnull=True),
+                name='transaction_cashback_pending',
+            ),
+            models.Index(fields=['account', 'type', 'created_at'], name='transaction_account_type'),
+            models.Index(fields=['created_at', 'id'], name='transaction_created'),
+        ]
+
+
+class EntryType(models.TextChoices):
+    DEPOSIT = 'O', _('Deposit')
+    DEBIT = 'D', _('Debit')
+    FEE = 'F', _('Fee')
+    CASHBACK = 'C', _('Cashback')
+
+
+class LedgerEntry(BaseModelDate):
+    """ Append-only signed balance movement of an account. """
+
+    account = models.ForeignKey(
+        Account,
+        on_delete=models.PROTECT
+    )
+
+    # The ledger never cascades from or locks transaction rows
+    transaction = models.ForeignKey(
+        Transaction,
+        null=True,
+        blank=True,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+    )
+
+    type = models.CharField(
+        max_length=1,
+        choices=EntryType.choices,
+    )
+
+    amount_cents = models.BigIntegerField()
+
+    def __str__(self):
+        return (
+            f"“conta_id”: {self.account_id} - “tipo”: {self.type} - "
+            f"“valor”: {from_cents(self.amount_cents)}"
+        )
+
+    class Meta:
+        ordering = ("id",)
+        indexes = [
+            models.Index(fields=['account', 'id'], name='ledger_account_entry'),
+            models.Index(fields=['account', 'created_at', 'id'], name='ledger_account_created'),
+        ]
+
+
+class BalanceSnapshot(BaseModelDate):
+    """ Balance of an account including every ledger entry up to last_entry_id. """
+
+    account = models.ForeignKey(
+        Account,
+        on_delete=models.PROTECT
+    )
+
+    last_entry_id = models.BigIntegerField()
+
+    last_entry_at = models.DateTimeField()
+
+    balance_cents = models.BigIntegerField()
+
+    def __str__(self):
+        return (
+            f"“conta_id”: {self.account_id} - “saldo”: {from_cents(self.balance_cents)} - "
+            f"“entry”: {self.last_entry_id}"
+        )
+
+    class Meta:
+        ordering = ("id",)
+        indexes = [
+            models.Index(fields=['account', 'last_entry_id'], name='snapshot_account_entry'),
+        ]
+
+
+class IdempotencyKey(BaseModelDate):
+
+    key = models.CharField(
+        max_length=64,
+        unique=True,
+    )
+
+    fingerprint = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+    )
+
+    status_code = models.PositiveSmallIntegerField()
+
+    response = models.JSONField()
+
+    def __str__(self):
+        return f"“key”: {self.key} - “status”: {self.status_code}"
+
+    class Meta:
+        ordering = ("id",)
+        indexes = [
+            models.Index(fields=['created_at'], name='manager_idempotency_created'),
+        ]
+
+
+class OutboxEvent(BaseModelDate):
+
+    task = models.CharField(
+        max_length=255,
+    )
+
+    payload = models.JSONField()
+
+    def __str__(self):
+        return f"“task”: {self.task} - “payload”: {self.payload}"
+
+    class Meta:
+        ordering = ("id",)
 
 
 @receiver(post_save, sender=Transaction, dispatch_uid="transaction_account_task")
-def transaction_account(sender, instance, **kwargs):
-    from .tasks import transaction_account
-    transaction_account.apply_async(args=[instance.id])
+def transaction_account(sender, instance, created, **kwargs):
+    if not created:
+        return
+
+    from .outbox import enqueue_transaction_account
+    enqueue_transaction_account([instance])
@@ -0,0 +1,39 @@
+"""
+Money is represented as integer cents everywhere below the API layer.
+Rates are integer basis points (1% == 100), so fees and cashbacks never touch floats.
+"""
+# Base imports
+from decimal import Decimal, ROUND_HALF_UP
+
+CENTS = Decimal('0.01')
+BASIS_POINTS = 10000
+# Largest amount in reais accepted from a client, the cents of many of them still fit in a BigIntegerField
+MAX_AMOUNT = 10 ** 15
+
+
+def to_cents(value) -> int:
+    """
+    Convert an amount in reais (int, float, str or Decimal) to integer cents, rounding half up.
+    Raises ValueError for infinity and NaN.
+    """
+    value = Decimal(str(value))
+    if not value.is_finite():
+        raise ValueError('amount must be a finite number')
+
+    return int((value / CENTS).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents: int) -> Decimal:
+    """
+    Convert integer cents to a Decimal amount in reais with two decimal places
+    """
+    return Decimal(cents).scaleb(-2).quantize(CENTS)
+
+
+def apply_rate(cents: int, basis_points: int) -> int:
+    """
+    Return the rate in basis points of an amount in cents, rounding half up
+    """
+    amount = abs(cents) * basis_points
+    result = (amount + BASIS_POINTS // 2) // BASIS_POINTS
+    return result if cents >= 0 else -result
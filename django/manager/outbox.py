@@ -0,0 +1,56 @@
+# Base imports
+from typing import List
+
+# Django imports
+from django.conf import settings
+from django.db import transaction
+
+# Project imports
+from manager.models import OutboxEvent, Transaction
+
+
+def enqueue_transaction_account(transactions: List[Transaction]):
+    """
+    Write the transaction_account tasks of the transactions to the outbox,
+    in the same database transaction that created them
+    """
+    # In batch mode the pending cashbacks are drained by the cashback_consumer task
+    if settings.CASHBACK_MODE != 'task' or not transactions:
+        return
+
+    OutboxEvent.objects.bulk_create([
+        OutboxEvent(
+            task='manager.tasks.transaction_account',
+            payload={'args': [instance.id]},
+        )
+        for instance in transactions
+    ])
+
+
+def relay_outbox(batch_size: int) -> int:
+    """
+    Publish a batch of outbox events to the broker through one producer and delete them.
+    If the broker is unavailable nothing is deleted and the batch is retried on the next run.
+    Returns the number of events published.
+    """
+    from bank_manager.celery import app
+
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True).order_by('id')[:batch_size]
+        )
+        if not events:
+            return 0
+
+        with app.producer_or_acquire() as producer:
+            for event in events:
+                app.send_task(
+                    event.task,
+                    args=event.payload.get('args'),
+                    kwargs=event.payload.get('kwargs'),
+                    producer=producer,
+                )
+
+        OutboxEvent.objects.filter(id__in=[event.id for event in events]).delete()
+
+    return len(events)
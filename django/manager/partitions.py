@@ -0,0 +1,161 @@
+# Base imports
+from datetime import date, datetime, timezone as dt_timezone
+from typing import List, Tuple
+
+# Django imports
+from django.db import connection, transaction
+
+# Project imports
+from manager.models import Transaction
+
+
+TRANSACTION_TABLE = Transaction._meta.db_table
+DEFAULT_PARTITION = f'{TRANSACTION_TABLE}_default'
+
+
+def is_partitioned() -> bool:
+    """
+    Return True when manager_transaction is a partitioned table, only possible on PostgreSQL
+    """
+    if connection.vendor != 'postgresql':
+        return False
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = %s)",
+            [TRANSACTION_TABLE]
+        )
+        return cursor.fetchone()[0]
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def partition_name(month: date) -> str:
+    return f'{TRANSACTION_TABLE}_p{month:%Y%m}'
+
+
+def _monthly_partitions(names: List[str]) -> List[Tuple[str, date]]:
+    prefix = f'{TRANSACTION_TABLE}_p'
+    return [
+        (name, date(int(name[-6:-2]), int(name[-2:]), 1))
+        for name in names
+        if name.startswith(prefix) and len(name) == len(prefix) + 6 and name[len(prefix):].isdigit()
+    ]
+
+
+def list_partitions() -> List[Tuple[str, date]]:
+    """
+    Return the (name, month) of the monthly partitions attached to manager_transaction, oldest first
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s ORDER BY c.relname",
+            [TRANSACTION_TABLE]
+        )
+        return _monthly_partitions([row[0] for row in cursor.fetchall()])
+
+
+def list_detached_partitions() -> List[Tuple[str, date]]:
+    """
+    Return the (name, month) of the monthly partitions detached from manager_transaction, oldest first
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relname FROM pg_class "
+            "WHERE relkind = 'r' AND NOT relispartition AND relname LIKE %s ORDER BY relname",
+            [f'{TRANSACTION_TABLE}_p%']
+        )
+        return _monthly_partitions([row[0] for row in cursor.fetchall()])
+
+
+def create_partition(month: date) -> bool:
+    """
+    Create the partition of a month if it does not exist. Returns True when it was created.
+    Rows of the month already in the default partition are moved to the new partition: PostgreSQL
+    refuses to create a partition for values the default partition holds.
+    """
+    name = partition_name(month)
+    start = datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+    end = datetime.combine(add_months(month, 1), datetime.min.time(), tzinfo=dt_timezone.utc)
+    table, default = connection.ops.quote_name(TRANSACTION_TABLE), connection.ops.quote_name(DEFAULT_PARTITION)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [name])
+        if cursor.fetchone()[0]:
+            return False
+
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [DEFAULT_PARTITION])
+        move = cursor.fetchone()[0]
+        if move:
+            cursor.execute(
+                f'SELECT EXISTS (SELECT 1 FROM {default} WHERE created_at >= %s AND created_at < %s)',
+                [start, end]
+            )
+            move = cursor.fetchone()[0]
+
+        if move:
+            cursor.execute(f'ALTER TABLE {table} DETACH PARTITION {default}')
+
+        cursor.execute(
+            f'CREATE TABLE {connection.ops.quote_name(name)} '
+            f'PARTITION OF {table} '
+            f'FOR VALUES FROM (%s) TO (%s)',
+            [start, end]
+        )
+
+        if move:
+            cursor.execute(
+                f'WITH moved AS (DELETE FROM {default} WHERE created_at >= %s AND created_at < %s RETURNING *) '
+                f'INSERT INTO {table} SELECT * FROM moved',
+                [start, end]
+            )
+            cursor.execute(f'ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT')
+
+    return True
+
+
+def ensure_partitions(today: date, ahead: int) -> List[str]:
+    """
+    Create the partitions from the month of today up to ahead months later.
+    Returns the names of the partitions created.
+    """
+    created = []
+    current = month_start(today)
+    for offset in range(ahead + 1):
+        month = add_months(current, offset)
+        if create_partition(month):
+            created.append(partition_name(month))
+
+    return created
+
+
+def detach_partitions(before: date) -> List[str]:
+    """
+    Detach the partitions of the months before the given month. Detached partitions keep their rows
+    as plain tables, out of every query and index of manager_transaction, until they are archived.
+    Returns the names of the partitions detached.
+    """
+    detached = []
+    with connection.cursor() as cursor:
+        for name, month in list_partitions():
+            if month >= month_start(before):
+                continue
+
+            cursor.execute(
+                f'ALTER TABLE {connection.ops.quote_name(TRANSACTION_TABLE)} '
+                f'DETACH PARTITION {connection.ops.quote_name(name)}'
+            )
+            detached.append(name)
+
+    return detached
@@ -0,0 +1,143 @@
+# Base imports
+import logging
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Dict, List, Tuple
+
+# Django imports
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils.translation import gettext_lazy as _
+
+# Third party imports
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+# Project imports
+from manager.models import Account
+from manager.services import apply_transactions, TRANSACTION_OK
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class SequencerTimeout(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _('Transaction was not processed in time, try again.')
+    default_code = 'sequencer_timeout'
+
+
+class TransactionSequencer:
+    """
+    Routes every conta_id to a single owner thread.
+    Each owner drains its queue in order and group-commits the pending requests:
+    many debits, one balance UPDATE and one multi-row INSERT per group.
+    """
+
+    def __init__(self, partitions: int, max_batch: int, timeout: float):
+        self.queues = [queue.Queue() for index in range(partitions)]
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self.threads = []
+        self._lock = threading.Lock()
+
+    def partition_for(self, account_id: int) -> int:
+        return account_id % len(self.queues)
+
+    def start(self):
+        if self.threads:
+            return
+
+        with self._lock:
+            if self.threads:
+                return
+
+            for index in range(len(self.queues)):
+                thread = threading.Thread(
+                    target=self._run,
+                    args=(index,),
+                    name=f'transaction-sequencer-{index}',
+                    daemon=True
+                )
+                thread.start()
+                self.threads.append(thread)
+
+    def submit(self, data: Dict) -> Tuple[bool, Account or None]:
+        """
+        Enqueue a transaction in the owner of its account and wait, up to the timeout, for its result
+        """
+        self.start()
+        future = Future()
+        self.queues[self.partition_for(data.get('conta_id'))].put((data, future))
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # Once the owner took the request it is committing it, wait for the result
+            if future.cancel():
+                raise SequencerTimeout()
+            return future.result()
+
+    def process(self, requests: List[Tuple[Dict, Future]]):
+        """
+        Group-commit the requests that were not cancelled by their callers
+        """
+        requests = [
+            (data, future) for data, future in requests
+            if future.set_running_or_notify_cancel()
+        ]
+        if not requests:
+            return
+
+        try:
+            results = apply_transactions([data for data, future in requests])
+        except Exception as exception:
+            LOGGER.exception('Error applying sequenced transactions')
+            for data, future in requests:
+                future.set_exception(exception)
+            return
+
+        for (data, future), (result, balance) in zip(requests, results):
+            if result == TRANSACTION_OK:
+                future.set_result((True, Account(id=data.get('conta_id'), balance_cents=balance)))
+            else:
+                future.set_result((False, None))
+
+    def _run(self, index: int):
+        partition = self.queues[index]
+        while True:
+            requests = [partition.get()]
+            while len(requests) < self.max_batch:
+                try:
+                    requests.append(partition.get_nowait())
+                except queue.Empty:
+                    break
+
+            close_old_connections()
+            try:
+                self.process(requests)
+            finally:
+                close_old_connections()
+
+
+_sequencer = None
+_sequencer_lock = threading.Lock()
+
+
+def get_sequencer() -> TransactionSequencer:
+    """
+    Return the sequencer of this process, creating it from settings on first use
+    """
+    global _sequencer
+
+    if _sequencer is None:
+        with _sequencer_lock:
+            if _sequencer is None:
+                _sequencer = TransactionSequencer(
+                    partitions=settings.TRANSACTION_SEQUENCER_PARTITIONS,
+                    max_batch=settings.TRANSACTION_SEQUENCER_MAX_BATCH,
+                    timeout=settings.TRANSACTION_SEQUENCER_TIMEOUT,
+                )
+
+    return _sequencer
@@ -1,3 +1,6 @@
+# Base imports
+import math
+
 # Django imports
 from django.db import models
 
@@ -5,13 +8,37 @@ from django.db import models
 from rest_framework import serializers
 
 # Project imports
-from manager.models import Account
+from manager.account_index import account_exists
+from manager.models import Account, LedgerEntry, Transaction
+from manager.money import from_cents, to_cents, MAX_AMOUNT
+from manager.stripes import get_total_balance
+
+
+class CentsField(serializers.FloatField):
+    """
+    Money field: a decimal amount in reais in the payload, integer cents once validated.
+    Infinity, NaN and amounts beyond MAX_AMOUNT are invalid, their cents would not fit the database.
+    """
+
+    def to_internal_value(self, data) -> int:
+        value = super().to_internal_value(data)
+        if not math.isfinite(value):
+            self.fail('invalid')
+        if value > MAX_AMOUNT:
+            self.fail('max_value', max_value=MAX_AMOUNT)
+        if value < -MAX_AMOUNT:
+            self.fail('min_value', min_value=-MAX_AMOUNT)
+
+        return to_cents(value)
+
+    def to_representation(self, value):
+        return from_cents(value)
 
 
 class AccountCreateSerializer(serializers.Serializer):
 
     conta_id = serializers.IntegerField()
-    valor = serializers.FloatField()
+    valor = CentsField()
 
 
 class AccountSerializer(serializers.ModelSerializer):
@@ -30,7 +57,27 @@ class AccountSerializer(serializers.ModelSerializer):
         return obj.id
 
     def get_saldo(self, obj) -> float:
-        return obj.balance
+        return from_cents(get_total_balance(obj))
+
+
+class StatementEntrySerializer(serializers.ModelSerializer):
+
+    data = serializers.DateTimeField(source='created_at')
+    tipo = serializers.CharField(source='type')
+    transacao_id = serializers.IntegerField(source='transaction_id')
+    valor = CentsField(source='amount_cents')
+    saldo = CentsField(source='balance_cents')
+
+    class Meta:
+        model = LedgerEntry
+        fields = (
+            'id',
+            'data',
+            'tipo',
+            'transacao_id',
+            'valor',
+            'saldo',
+        )
 
 
 class TypeTransaction(models.TextChoices):
@@ -39,18 +86,43 @@ class TypeTransaction(models.TextChoices):
     PIX = 'P', 'Pix'
 
 
-class TransactionSerializer(serializers.Serializer):
+class TransactionBatchSerializer(serializers.Serializer):
 
     forma_pagamento = serializers.ChoiceField(choices=TypeTransaction.choices)
     conta_id = serializers.IntegerField()
-    valor = serializers.FloatField()
+    valor = CentsField()
+
+
+class TransactionSerializer(TransactionBatchSerializer):
 
     @staticmethod
     def validate_conta_id(conta_id: int) -> int:
         """
             Check conta_id exists
         """
-        if not Account.objects.filter(id=conta_id).exists():
+        if not account_exists(conta_id):
             raise serializers.ValidationError("Conta com conta_id não existe!")
 
         return conta_id
+
+
+class TransactionListSerializer(serializers.ModelSerializer):
+
+    conta_id = serializers.IntegerField(source='account_id')
+    forma_pagamento = serializers.CharField(source='type')
+    valor = CentsField(source='value_cents')
+    taxa = CentsField(source='tax_cents')
+    cashback = CentsField(source='cashback_cents')
+    data = serializers.DateTimeField(source='created_at')
+
+    class Meta:
+        model = Transaction
+        fields = (
+            'id',
+            'conta_id',
+            'forma_pagamento',
+            'valor',
+            'taxa',
+            'cashback',
+            'data',
+        )
@@ -1,37 +1,271 @@
 # Base imports
-from decimal import Decimal
-from typing import Tuple, Dict
+from collections import defaultdict
+from typing import Tuple, Dict, List, Optional
+
+# Django imports
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, QuerySet
+from django.utils import timezone
 
 # Project imports
-from manager.models import Account, Transaction
+from manager.account_index import mark_accounts_exist_on_commit
+from manager.balance_cache import cache_balances_on_commit
+from manager.ledger import build_cashback_entry, record_deposit, record_transactions
+from manager.models import Account, LedgerEntry, Transaction
+from manager.money import apply_rate, from_cents
+from manager.outbox import enqueue_transaction_account
+from manager.stripes import credit_stripes, debit_stripes, get_total_balance
 
 
-def create_transaction(data: Dict) -> Tuple[bool, Account or None]:
+# Rates in basis points
+TRANSACTION_TAXES = {
+    'D': 300,  # debit 3% tax
+    'C': 500,  # credit 5% tax
+    'P': 0,  # pix has no tax
+}
+
+TRANSACTION_CASHBACKS = {
+    'D': 100,  # debit 1% cashback
+    'C': 50,  # credit 0.5% cashback
+    'P': 100,  # pix 1% cashback
+}
+
+# Batch item results
+TRANSACTION_OK = 'ok'
+TRANSACTION_INSUFFICIENT_BALANCE = 'saldo insuficiente'
+TRANSACTION_ACCOUNT_NOT_FOUND = 'conta inexistente'
+
+
+def get_transaction_tax(forma_pagamento: str) -> int:
     """
-    Create a transaction and process balance in account
+    Return the tax rate, in basis points, charged for a payment method
+    """
+    return TRANSACTION_TAXES.get(forma_pagamento, 0)
+
+
+def get_transaction_cashback(forma_pagamento: str, value_cents: int) -> int:
     """
-    account = Account.objects.get(id=data.get('conta_id'))
-    tax = 0  # default tax pix
+    Return the cashback, in cents, earned by a transaction
+    """
+    return apply_rate(value_cents, TRANSACTION_CASHBACKS.get(forma_pagamento, 0))
+
 
-    if data.get('forma_pagamento') == 'D':  # debit
-        tax = 0.03  # 3% tax
+def get_transaction_amounts(data: Dict) -> Tuple[int, int]:
+    """
+    Return the value and the tax of a transaction, in cents
+    """
+    value = data.get('valor')
+    return value, apply_rate(value, get_transaction_tax(data.get('forma_pagamento')))
 
-    elif data.get('forma_pagamento') == 'C':  # credit
-        tax = 0.05  # 5% tax
 
-    real_value = data.get('valor') * (1 + tax)
+def get_inline_cashback(data: Dict) -> Optional[int]:
+    """
+    Return the cashback, in cents, applied together with the debit when CASHBACK_MODE is inline.
+    Returns None when the cashback is processed asynchronously.
+    """
+    if settings.CASHBACK_MODE != 'inline':
+        return None
 
-    if account.balance < real_value:
-        return False, None
+    return get_transaction_cashback(data.get('forma_pagamento'), data.get('valor'))
 
-    account.balance -= Decimal(real_value)
-    account.save()
 
-    Transaction.objects.create(
-        account=account,
-        value=data.get('valor'),
-        type=data.get('forma_pagamento'),
-        tax=data.get('valor') * tax
+def debit_account(account_id: int, amount: int, cashback: int = 0) -> bool:
+    """
+    Debit an account only if it has enough balance, in a single conditional UPDATE.
+    The cashback, if any, is credited in the same UPDATE.
+    Striped accounts are debited from one of their stripes.
+    Returns False when the account does not have enough balance.
+    """
+    updated = Account.objects.filter(
+        id=account_id,
+        stripes=0,
+        balance_cents__gte=amount,
+    ).update(
+        balance_cents=F('balance_cents') - amount + cashback,
+        version=F('version') + 1,
+        updated_at=timezone.now(),
     )
+    if updated:
+        return True
+
+    stripes = Account.objects.filter(id=account_id).values_list('stripes', flat=True).first()
+    return bool(stripes) and debit_stripes(account_id, stripes, amount, cashback)
+
+
+def create_account(data: Dict) -> Account:
+    """
+    Create an account with its opening balance
+    """
+    with transaction.atomic():
+        account = Account.objects.create(
+            id=data.get('conta_id'),
+            balance_cents=data.get('valor')
+        )
+        record_deposit(account)
+        cache_balances_on_commit([(account.id, account.balance_cents, account.version)])
+        mark_accounts_exist_on_commit([account.id])
+
+    return account
+
+
+def create_transaction(data: Dict) -> Tuple[bool, Account or None]:
+    """
+    Create a transaction and process balance in account
+    """
+    # Inside a transaction of the caller (e.g. an idempotent request storing its key) the debit must be
+    # part of that transaction, the sequencer would commit it on its own connection
+    if settings.TRANSACTION_SEQUENCER_ENABLED and not transaction.get_connection().in_atomic_block:
+        from manager.sequencer import get_sequencer
+        return get_sequencer().submit(data)
+
+    account_id = data.get('conta_id')
+    value, tax = get_transaction_amounts(data)
+    cashback = get_inline_cashback(data)
+
+    with transaction.atomic():
+        if not debit_account(account_id, value + tax, cashback or 0):
+            return False, None
+
+        instance = Transaction.objects.create(
+            account_id=account_id,
+            value_cents=value,
+            type=data.get('forma_pagamento'),
+            tax_cents=tax,
+            cashback_cents=cashback
+        )
+        record_transactions([instance])
+
+        account = Account.objects.get(id=account_id)
+        if not account.stripes:
+            cache_balances_on_commit([(account.id, account.balance_cents, account.version)])
 
     return True, account
+
+
+def apply_transactions(items: List[Dict]) -> List[Tuple[str, int or None]]:
+    """
+    Apply a group of transactions in one database transaction.
+    Every referenced account is loaded and locked in one query, debits are applied in order
+    and written with one bulk UPDATE, and the transactions are inserted with one bulk INSERT.
+    Striped accounts are debited on their stripes and their account row is not locked.
+    Returns the status and the balance in cents after the debit of each item, in the same order.
+    """
+    results = []
+    transactions = []
+    changed_accounts = {}
+    now = timezone.now()
+
+    with transaction.atomic():
+        account_ids = {item.get('conta_id') for item in items}
+        accounts = Account.objects.select_for_update().filter(stripes=0).in_bulk(account_ids)
+        # Locking the row of a striped (hot) account would serialize its debits again
+        accounts.update(Account.objects.filter(stripes__gt=0).in_bulk(account_ids - accounts.keys()))
+
+        for item in items:
+            account = accounts.get(item.get('conta_id'))
+            if account is None:
+                results.append((TRANSACTION_ACCOUNT_NOT_FOUND, None))
+                continue
+
+            value, tax = get_transaction_amounts(item)
+            cashback = get_inline_cashback(item)
+            instance = Transaction(
+                account=account,
+                value_cents=value,
+                type=item.get('forma_pagamento'),
+                tax_cents=tax,
+                cashback_cents=cashback
+            )
+
+            if account.stripes:
+                if not debit_stripes(account.id, account.stripes, value + tax, cashback or 0):
+                    results.append((TRANSACTION_INSUFFICIENT_BALANCE, None))
+                    continue
+
+                transactions.append(instance)
+                results.append((TRANSACTION_OK, get_total_balance(account)))
+                continue
+
+            if account.balance_cents < value + tax:
+                results.append((TRANSACTION_INSUFFICIENT_BALANCE, None))
+                continue
+
+            account.balance_cents -= value + tax - (cashback or 0)
+            account.updated_at = now
+            if account.id not in changed_accounts:
+                account.version += 1
+                changed_accounts[account.id] = account
+            transactions.append(instance)
+            results.append((TRANSACTION_OK, account.balance_cents))
+
+        Account.objects.bulk_update(changed_accounts.values(), ['balance_cents', 'version', 'updated_at'])
+        Transaction.objects.bulk_create(transactions)
+        record_transactions(transactions)
+
+        enqueue_transaction_account(transactions)
+        cache_balances_on_commit(
+            (account.id, account.balance_cents, account.version) for account in changed_accounts.values()
+        )
+
+    return results
+
+
+def create_transactions_batch(items: List[Dict]) -> List[Dict]:
+    """
+    Create a batch of transactions in one database transaction.
+    Returns one result per item, in the same order.
+    """
+    results = []
+    for item, (result, balance) in zip(items, apply_transactions(items)):
+        data = {'conta_id': item.get('conta_id'), 'status': result}
+        if result == TRANSACTION_OK:
+            data['saldo'] = from_cents(balance)
+        results.append(data)
+
+    return results
+
+
+def apply_cashback(queryset: QuerySet, limit: Optional[int] = None) -> int:
+    """
+    Apply the cashback of the pending transactions of the queryset.
+    Cashbacks are aggregated per account and applied with one UPDATE per account.
+    Rows locked by another consumer are skipped. Returns the number of transactions processed.
+    """
+    now = timezone.now()
+
+    with transaction.atomic():
+        pending = queryset.select_for_update(skip_locked=True).filter(
+            cashback_cents__isnull=True
+        ).only('id', 'account_id', 'type', 'value_cents').order_by('id')
+        if limit is not None:
+            pending = pending[:limit]
+        pending = list(pending)
+
+        totals = defaultdict(int)
+        for instance in pending:
+            instance.cashback_cents = get_transaction_cashback(instance.type, instance.value_cents)
+            totals[instance.account_id] += instance.cashback_cents
+
+        Transaction.objects.bulk_update(pending, ['cashback_cents'])
+        LedgerEntry.objects.bulk_create(
+            [build_cashback_entry(instance) for instance in pending if instance.cashback_cents]
+        )
+
+        striped = dict(Account.objects.filter(id__in=totals, stripes__gt=0).values_list('id', 'stripes'))
+        for account_id in sorted(totals):
+            if account_id in striped:
+                credit_stripes(account_id, striped[account_id], totals[account_id])
+                continue
+
+            Account.objects.filter(id=account_id).update(
+                balance_cents=F('balance_cents') + totals[account_id],
+                version=F('version') + 1,
+                updated_at=now,
+            )
+
+        cache_balances_on_commit(
+            Account.objects.filter(id__in=totals, stripes=0).values_list('id', 'balance_cents', 'version')
+        )
+
+    return len(pending)
@@ -0,0 +1,117 @@
+# Base imports
+import random
+
+# Django imports
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+# Project imports
+from manager.balance_cache import uncache_balance_on_commit
+from manager.models import Account, AccountStripe
+
+
+def get_total_balance(account: Account) -> int:
+    """
+    Return the balance in cents of an account, adding up its stripes when it is striped
+    """
+    if not account.stripes:
+        return account.balance_cents
+
+    stripes_total = AccountStripe.objects.filter(
+        account_id=account.id
+    ).aggregate(total=Sum('balance_cents'))['total']
+
+    return account.balance_cents + (stripes_total or 0)
+
+
+def debit_stripes(account_id: int, stripes: int, amount: int, cashback: int = 0) -> bool:
+    """
+    Debit a striped account from one stripe with enough funds, starting from a random stripe.
+    When no single stripe has enough funds, every stripe is locked and the debit is spread
+    across them. Returns False when the account does not have enough balance.
+    """
+    now = timezone.now()
+    start = random.randrange(stripes)
+
+    for offset in range(stripes):
+        updated = AccountStripe.objects.filter(
+            account_id=account_id,
+            index=(start + offset) % stripes,
+            balance_cents__gte=amount,
+        ).update(
+            balance_cents=F('balance_cents') - amount + cashback,
+            updated_at=now,
+        )
+        if updated:
+            return True
+
+    with transaction.atomic():
+        locked = list(AccountStripe.objects.select_for_update().filter(account_id=account_id).order_by('index'))
+        if sum(stripe.balance_cents for stripe in locked) < amount:
+            return False
+
+        remaining = amount
+        for stripe in locked:
+            taken = min(max(stripe.balance_cents, 0), remaining)
+            stripe.balance_cents -= taken
+            stripe.updated_at = now
+            remaining -= taken
+
+        locked[0].balance_cents += cashback
+        AccountStripe.objects.bulk_update(locked, ['balance_cents', 'updated_at'])
+
+    return True
+
+
+def credit_stripes(account_id: int, stripes: int, amount: int):
+    """
+    Credit a striped account in a random stripe
+    """
+    AccountStripe.objects.filter(
+        account_id=account_id,
+        index=random.randrange(stripes),
+    ).update(
+        balance_cents=F('balance_cents') + amount,
+        updated_at=timezone.now(),
+    )
+
+
+def rebalance_stripes(account_id: int, stripes: int = None) -> Account:
+    """
+    Spread the total balance of an account evenly across its stripes.
+    Passing stripes changes the number of stripes: 0 turns striping off and moves
+    the whole balance back to the account row.
+    """
+    with transaction.atomic():
+        account = Account.objects.select_for_update().get(id=account_id)
+        current = list(AccountStripe.objects.select_for_update().filter(account=account))
+        total = account.balance_cents + sum(stripe.balance_cents for stripe in current)
+        count = account.stripes if stripes is None else stripes
+
+        AccountStripe.objects.filter(account=account, index__gte=count).delete()
+
+        account.balance_cents = total
+        if count:
+            share, remainder = divmod(total, count)
+            AccountStripe.objects.bulk_create(
+                [
+                    AccountStripe(
+                        account=account,
+                        index=index,
+                        balance_cents=share + (1 if index < remainder else 0),
+                    )
+                    for index in range(count)
+                ],
+                update_conflicts=True,
+                unique_fields=['account', 'index'],
+                update_fields=['balance_cents', 'updated_at'],
+            )
+            account.balance_cents = 0
+
+        account.stripes = count
+        account.version += 1
+        account.save(update_fields=['balance_cents', 'stripes', 'version', 'updated_at'])
+        uncache_balance_on_commit(account.id)
+
+    return account
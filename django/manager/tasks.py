@@ -1,20 +1,56 @@
-from decimal import Decimal
-
 from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
 
-from manager.models import Transaction
+from manager.idempotency import delete_expired_keys
+from manager.ledger import take_balance_snapshots
+from manager.models import Account, Transaction
+from manager.outbox import relay_outbox
+from manager.partitions import ensure_partitions, is_partitioned
+from manager.services import apply_cashback
+from manager.stripes import rebalance_stripes
 
 
 @shared_task
 def transaction_account(instance_id):
-    instance = Transaction.objects.get(id=instance_id)
-    account = instance.account
-
     # Cashbacks
-    if instance.type == 'C':
-        account.balance += Decimal(instance.value * 0.005)
-    elif instance.type == 'D':
-        account.balance *= Decimal(instance.value * 0.01)
-    elif instance.type == 'P':
-        account.balance += Decimal(instance.value * 0.01)
-    account.save()
+    apply_cashback(Transaction.objects.filter(id=instance_id))
+
+
+@shared_task
+def cashback_consumer():
+    # Drain the pending cashbacks in chunks, one UPDATE per account per chunk
+    while apply_cashback(Transaction.objects.all(), limit=settings.CASHBACK_BATCH_SIZE) == settings.CASHBACK_BATCH_SIZE:
+        pass
+
+
+@shared_task
+def outbox_relay():
+    # Publish the outbox events in batches until it is empty
+    while relay_outbox(settings.OUTBOX_BATCH_SIZE) == settings.OUTBOX_BATCH_SIZE:
+        pass
+
+
+@shared_task
+def balance_snapshots():
+    take_balance_snapshots(settings.LEDGER_SNAPSHOT_INTERVAL, settings.LEDGER_SNAPSHOT_DELAY)
+
+
+@shared_task
+def rebalance_striped_accounts():
+    # Spread the balance of every striped account evenly across its stripes again
+    for account_id in Account.objects.filter(stripes__gt=0).values_list('id', flat=True):
+        rebalance_stripes(account_id)
+
+
+@shared_task
+def transaction_partitions():
+    # Keep the monthly partitions of the transactions created ahead of time
+    if is_partitioned():
+        ensure_partitions(timezone.now().date(), settings.TRANSACTION_PARTITIONS_AHEAD)
+
+
+@shared_task
+def idempotency_keys_cleanup():
+    # Stored responses are not replayed after IDEMPOTENCY_KEY_TTL
+    delete_expired_keys()
@@ -0,0 +1,226 @@
+"""
+This module contains the unit tests for the account existence index in manager app.
+"""
+# Base imports
+from io import StringIO
+from unittest.mock import patch
+
+# Django imports
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+
+# Third party imports
+from model_bakery import baker
+
+# Project imports
+from manager.account_index import (
+    account_exists,
+    account_known_missing,
+    bitmap_key,
+    build_account_index,
+    mark_accounts_exist,
+    mark_accounts_exist_on_commit,
+    remember_missing,
+    BITMAP_MAX_ID,
+)
+from manager.serializers import TransactionSerializer
+
+
+class FakePipeline:
+    """Queues the commands of a FakeRedis and runs them on execute."""
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        def command(*args):
+            self.commands.append((name, args))
+            return self
+
+        return command
+
+    def __len__(self):
+        return len(self.commands)
+
+    def execute(self):
+        results = [getattr(self.client, name)(*args) for name, args in self.commands]
+        self.commands = []
+        return results
+
+
+class FakeRedis:
+    """The few Redis commands used by the account index, in memory."""
+
+    def __init__(self):
+        self.data = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value):
+        self.data[key] = value
+
+    def exists(self, key):
+        return int(key in self.data)
+
+    def getbit(self, key, offset):
+        return int(offset in self.data.get(key, set()))
+
+    def setbit(self, key, offset, value):
+        bits = self.data.setdefault(key, set())
+        if value:
+            bits.add(offset)
+        else:
+            bits.discard(offset)
+
+    def register_script(self, script):
+        # Only the script of mark_accounts_exist is used
+        def run(keys, args):
+            if not self.exists(keys[0]):
+                return 0
+            for offset in args:
+                self.setbit(keys[0], offset, 1)
+            return 1
+
+        return run
+
+
+class AccountNegativeCacheTestCase(TestCase):
+    """All tests for the negative cache of missing accounts, used without Redis."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.account = baker.make('manager.Account')
+        return super().setUp()
+
+    def test_missing_account_cached(self):
+        self.assertFalse(account_known_missing(999))
+
+        with self.assertNumQueries(1):
+            self.assertFalse(account_exists(999))
+
+        with self.assertNumQueries(0):
+            self.assertFalse(account_exists(999))
+            self.assertTrue(account_known_missing(999))
+
+        with self.assertNumQueries(1):
+            self.assertTrue(account_exists(self.account.pk))
+
+    def test_created_account_uncached(self):
+        self.assertFalse(account_exists(999))
+
+        mark_accounts_exist_on_commit([999])
+        baker.make('manager.Account', id=999)
+
+        self.assertTrue(account_exists(999))
+
+    def test_missing_cached_after_create(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_accounts_exist_on_commit([999])
+            baker.make('manager.Account', id=999)
+
+        # A lookup that ran before the commit caches the account as missing after it
+        remember_missing(999)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(account_exists(999))
+
+    def test_serializer_missing_account(self):
+        serializer = TransactionSerializer(data={'forma_pagamento': 'P', 'conta_id': 999, 'valor': 1})
+        self.assertFalse(serializer.is_valid())
+
+        with self.assertNumQueries(0):
+            serializer = TransactionSerializer(data={'forma_pagamento': 'P', 'conta_id': 999, 'valor': 1})
+            self.assertFalse(serializer.is_valid())
+
+        self.assertEqual(['Conta com conta_id não existe!'], serializer.errors['conta_id'])
+
+
+class AccountIndexTestCase(TestCase):
+    """All tests for the Redis bitmap of existing accounts."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.redis = FakeRedis()
+        patcher = patch('manager.account_index.get_client', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.accounts = baker.make('manager.Account', _quantity=3)
+        return super().setUp()
+
+    def test_index_not_ready(self):
+        with self.assertNumQueries(1):
+            self.assertTrue(account_exists(self.accounts[0].pk))
+
+        with self.assertNumQueries(1):
+            self.assertFalse(account_exists(999))
+
+    def test_build_account_index(self):
+        self.assertEqual(3, build_account_index(chunk_size=2))
+
+        with self.assertNumQueries(0):
+            for account in self.accounts:
+                self.assertTrue(account_exists(account.pk))
+            self.assertFalse(account_exists(999))
+            self.assertTrue(account_known_missing(1000))
+
+    def test_mark_accounts_exist(self):
+        build_account_index()
+        mark_accounts_exist([999, BITMAP_MAX_ID + 1])
+
+        with self.assertNumQueries(0):
+            self.assertTrue(account_exists(999))
+
+        # Ids beyond the bitmap always reach the database
+        with self.assertNumQueries(1):
+            self.assertFalse(account_exists(BITMAP_MAX_ID + 1))
+
+    @override_settings(ACCOUNT_INDEX_MAX_ID=1000)
+    def test_index_max_id(self):
+        build_account_index()
+        mark_accounts_exist([999, 1001])
+
+        self.assertEqual({999} | {account.pk for account in self.accounts}, self.redis.data[bitmap_key()])
+        with self.assertNumQueries(1):
+            self.assertFalse(account_exists(5000))
+        with self.assertNumQueries(0):
+            self.assertFalse(account_exists(5000))
+
+    def test_evicted_bitmap(self):
+        build_account_index()
+        self.redis.data = {key: value for key, value in self.redis.data.items() if not isinstance(value, set)}
+
+        with self.assertNumQueries(1):
+            self.assertTrue(account_exists(self.accounts[0].pk))
+
+    def test_mark_accounts_exist_evicted_bitmap(self):
+        build_account_index()
+        self.redis.data = {key: value for key, value in self.redis.data.items() if not isinstance(value, set)}
+
+        # The bitmap is not recreated with only the new bit, the other accounts are still found
+        mark_accounts_exist([999])
+
+        self.assertEqual(0, self.redis.exists(bitmap_key()))
+        with self.assertNumQueries(1):
+            self.assertTrue(account_exists(self.accounts[0].pk))
+
+    def test_mark_accounts_exist_before_build(self):
+        mark_accounts_exist([999])
+
+        self.assertEqual(0, self.redis.exists(bitmap_key()))
+
+    def test_build_account_index_command(self):
+        out = StringIO()
+        with patch('manager.management.commands.build_account_index.get_client', return_value=self.redis):
+            call_command('build_account_index', stdout=out)
+        self.assertIn('3 accounts indexed', out.getvalue())
+
+        with patch('manager.management.commands.build_account_index.get_client', return_value=None):
+            with self.assertRaises(CommandError):
+                call_command('build_account_index')
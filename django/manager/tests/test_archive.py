@@ -0,0 +1,158 @@
+"""
+This module contains the unit tests for the transaction archive in manager app.
+"""
+# Base imports
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+from typing import List
+from unittest.mock import patch
+
+# Django imports
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import override_settings
+from django.urls import reverse
+
+# Third party imports
+from model_bakery import baker
+from rest_framework import status
+
+# Project imports
+from manager.archive import get_archive_files, read_archive, summarize, verify_archive, write_archive
+from manager.models import Transaction
+from shared.tests import BaseAPITestCase
+
+
+class TransactionArchiveTestCase(BaseAPITestCase):
+    """All tests for the archive_transactions command and the archive read path."""
+
+    tests_to_perform: List = []
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.archive_dir = tempfile.TemporaryDirectory()
+        self.settings = override_settings(ARCHIVE_DIR=self.archive_dir.name)
+        self.settings.enable()
+
+        self.account = baker.make('manager.Account', balance=500)
+        other_account = baker.make('manager.Account', balance=500)
+        for account, valor, created_at in (
+            (self.account, 10, datetime(2020, 1, 10, tzinfo=timezone.utc)),
+            (other_account, 20, datetime(2020, 1, 20, tzinfo=timezone.utc)),
+            (self.account, 30, datetime(2020, 2, 10, tzinfo=timezone.utc)),
+            (self.account, 40, datetime(2030, 1, 10, tzinfo=timezone.utc)),
+        ):
+            transaction = baker.make('manager.Transaction', account=account, type='D', value=valor, tax=1)
+            Transaction.objects.filter(id=transaction.id).update(created_at=created_at, cashback_cents=0)
+
+    def tearDown(self) -> None:
+        self.settings.disable()
+        self.archive_dir.cleanup()
+        return super().tearDown()
+
+    def test_archive_command(self):
+        call_command('archive_transactions', '--before', '2021-01-01', '--chunk-size', '1', stdout=StringIO())
+
+        self.assertEqual([40.0], [float(transaction.value) for transaction in Transaction.objects.all()])
+        files = get_archive_files()
+        self.assertEqual(2, len(files))
+        self.assertEqual(
+            {'count': 3, 'value': 6000, 'tax': 300, 'cashback': 0},
+            summarize(row for path in files for row in read_archive(path))
+        )
+        self.assertEqual([1000, 3000], sorted(
+            row['value_cents'] for path in files for row in read_archive(path, self.account.id)
+        ))
+
+    def test_verify_archive_mismatch(self):
+        call_command('archive_transactions', '--before', '2020-02-01', stdout=StringIO())
+        path = get_archive_files()[0]
+
+        with self.assertRaises(ValueError):
+            verify_archive(path, {'count': 2, 'value': 0, 'tax': 0, 'cashback': 0})
+        self.assertFalse(os.path.exists(path))
+
+    def test_list_falls_back_to_archive(self):
+        call_command('archive_transactions', '--before', '2021-01-01', stdout=StringIO())
+
+        url = reverse('transaction-list')
+        # The live rows after the cutoff end with a next link at the cutoff, without reading the archive
+        with patch('manager.views.transaction.read_archived_transactions') as read_archived:
+            content = json.loads(self.client.get(url, {'conta_id': self.account.id, 'page_size': 2}).content)
+        read_archived.assert_not_called()
+        self.assertEqual([40.0], [row['valor'] for row in content['results']])
+
+        content = json.loads(self.client.get(content['next']).content)
+        self.assertEqual([30.0, 10.0], [row['valor'] for row in content['results']])
+        self.assertEqual(self.account.id, content['results'][0]['conta_id'])
+        self.assertIsNone(content['next'])
+
+        content = json.loads(self.client.get(url, {'conta_id': self.account.id, 'valor_min': 20}).content)
+        content = json.loads(self.client.get(content['next']).content)
+        self.assertEqual([30.0], [row['valor'] for row in content['results']])
+
+    def test_list_archive_date_range(self):
+        call_command('archive_transactions', '--before', '2021-01-01', stdout=StringIO())
+
+        # A range before the cutoff goes to the archive on the first page, and only to its months
+        with patch('manager.archive.read_archive', side_effect=read_archive) as read:
+            content = json.loads(self.client.get(reverse('transaction-list'), {
+                'conta_id': self.account.id,
+                'data_inicio': '2020-02-01T00:00:00Z',
+                'data_fim': '2021-01-01T00:00:00Z',
+            }).content)
+        self.assertEqual([30.0], [row['valor'] for row in content['results']])
+        self.assertIsNone(content['next'])
+        self.assertEqual(['202002'], [os.path.basename(call.args[0]).split('_')[1] for call in read.call_args_list])
+
+    def test_archive_command_before_cutoff(self):
+        with self.assertRaises(CommandError):
+            call_command('archive_transactions', '--before', '2100-01-01', stdout=StringIO())
+
+    def test_pending_cashback_not_archived(self):
+        pending = baker.make('manager.Transaction', account=self.account, type='D', value=50, tax=1)
+        Transaction.objects.filter(id=pending.id).update(created_at=datetime(2020, 1, 15, tzinfo=timezone.utc))
+
+        call_command('archive_transactions', '--before', '2021-01-01', stdout=StringIO())
+
+        self.assertEqual([pending.id], list(Transaction.objects.filter(value_cents=5000).values_list('id', flat=True)))
+        self.assertEqual(3, summarize(row for path in get_archive_files() for row in read_archive(path))['count'])
+
+    def test_cashback_applied_while_archiving(self):
+        pending = baker.make('manager.Transaction', account=self.account, type='D', value=50, tax=1)
+        Transaction.objects.filter(id=pending.id).update(created_at=datetime(2020, 1, 15, tzinfo=timezone.utc))
+
+        def cashback_applied_after_write(month, chunks):
+            path = write_archive(month, chunks)
+            Transaction.objects.filter(id=pending.id).update(cashback_cents=10)
+            return path
+
+        with patch('manager.archive.write_archive', side_effect=cashback_applied_after_write):
+            call_command('archive_transactions', '--before', '2021-01-01', '--batch-size', '1', stdout=StringIO())
+
+        # Never written to a file, so never deleted
+        self.assertTrue(Transaction.objects.filter(id=pending.id).exists())
+        self.assertNotIn(pending.id, [row['id'] for path in get_archive_files() for row in read_archive(path)])
+        self.assertEqual([4000, 5000], sorted(Transaction.objects.values_list('value_cents', flat=True)))
+
+    def test_archive_delete_error_removes_file(self):
+        with patch('django.db.models.query.QuerySet.delete', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                call_command('archive_transactions', '--before', '2020-02-01', stdout=StringIO())
+
+        self.assertEqual([], get_archive_files())
+        self.assertEqual(4, Transaction.objects.count())
+
+    def test_list_unreadable_archive(self):
+        call_command('archive_transactions', '--before', '2021-01-01', stdout=StringIO())
+        with open(get_archive_files()[0], 'wb') as file:
+            file.write(b'corrupt')
+
+        response = self.client.get(
+            reverse('transaction-list'),
+            {'conta_id': self.account.id, 'data_fim': '2021-01-01T00:00:00Z', 'page_size': 5}
+        )
+        self.assertEqual(status.HTTP_503_SERVICE_UNAVAILABLE, response.status_code)
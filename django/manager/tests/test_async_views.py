@@ -0,0 +1,141 @@
+"""
+This module contains the unit tests for the async views in manager app.
+"""
+# Base imports
+import json
+
+# Django imports
+from django.core.cache import cache
+from django.test import AsyncClient, Client, TestCase
+from django.urls import reverse
+
+# Third party imports
+from model_bakery import baker
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Project imports
+from authentication.models import User
+from manager.balance_cache import balance_cache_key
+from manager.cache_utils import get_cache
+from manager.models import OutboxEvent, Transaction
+
+
+class AsyncViewsTestCase(TestCase):
+    """All tests for the ASGI transaction and account endpoints."""
+
+    def setUp(self) -> None:
+        self.maxDiff = None
+        cache.clear()
+        self.user = baker.make(User)
+        self.async_client = AsyncClient()
+        self.auth = {'AUTHORIZATION': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+        self.account = baker.make(
+            'manager.Account',
+            balance=500,
+        )
+        return super().setUp()
+
+    async def test_unauthenticated(self):
+        response = await AsyncClient().get(reverse('async-account'), {'conta_id': self.account.pk})
+
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, response.status_code)
+        self.assertEqual(
+            {'detail': 'Authentication credentials were not provided.'},
+            json.loads(response.content)
+        )
+
+    async def test_account_balance(self):
+        response = await self.async_client.get(
+            reverse('async-account'),
+            {'conta_id': self.account.pk},
+            **self.auth
+        )
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual({'conta_id': self.account.pk, 'saldo': 500.0}, json.loads(response.content))
+        self.assertEqual(50000, get_cache(balance_cache_key(self.account.pk))['saldo_cents'])
+
+        response = await self.async_client.get(reverse('async-account'), {'conta_id': 999}, **self.auth)
+        self.assertEqual({}, json.loads(response.content))
+
+    async def test_account_create(self):
+        response = await self.async_client.post(
+            reverse('async-account'),
+            {'conta_id': 100, 'valor': 10},
+            content_type='application/json',
+            **self.auth
+        )
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        self.assertEqual({'conta_id': 100, 'saldo': 10.0}, json.loads(response.content))
+
+        response = await self.async_client.post(
+            reverse('async-account'),
+            {'conta_id': 100, 'valor': 10},
+            content_type='application/json',
+            **self.auth
+        )
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual({'conta_id': 'Conta já existente!'}, json.loads(response.content))
+
+    async def test_transaction_create(self):
+        response = await self.async_client.post(
+            reverse('async-transaction'),
+            {'forma_pagamento': 'D', 'conta_id': self.account.pk, 'valor': 10},
+            content_type='application/json',
+            IDEMPOTENCY_KEY='async-1',
+            **self.auth
+        )
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        self.assertEqual({'conta_id': self.account.pk, 'saldo': 489.7}, json.loads(response.content))
+
+        replay = await self.async_client.post(
+            reverse('async-transaction'),
+            {'forma_pagamento': 'D', 'conta_id': self.account.pk, 'valor': 10},
+            content_type='application/json',
+            IDEMPOTENCY_KEY='async-1',
+            **self.auth
+        )
+        self.assertEqual(json.loads(response.content), json.loads(replay.content))
+        self.assertEqual(1, await Transaction.objects.acount())
+        self.assertEqual(1, await OutboxEvent.objects.acount())
+
+        response = await self.async_client.post(
+            reverse('async-transaction'),
+            {'forma_pagamento': 'D', 'conta_id': self.account.pk, 'valor': 1000},
+            content_type='application/json',
+            **self.auth
+        )
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    async def test_transaction_validation(self):
+        response = await self.async_client.post(
+            reverse('async-transaction'),
+            {'forma_pagamento': 'D', 'conta_id': 999, 'valor': 10},
+            content_type='application/json',
+            **self.auth
+        )
+        content = json.loads(response.content)
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual({'conta_id': ['Conta com conta_id não existe!']}, content['description']['detail'])
+
+    def test_csrf_exempt(self):
+        # Token authenticated, a client enforcing CSRF like a browser is not rejected
+        client = Client(enforce_csrf_checks=True)
+
+        response = client.post(
+            reverse('async-transaction'),
+            {'forma_pagamento': 'P', 'conta_id': self.account.pk, 'valor': 10},
+            content_type='application/json',
+            HTTP_AUTHORIZATION=self.auth['AUTHORIZATION']
+        )
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+
+        response = client.post(
+            reverse('async-account'),
+            {'conta_id': 100, 'valor': 10},
+            content_type='application/json',
+            HTTP_AUTHORIZATION=self.auth['AUTHORIZATION']
+        )
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
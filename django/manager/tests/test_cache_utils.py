@@ -0,0 +1,290 @@
+"""
+This module contains the unit tests for the two-tier cache helpers in manager app.
+"""
+# Base imports
+from unittest.mock import MagicMock, Mock, patch
+
+# Django imports
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+# Project imports
+from manager import cache_utils
+from manager.balance_cache import balance_cache_key, cache_balance, cache_balances
+from manager.cache_utils import (
+    add_cache,
+    clear_local_cache,
+    delete_cache,
+    delete_cache_if_equal,
+    get_cache,
+    get_cache_stats,
+    get_many_cache,
+    get_or_compute,
+    set_cache,
+    set_many_cache,
+    set_many_cache_if_newer,
+)
+
+
+@override_settings(L1_CACHE_SIZE=3, L1_CACHE_TTL=5)
+class TwoTierCacheTestCase(SimpleTestCase):
+    """All tests for the in-process LRU in front of the shared cache."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        clear_local_cache()
+        self.addCleanup(clear_local_cache)
+        return super().setUp()
+
+    def test_local_hit(self):
+        set_cache('key', {'a': 1})
+        cache.clear()
+
+        self.assertEqual({'a': 1}, get_cache('key'))
+        self.assertIsNone(get_cache('key', local=False))
+        self.assertEqual({'l1_hits': 1, 'l1_misses': 0, 'l2_hits': 0, 'l2_misses': 1}, get_cache_stats())
+
+    def test_shared_hit_fills_local(self):
+        cache.set('test_key', '{"a": 1}')
+
+        self.assertEqual({'a': 1}, get_cache('key'))
+        self.assertEqual({'a': 1}, get_cache('key'))
+        self.assertEqual({'l1_hits': 1, 'l1_misses': 1, 'l2_hits': 1, 'l2_misses': 0}, get_cache_stats())
+
+    def test_lru_size_cap(self):
+        for key in ('a', 'b', 'c'):
+            set_cache(key, key)
+        get_cache('a')
+        set_cache('d', 'd')
+        cache.clear()
+
+        self.assertEqual(['a', None, 'c', 'd'], [get_cache(key) for key in ('a', 'b', 'c', 'd')])
+
+    def test_local_expiry(self):
+        with patch('manager.cache_utils.time.monotonic', return_value=1000):
+            set_cache('short', 1, timeout=2)
+            set_cache('long', 2, timeout=60)
+        cache.clear()
+
+        with patch('manager.cache_utils.time.monotonic', return_value=1003):
+            self.assertIsNone(get_cache('short'))
+            self.assertEqual(2, get_cache('long'))
+
+        # Never longer than L1_CACHE_TTL in the local tier
+        with patch('manager.cache_utils.time.monotonic', return_value=1006):
+            self.assertIsNone(get_cache('long'))
+
+    def test_delete_and_add_invalidate(self):
+        set_cache('key', 1)
+        delete_cache('key')
+        self.assertIsNone(get_cache('key'))
+
+        get_cache('lock')
+        self.assertTrue(add_cache('lock', 1))
+        self.assertFalse(add_cache('lock', 2))
+        self.assertEqual(1, get_cache('lock'))
+
+    def test_get_many_and_set_many(self):
+        set_many_cache({'a': {'v': 1}, 'b': 2}, timeout=60)
+        set_cache('c', 3)
+        cache.delete('test_c')
+
+        self.assertEqual({'a': {'v': 1}, 'b': 2, 'c': 3}, get_many_cache(['a', 'b', 'c', 'd']))
+        self.assertEqual({'a': {'v': 1}, 'b': 2}, get_many_cache(['a', 'b', 'c'], local=False))
+
+    def test_invalidation_messages(self):
+        set_cache('key', 1)
+        cache_utils._on_invalidation({'data': f'{cache_utils._process_token}:test_key'.encode()})
+        self.assertEqual(1, get_cache('key'))
+
+        cache.clear()
+        cache_utils._on_invalidation({'data': b'other-process:test_key'})
+        self.assertIsNone(get_cache('key'))
+
+    def test_invalidation_during_shared_read(self):
+        cache.set('test_key', '{"a": 1}')
+        get = cache.get
+
+        def read_then_invalidated(key):
+            value = get(key)
+            # Another process writes a new value and its invalidation arrives before the stale value is stored
+            cache_utils._on_invalidation({'data': b'other-process:test_key'})
+            return value
+
+        with patch.object(cache, 'get', side_effect=read_then_invalidated):
+            self.assertEqual({'a': 1}, get_cache('key'))
+
+        cache.set('test_key', '{"a": 2}')
+        self.assertEqual({'a': 2}, get_cache('key'))
+
+        # Reads started after the invalidation fill the local tier again
+        cache.clear()
+        self.assertEqual({'a': 2}, get_cache('key'))
+
+    def test_invalidation_during_shared_read_many(self):
+        cache.set_many({'test_a': 1, 'test_b': 2})
+        get_many = cache.get_many
+
+        def read_then_invalidated(keys):
+            values = get_many(keys)
+            cache_utils._on_invalidation({'data': b'other-process:test_a'})
+            return values
+
+        with patch.object(cache, 'get_many', side_effect=read_then_invalidated):
+            self.assertEqual({'a': 1, 'b': 2}, get_many_cache(['a', 'b']))
+
+        cache.clear()
+        self.assertEqual({'b': 2}, get_many_cache(['a', 'b']))
+
+    def test_invalidation_published(self):
+        connection = MagicMock()
+        with patch('manager.cache_utils._ensure_subscriber'), \
+                patch('manager.cache_utils._subscriber', object()), \
+                patch('manager.cache_utils._process_token', 'token'), \
+                patch('django_redis.get_redis_connection', return_value=connection):
+            set_many_cache({'a': 1, 'b': 2})
+
+        connection.pipeline.return_value.publish.assert_any_call('test_cache_invalidation', 'token:test_a')
+        connection.pipeline.return_value.publish.assert_any_call('test_cache_invalidation', 'token:test_b')
+        connection.pipeline.return_value.execute.assert_called_once()
+
+    @override_settings(L1_CACHE_SIZE=0)
+    def test_local_disabled(self):
+        set_cache('key', 1)
+        cache.clear()
+
+        self.assertIsNone(get_cache('key'))
+        self.assertEqual({'l1_hits': 0, 'l1_misses': 0, 'l2_hits': 0, 'l2_misses': 1}, get_cache_stats())
+
+    def test_cache_balances(self):
+        cache_balance(1, 500, version=3)
+        cache_balances([(1, 100, 2), (2, 200, 1)])
+
+        self.assertEqual(
+            {
+                balance_cache_key(1): {'conta_id': 1, 'saldo_cents': 500, 'version': 3},
+                balance_cache_key(2): {'conta_id': 2, 'saldo_cents': 200, 'version': 1},
+            },
+            get_many_cache([balance_cache_key(1), balance_cache_key(2)], local=False)
+        )
+
+    def test_set_if_newer(self):
+        self.assertEqual(['a', 'b'], set_many_cache_if_newer({'a': ({'v': 2}, 2), 'b': (1, 1)}))
+
+        # Older and already cached versions are not written
+        self.assertEqual(['b'], set_many_cache_if_newer({'a': ({'v': 1}, 1), 'b': (3, 3)}))
+        self.assertEqual([], set_many_cache_if_newer({'a': ({'v': 0}, 2)}))
+        self.assertEqual({'a': {'v': 2}, 'b': 3}, get_many_cache(['a', 'b'], local=False))
+
+        # Removed values are refilled by their current version, never by an older one
+        delete_cache('a')
+        self.assertEqual([], set_many_cache_if_newer({'a': ({'v': 1}, 1)}))
+        self.assertEqual(['a'], set_many_cache_if_newer({'a': ({'v': 2}, 2)}))
+        self.assertEqual({'v': 2}, get_cache('a'))
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django_redis.cache.RedisCache', 'LOCATION': 'redis://test'}})
+    def test_set_if_newer_redis(self):
+        connection = MagicMock()
+        connection.register_script.return_value.return_value = [1, 0]
+        with patch('manager.cache_utils._set_if_newer_script', None), \
+                patch('django_redis.get_redis_connection', return_value=connection):
+            self.assertEqual(['a'], set_many_cache_if_newer({'a': ({'v': 2}, 2), 'b': (1, 1)}, timeout=60))
+
+        connection.register_script.assert_called_once_with(cache_utils.SET_IF_NEWER_SCRIPT)
+        kwargs = connection.register_script.return_value.call_args.kwargs
+        self.assertEqual(
+            [':1:test_a', ':1:test_a_version', ':1:test_b', ':1:test_b_version'],
+            [str(key) for key in kwargs['keys']]
+        )
+        self.assertEqual([60, 2, 1], [kwargs['args'][0], kwargs['args'][1], kwargs['args'][3]])
+
+
+class GetOrComputeTestCase(SimpleTestCase):
+    """All tests for the stampede protected get_or_compute."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        return super().setUp()
+
+    def test_compute_once(self):
+        compute = Mock(return_value={'total': 10})
+
+        self.assertEqual({'total': 10}, get_or_compute('total', compute, timeout=60))
+        self.assertEqual({'total': 10}, get_or_compute('total', compute, timeout=60))
+        compute.assert_called_once()
+        self.assertIsNone(get_cache('total_lock'))
+
+    def test_early_refresh(self):
+        cache.set('test_total', '{"value": 1, "delta": 2.0, "expires_at": 1060}')
+        compute = Mock(return_value=2)
+        with patch('manager.cache_utils.time.time', return_value=1055):
+            # A draw near 0 keeps the entry, a draw near 1 refreshes it ahead of its expiry
+            with patch('manager.cache_utils.random.random', return_value=0.1):
+                self.assertEqual(1, get_or_compute('total', compute, timeout=60))
+            with patch('manager.cache_utils.random.random', return_value=0.99):
+                self.assertEqual(2, get_or_compute('total', compute, timeout=60))
+
+            self.assertEqual(2, get_or_compute('total', compute, timeout=60, beta=0))
+
+        compute.assert_called_once()
+
+    def test_stale_value_while_locked(self):
+        cache.set('test_total', '{"value": 1, "delta": 0.1, "expires_at": 0}')
+        add_cache('total_lock', 1)
+        compute = Mock(return_value=2)
+
+        self.assertEqual(1, get_or_compute('total', compute, timeout=60))
+        compute.assert_not_called()
+
+    def test_wait_for_computing_process(self):
+        add_cache('total_lock', 1)
+        compute = Mock(return_value=2)
+
+        def other_process_done(seconds):
+            cache.set('test_total', '{"value": 3, "delta": 0.1, "expires_at": 9999999999}')
+
+        with patch('manager.cache_utils.time.sleep', side_effect=other_process_done):
+            self.assertEqual(3, get_or_compute('total', compute, timeout=60))
+        compute.assert_not_called()
+
+        cache.delete('test_total')
+        with patch('manager.cache_utils.time.sleep'):
+            self.assertEqual(2, get_or_compute('total', compute, timeout=60, lock_timeout=0.01))
+        compute.assert_called_once()
+
+    def test_compute_error_releases_lock(self):
+        with self.assertRaises(ZeroDivisionError):
+            get_or_compute('total', lambda: 1 / 0, timeout=60)
+
+        self.assertIsNone(get_cache('total_lock'))
+        self.assertEqual(1, get_or_compute('total', lambda: 1, timeout=60))
+
+    def test_expired_lock_not_released(self):
+        def slow_compute():
+            # The lock expired during the computation and another process took it
+            cache.set('test_total_lock', 'other')
+            return 1
+
+        self.assertEqual(1, get_or_compute('total', slow_compute, timeout=60))
+        self.assertEqual('other', get_cache('total_lock'))
+
+    def test_delete_if_equal(self):
+        set_cache('lock', 'token')
+
+        self.assertFalse(delete_cache_if_equal('lock', 'other'))
+        self.assertEqual('token', get_cache('lock'))
+        self.assertTrue(delete_cache_if_equal('lock', 'token'))
+        self.assertIsNone(get_cache('lock'))
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django_redis.cache.RedisCache', 'LOCATION': 'redis://test'}})
+    def test_delete_if_equal_redis(self):
+        connection = MagicMock()
+        connection.register_script.return_value.return_value = 1
+        with patch('manager.cache_utils._delete_if_equal_script', None), \
+                patch('django_redis.get_redis_connection', return_value=connection):
+            self.assertTrue(delete_cache_if_equal('lock', 'token'))
+
+        connection.register_script.assert_called_once_with(cache_utils.DELETE_IF_EQUAL_SCRIPT)
+        kwargs = connection.register_script.return_value.call_args.kwargs
+        self.assertEqual([':1:test_lock'], [str(key) for key in kwargs['keys']])
+        self.assertEqual([cache.client.encode('token')], kwargs['args'])
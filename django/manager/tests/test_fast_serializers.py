@@ -0,0 +1,165 @@
+"""
+This module contains the unit tests for the compiled validators and encoders in manager app.
+"""
+# Base imports
+from io import StringIO
+from decimal import Decimal
+from typing import List
+
+# Django imports
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import translation
+
+# Third party imports
+from model_bakery import baker
+from rest_framework import serializers, status
+
+# Project imports
+from manager.fast_serializers import (
+    compile_validator,
+    encode_account,
+    validate_account_create,
+    validate_transaction,
+    validate_transaction_item,
+)
+from manager.models import Account
+from manager.serializers import (
+    AccountCreateSerializer,
+    AccountSerializer,
+    TransactionBatchSerializer,
+    TransactionSerializer,
+)
+from shared.tests import BaseAPITestCase
+
+
+PAYLOADS = (
+    {},
+    None,
+    [],
+    'conta',
+    {'forma_pagamento': None, 'conta_id': None, 'valor': None},
+    {'forma_pagamento': 'X', 'conta_id': '1.0', 'valor': 'a'},
+    {'forma_pagamento': 'P', 'conta_id': '1.5', 'valor': '1' * 1001},
+    {'forma_pagamento': 'P', 'conta_id': True, 'valor': True},
+    {'forma_pagamento': 'D', 'conta_id': '12', 'valor': '10.005'},
+    {'forma_pagamento': 'C', 'conta_id': 999, 'valor': 10},
+    {'forma_pagamento': 'P', 'conta_id': 1, 'valor': 2.5},
+    {'forma_pagamento': 'P', 'conta_id': 1, 'valor': 'inf'},
+    {'forma_pagamento': 'P', 'conta_id': 1, 'valor': 'nan'},
+    {'forma_pagamento': 'P', 'conta_id': 1, 'valor': '1e30'},
+    {'forma_pagamento': 'P', 'conta_id': 1, 'valor': -1e30},
+    QueryDict('forma_pagamento=P&conta_id=&valor=3'),
+    QueryDict('forma_pagamento=C&conta_id=1&valor=3&conta_id=2'),
+)
+
+
+def run(validate):
+    try:
+        return 'valid', dict(validate())
+    except serializers.ValidationError as error:
+        details = error.detail.items() if isinstance(error.detail, dict) else [(None, error.detail)]
+        return 'invalid', [(key, [(str(item), item.code) for item in items]) for key, items in details]
+
+
+class CompiledValidatorTestCase(TestCase):
+    """All tests for the parity of the compiled validators with the DRF serializers."""
+
+    def setUp(self) -> None:
+        cache.clear()
+        baker.make('manager.Account', id=1)
+        return super().setUp()
+
+    def assertSameValidation(self, serializer_class, validate):
+        for language in ('en-us', 'pt-br'):
+            with translation.override(language):
+                for payload in PAYLOADS:
+                    serializer = serializer_class(data=payload)
+                    with self.subTest(serializer=serializer_class.__name__, language=language, payload=payload):
+                        self.assertEqual(
+                            run(lambda: serializer.is_valid(raise_exception=True) and serializer.validated_data),
+                            run(lambda: validate(payload))
+                        )
+
+    def test_transaction_validator(self):
+        self.assertSameValidation(TransactionSerializer, validate_transaction)
+
+    def test_transaction_item_validator(self):
+        self.assertSameValidation(TransactionBatchSerializer, validate_transaction_item)
+
+    def test_account_create_validator(self):
+        self.assertSameValidation(AccountCreateSerializer, validate_account_create)
+
+    def test_unsupported_serializer(self):
+        class ValidatedSerializer(AccountCreateSerializer):
+            def validate(self, attrs):
+                return attrs  # pragma: no cover
+
+        class OptionalSerializer(serializers.Serializer):
+            conta_id = serializers.IntegerField(required=False)
+
+        with self.assertRaises(TypeError):
+            compile_validator(ValidatedSerializer)
+
+        with self.assertRaises(TypeError):
+            compile_validator(OptionalSerializer)
+
+    def test_account_encoder(self):
+        account = Account(id=3, balance_cents=1234)
+
+        self.assertEqual(AccountSerializer(account).data, encode_account(account))
+        self.assertEqual({'conta_id': 3, 'saldo': Decimal('12.34')}, encode_account(account))
+
+    def test_benchmark_serializers(self):
+        out = StringIO()
+        call_command('benchmark_serializers', '--iterations', '10', stdout=out)
+
+        self.assertIn('transacao valid', out.getvalue())
+        self.assertIn('conta encode', out.getvalue())
+
+
+@override_settings(FAST_VALIDATION=True)
+class FastValidationViewTestCase(BaseAPITestCase):
+    """Test the transacao and conta endpoints with the compiled fast path."""
+
+    tests_to_perform: List = []
+
+    def setUp(self) -> None:
+        super().setUp()
+        cache.clear()
+        baker.make('manager.Account', id=100, balance_cents=50000)
+
+    def test_transaction_create(self):
+        response = self.client.post(reverse("transaction-list"), {"forma_pagamento": "P", "conta_id": 100, "valor": 10})
+
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        self.assertEqual({'conta_id': 100, 'saldo': 490.0}, response.json())
+
+    def test_transaction_errors(self):
+        response = self.client.post(reverse("transaction-list"), {"forma_pagamento": "X", "conta_id": 999})
+
+        with self.settings(FAST_VALIDATION=False):
+            expected = self.client.post(reverse("transaction-list"), {"forma_pagamento": "X", "conta_id": 999})
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual(expected.json(), response.json())
+        self.assertEqual(
+            ['forma_pagamento', 'conta_id', 'valor'],
+            list(response.json()['description']['detail'])
+        )
+
+    def test_account_create(self):
+        response = self.client.post(reverse("account-list"), {"conta_id": 200, "valor": 10})
+
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        self.assertEqual({'conta_id': 200, 'saldo': 10.0}, response.json())
+
+        response = self.client.post(reverse("account-list"), {"conta_id": 200, "valor": 10})
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+        response = self.client.post(reverse("account-list"), {"conta_id": "a"})
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual(['conta_id', 'valor'], list(response.json()['description']['detail']))
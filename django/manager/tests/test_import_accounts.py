@@ -0,0 +1,73 @@
+"""
+This module contains the unit tests for the import_accounts command in manager app.
+"""
+# Base imports
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+
+# Django imports
+from django.core.management import call_command
+from django.test import TestCase
+
+# Third party imports
+from model_bakery import baker
+
+# Project imports
+from manager.balance_cache import get_cached_balance
+from manager.ledger import get_balance
+from manager.models import Account, LedgerEntry
+
+
+class ImportAccountsTestCase(TestCase):
+    """All tests for the bulk account import."""
+
+    def setUp(self) -> None:
+        self.maxDiff = None
+        self.account = baker.make('manager.Account', id=1, balance=5)
+        self.directory = tempfile.TemporaryDirectory()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+        return super().tearDown()
+
+    def write(self, name: str, content: str) -> str:
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as file:
+            file.write(content)
+        return path
+
+    def call(self, *args) -> str:
+        stdout = StringIO()
+        call_command('import_accounts', *args, stdout=stdout, stderr=StringIO())
+        return stdout.getvalue()
+
+    def test_import_csv_skip(self):
+        path = self.write('accounts.csv', 'conta_id,valor\n1,10\n2,20.5\n3,abc\n4,1\n4,2\n')
+
+        output = self.call(path, '--batch-size', '2')
+
+        self.assertIn('5 rows read, 2 created, 0 updated, 2 skipped, 1 invalid', output)
+        self.assertEqual(
+            [(1, 500), (2, 2050), (4, 200)],
+            list(Account.objects.values_list('id', 'balance_cents'))
+        )
+        self.assertEqual(2050, get_balance(2, at=LedgerEntry.objects.get(account_id=2).created_at))
+
+    def test_import_ndjson_update(self):
+        path = self.write('accounts.ndjson', '{"conta_id": 1, "valor": 8}\n{"conta_id": 5, "valor": 1}\nnot json\n')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            output = self.call(path, '--on-conflict', 'update')
+
+        self.assertIn('3 rows read, 1 created, 1 updated, 0 skipped, 1 invalid', output)
+        self.account.refresh_from_db()
+        self.assertEqual(Decimal('8.00'), self.account.balance)
+        self.assertEqual(1, self.account.version)
+        self.assertEqual(
+            [300],
+            list(LedgerEntry.objects.filter(account_id=1).values_list('amount_cents', flat=True))
+        )
+        self.assertEqual({'conta_id': 1, 'saldo': Decimal('8.00')}, get_cached_balance(1))
@@ -0,0 +1,74 @@
+"""
+This module contains the unit tests for the ledger in manager app.
+"""
+# Base imports
+from datetime import timedelta
+
+# Django imports
+from django.test import TestCase
+from django.utils import timezone
+
+# Project imports
+from manager.ledger import get_balance, take_balance_snapshots
+from manager.models import BalanceSnapshot, EntryType, LedgerEntry
+from manager.services import create_account, create_transaction
+from manager.tasks import transaction_account
+
+
+class LedgerTestCase(TestCase):
+    """All tests for the append-only ledger and its balance snapshots."""
+
+    def setUp(self) -> None:
+        self.maxDiff = None
+        self.account = create_account({'conta_id': 10, 'valor': 10000})
+        return super().setUp()
+
+    def test_transaction_entries(self):
+        create_transaction({'forma_pagamento': 'D', 'conta_id': self.account.pk, 'valor': 1000})
+        transaction_account(LedgerEntry.objects.last().transaction_id)
+
+        self.assertEqual(
+            [(EntryType.DEPOSIT, 10000), (EntryType.DEBIT, -1000), (EntryType.FEE, -30), (EntryType.CASHBACK, 10)],
+            list(LedgerEntry.objects.values_list('type', 'amount_cents'))
+        )
+        self.assertEqual(8980, get_balance(self.account.pk))
+        self.assertEqual(8980, get_balance(self.account.pk, timezone.now()))
+
+    def test_balance_snapshots(self):
+        for _ in range(3):
+            create_transaction({'forma_pagamento': 'P', 'conta_id': self.account.pk, 'valor': 1000})
+
+        self.assertEqual(0, take_balance_snapshots(min_entries=5, delay=0))
+        self.assertEqual(1, take_balance_snapshots(min_entries=4, delay=0))
+        self.assertEqual(0, take_balance_snapshots(min_entries=4, delay=0))
+
+        snapshot = BalanceSnapshot.objects.get()
+        self.assertEqual(7000, snapshot.balance_cents)
+        self.assertEqual(LedgerEntry.objects.last().pk, snapshot.last_entry_id)
+
+        # The balance is read from the snapshot plus the tail of entries after it
+        LedgerEntry.objects.filter(id__lte=snapshot.last_entry_id).delete()
+        create_transaction({'forma_pagamento': 'P', 'conta_id': self.account.pk, 'valor': 500})
+        self.assertEqual(6500, get_balance(self.account.pk, timezone.now()))
+
+    def test_balance_snapshots_cutoff_by_id(self):
+        for _ in range(3):
+            create_transaction({'forma_pagamento': 'P', 'conta_id': self.account.pk, 'valor': 1000})
+
+        # A lower id committed with a later created_at is not skipped, a higher id within the delay is
+        entries = list(LedgerEntry.objects.order_by('id'))
+        LedgerEntry.objects.filter(pk=entries[1].pk).update(created_at=timezone.now() + timedelta(hours=1))
+        LedgerEntry.objects.filter(pk=entries[3].pk).update(created_at=timezone.now() + timedelta(hours=1))
+
+        self.assertEqual(1, take_balance_snapshots(min_entries=3, delay=0))
+
+        snapshot = BalanceSnapshot.objects.get()
+        self.assertEqual(entries[2].pk, snapshot.last_entry_id)
+        self.assertEqual(8000, snapshot.balance_cents)
+
+    def test_balance_as_of(self):
+        create_transaction({'forma_pagamento': 'P', 'conta_id': self.account.pk, 'valor': 1000})
+        LedgerEntry.objects.filter(type=EntryType.DEBIT).update(created_at=timezone.now() + timedelta(days=1))
+
+        self.assertEqual(10000, get_balance(self.account.pk, timezone.now()))
+        self.assertEqual(9000, get_balance(self.account.pk, timezone.now() + timedelta(days=2)))
@@ -0,0 +1,35 @@
+"""
+This module contains the unit tests for the money helpers in manager app.
+"""
+# Base imports
+from decimal import Decimal
+
+# Django imports
+from django.test import SimpleTestCase
+
+# Project imports
+from manager.money import apply_rate, from_cents, to_cents
+
+
+class MoneyTestCase(SimpleTestCase):
+    """All tests for the integer cents money representation."""
+
+    def test_to_cents(self):
+        self.assertEqual(1050, to_cents(10.5))
+        self.assertEqual(29, to_cents(0.29))
+        self.assertEqual(1001, to_cents('10.005'))
+        self.assertEqual(1000, to_cents(Decimal('10')))
+
+        for value in ('inf', '-inf', 'nan', float('inf')):
+            with self.assertRaises(ValueError):
+                to_cents(value)
+
+    def test_from_cents(self):
+        self.assertEqual(Decimal('448.50'), from_cents(44850))
+        self.assertEqual(Decimal('-0.05'), from_cents(-5))
+
+    def test_apply_rate(self):
+        self.assertEqual(150, apply_rate(5000, 300))
+        self.assertEqual(1, apply_rate(101, 50))
+        self.assertEqual(0, apply_rate(99, 50))
+        self.assertEqual(-150, apply_rate(-5000, 300))
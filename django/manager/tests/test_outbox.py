@@ -0,0 +1,66 @@
+"""
+This module contains the unit tests for the transactional outbox in manager app.
+"""
+# Base imports
+from unittest.mock import MagicMock, patch
+
+# Django imports
+from django.test import TestCase, override_settings
+
+# Third party imports
+from kombu.exceptions import OperationalError
+from model_bakery import baker
+
+# Project imports
+from manager.models import OutboxEvent
+from manager.outbox import relay_outbox
+
+
+class OutboxTestCase(TestCase):
+    """All tests for the outbox written with transactions and its relay."""
+
+    def setUp(self) -> None:
+        self.maxDiff = None
+        self.account = baker.make(
+            'manager.Account',
+            balance=100,
+        )
+        return super().setUp()
+
+    def test_transaction_writes_outbox(self):
+        transaction = baker.make('manager.Transaction', account=self.account)
+
+        event = OutboxEvent.objects.get()
+        self.assertEqual('manager.tasks.transaction_account', event.task)
+        self.assertEqual({'args': [transaction.pk]}, event.payload)
+
+    @override_settings(CASHBACK_MODE='batch')
+    def test_transaction_batch_mode_without_outbox(self):
+        baker.make('manager.Transaction', account=self.account)
+
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    @patch('bank_manager.celery.app.producer_or_acquire')
+    @patch('bank_manager.celery.app.send_task')
+    def test_relay_outbox(self, mock_send_task, mock_producer_or_acquire):
+        transactions = baker.make('manager.Transaction', account=self.account, _quantity=3)
+
+        self.assertEqual(2, relay_outbox(2))
+        self.assertEqual(1, relay_outbox(2))
+        self.assertEqual(0, relay_outbox(2))
+
+        self.assertEqual(
+            [transaction.pk for transaction in transactions],
+            [call.kwargs['args'][0] for call in mock_send_task.call_args_list]
+        )
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    @patch('bank_manager.celery.app.producer_or_acquire', MagicMock())
+    @patch('bank_manager.celery.app.send_task', side_effect=OperationalError)
+    def test_relay_outbox_broker_error(self, mock_send_task):
+        baker.make('manager.Transaction', account=self.account)
+
+        with self.assertRaises(OperationalError):
+            relay_outbox(10)
+
+        self.assertEqual(1, OutboxEvent.objects.count())
@@ -0,0 +1,81 @@
+"""
+This module contains the unit tests for the transaction partitions in manager app.
+"""
+# Base imports
+from datetime import date
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+# Django imports
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+# Project imports
+from manager.partitions import add_months, create_partition, is_partitioned, partition_name
+
+
+class PartitionHelpersTestCase(SimpleTestCase):
+    """All tests for the monthly partition helpers."""
+
+    def test_add_months(self):
+        self.assertEqual(date(2024, 2, 1), add_months(date(2023, 12, 1), 2))
+        self.assertEqual(date(2023, 11, 1), add_months(date(2024, 1, 1), -2))
+
+    def test_partition_name(self):
+        self.assertEqual('manager_transaction_p202403', partition_name(date(2024, 3, 1)))
+
+
+class CreatePartitionTestCase(TestCase):
+    """Test the statements of create_partition, PostgreSQL only, against a recording cursor."""
+
+    def create_partition(self, *fetched):
+        cursor = MagicMock()
+        cursor.__enter__.return_value = cursor
+        cursor.fetchone.side_effect = [(value,) for value in fetched]
+        with patch.object(connection, 'cursor', return_value=cursor):
+            created = create_partition(date(2024, 3, 1))
+
+        # Without the savepoints of the atomic block, run on the same cursor
+        statements = [call.args[0].split(' (')[0] for call in cursor.execute.call_args_list]
+        return created, [sql for sql in statements if 'SAVEPOINT' not in sql]
+
+    def test_existing_partition(self):
+        self.assertEqual((False, ['SELECT to_regclass(%s) IS NOT NULL']), self.create_partition(True))
+
+    def test_empty_default_partition(self):
+        created, statements = self.create_partition(False, True, False)
+
+        self.assertTrue(created)
+        self.assertEqual(
+            'CREATE TABLE "manager_transaction_p202403" PARTITION OF "manager_transaction" FOR VALUES FROM',
+            statements[-1]
+        )
+
+    def test_rows_in_default_partition(self):
+        created, statements = self.create_partition(False, True, True)
+
+        # The rows of the month are moved out of the default partition while it is detached
+        self.assertTrue(created)
+        self.assertEqual(
+            [
+                'ALTER TABLE "manager_transaction" DETACH PARTITION "manager_transaction_default"',
+                'CREATE TABLE "manager_transaction_p202403" PARTITION OF "manager_transaction" FOR VALUES FROM',
+                'WITH moved AS',
+                'ALTER TABLE "manager_transaction" ATTACH PARTITION "manager_transaction_default" DEFAULT',
+            ],
+            statements[3:]
+        )
+
+
+class PartitionTransactionsCommandTestCase(TestCase):
+    """All tests for the partition_transactions command."""
+
+    def test_command(self):
+        stdout = StringIO()
+        call_command('partition_transactions', '--detach', stdout=stdout)
+
+        if is_partitioned():
+            self.assertNotIn('not partitioned', stdout.getvalue())
+        else:
+            self.assertEqual('manager_transaction is not partitioned, nothing to do\n', stdout.getvalue())
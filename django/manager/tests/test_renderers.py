@@ -0,0 +1,114 @@
+"""
+This module contains the unit tests for the orjson renderer and parser used by the API.
+"""
+# Base imports
+import io
+import uuid
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+
+# Django imports
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils import translation
+from django.utils.translation import gettext_lazy as _
+
+# Third party imports
+from model_bakery import baker
+from rest_framework.exceptions import NotFound, ParseError, ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+# Project imports
+from manager.models import Account
+from manager.serializers import AccountSerializer
+from shared.http.parsers import ORJSONParser
+from shared.http.renderers import ORJSONRenderer
+from shared.http.responses import api_exception_response, not_found_response
+
+
+class ORJSONRendererTestCase(TestCase):
+    """All tests for the output parity of ORJSONRenderer with the stock JSONRenderer."""
+
+    def assertSameRender(self, data, accepted_media_type=None, renderer_context=None):
+        self.assertEqual(
+            JSONRenderer().render(data, accepted_media_type, renderer_context),
+            ORJSONRenderer().render(data, accepted_media_type, renderer_context)
+        )
+
+    def test_render_account(self):
+        account = baker.make('manager.Account', balance_cents=123456)
+
+        self.assertSameRender(AccountSerializer(account).data)
+        self.assertEqual(
+            f'{{"conta_id":{account.pk},"saldo":1234.56}}'.encode(),
+            ORJSONRenderer().render(AccountSerializer(account).data)
+        )
+
+    def test_render_error_payloads(self):
+        for language in ('en-us', 'pt-br'):
+            with translation.override(language):
+                error = ValidationError({'conta_id': ['Conta com conta_id não existe!']})
+                self.assertSameRender(api_exception_response(exception=error).data)
+                self.assertSameRender(not_found_response(exception=NotFound(), custom_message='Conta inexistente').data)
+                self.assertSameRender({'detail': _('Not found.')})
+
+    def test_render_types(self):
+        self.assertSameRender({
+            'utc': datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=dt_timezone.utc),
+            'local': datetime(2024, 1, 2, 3, 4, 5, tzinfo=dt_timezone(timedelta(hours=-3))),
+            'naive': datetime(2024, 1, 2, 3, 4, 5),
+            'date': date(2024, 1, 2),
+            'duration': timedelta(seconds=90),
+            'uuid': uuid.UUID(int=1),
+            'decimal': Decimal('0.10'),
+            'queryset': Account.objects.none(),
+            'tuple': (1, 2),
+            1: 'non str key',
+            'separators': 'line paragraph  ação',
+        })
+
+    def test_render_indent_and_iterables(self):
+        data = {'conta_id': 1, 'saldo': Decimal('1.00')}
+
+        self.assertSameRender(data, 'application/json; indent=4')
+        self.assertSameRender(data, renderer_context={'indent': 4})
+        self.assertEqual(
+            JSONRenderer().render({'generator': (value for value in range(3))}),
+            ORJSONRenderer().render({'generator': (value for value in range(3))})
+        )
+        self.assertEqual(b'', ORJSONRenderer().render(None))
+
+    def test_benchmark_renderers(self):
+        out = StringIO()
+        call_command('benchmark_renderers', '--iterations', '10', stdout=out)
+
+        self.assertIn('render conta', out.getvalue())
+        self.assertIn('parse transacao', out.getvalue())
+
+
+class ORJSONParserTestCase(SimpleTestCase):
+    """All tests for the parity of ORJSONParser with the stock JSONParser."""
+
+    def parse(self, parser_class, body: bytes, encoding: str = 'utf-8'):
+        try:
+            return parser_class().parse(io.BytesIO(body), parser_context={'encoding': encoding})
+        except ParseError as error:
+            return str(error.detail)
+
+    def assertSameParse(self, body: bytes, encoding: str = 'utf-8'):
+        self.assertEqual(self.parse(JSONParser, body, encoding), self.parse(ORJSONParser, body, encoding))
+
+    def test_parse(self):
+        self.assertSameParse(b'{"forma_pagamento": "P", "conta_id": 123, "valor": 10.5}')
+        self.assertSameParse('{"nome": "ação"}'.encode('latin-1'), 'latin-1')
+        self.assertSameParse(b'[1, {"a": null}]')
+
+    def test_parse_fallback(self):
+        self.assertSameParse(b'{"conta_id": 123456789012345678901234567890}')
+        self.assertSameParse(b'{"valor": 0.1234567890123456789}')
+        self.assertSameParse(b'{"conta_id": 1,}')
+        self.assertSameParse(b'{"valor": NaN}')
+        self.assertSameParse(b'')
+        self.assertTrue(self.parse(ORJSONParser, b'{"conta_id": 1,}').startswith('JSON parse error - '))
@@ -0,0 +1,65 @@
+"""
+This module contains the unit tests for the transaction sequencer in manager app.
+"""
+# Base imports
+from concurrent.futures import Future
+from decimal import Decimal
+from unittest.mock import patch
+
+# Django imports
+from django.test import TestCase
+
+# Third party imports
+from model_bakery import baker
+
+# Project imports
+from manager.models import Transaction
+from manager.sequencer import SequencerTimeout, TransactionSequencer
+
+
+class TransactionSequencerTestCase(TestCase):
+    """All tests for the per account single-writer sequencer."""
+
+    def setUp(self) -> None:
+        self.maxDiff = None
+        self.sequencer = TransactionSequencer(partitions=4, max_batch=10, timeout=0.01)
+        self.account = baker.make(
+            'manager.Account',
+            balance=100,
+        )
+        return super().setUp()
+
+    def test_partition_for(self):
+        self.assertEqual(self.sequencer.partition_for(5), self.sequencer.partition_for(9))
+        self.assertNotEqual(self.sequencer.partition_for(5), self.sequencer.partition_for(6))
+
+    @patch('manager.tasks.transaction_account.apply_async')
+    def test_process_group_commit(self, mock_apply_async):
+        requests = [
+            ({'forma_pagamento': 'P', 'conta_id': self.account.pk, 'valor': 6000}, Future()),
+            ({'forma_pagamento': 'P', 'conta_id': self.account.pk, 'valor': 6000}, Future()),
+            ({'forma_pagamento': 'P', 'conta_id': self.account.pk, 'valor': 4000}, Future()),
+        ]
+        cancelled = Future()
+        cancelled.cancel()
+        requests.append(({'forma_pagamento': 'P', 'conta_id': self.account.pk, 'valor': 100}, cancelled))
+
+        self.sequencer.process(requests)
+
+        created, account = requests[0][1].result()
+        self.assertTrue(created)
+        self.assertEqual(Decimal('40.00'), account.balance)
+        self.assertEqual((False, None), requests[1][1].result())
+        self.assertEqual(Decimal('0.00'), requests[2][1].result()[1].balance)
+
+        self.account.refresh_from_db()
+        self.assertEqual(Decimal('0.00'), self.account.balance)
+        self.assertEqual(2, Transaction.objects.filter(account=self.account).count())
+
+    @patch.object(TransactionSequencer, 'start')
+    def test_submit_timeout(self, mock_start):
+        with self.assertRaises(SequencerTimeout):
+            self.sequencer.submit({'forma_pagamento': 'P', 'conta_id': self.account.pk, 'valor': 1000})
+
+        _, future = self.sequencer.queues[self.sequencer.partition_for(self.account.pk)].get_nowait()
+        self.assertTrue(future.cancelled())
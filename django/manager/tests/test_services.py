@@ -0,0 +1,135 @@
+"""
+This module contains the unit tests for the services in manager app.
+"""
+# Base imports
+from decimal import Decimal
+from unittest.mock import patch
+
+# Django imports
+from django.test import TestCase, override_settings
+
+# Third party imports
+from model_bakery import baker
+
+# Project imports
+from manager.models import Account, OutboxEvent, Transaction
+from manager.services import create_transaction, debit_account
+from manager.tasks import cashback_consumer, transaction_account
+
+
+class DebitEngineTestCase(TestCase):
+    """All tests for the debit engine used by create_transaction."""
+
+    def setUp(self) -> None:
+        self.maxDiff = None
+        self.account = baker.make(
+            'manager.Account',
+            balance=100,
+        )
+        return super().setUp()
+
+    def test_debit_account_ok(self):
+        self.assertTrue(debit_account(self.account.pk, 4000))
+        self.account.refresh_from_db()
+        self.assertEqual(Decimal('60.00'), self.account.balance)
+
+    def test_debit_account_insufficient_balance(self):
+        self.assertFalse(debit_account(self.account.pk, 10001))
+        self.account.refresh_from_db()
+        self.assertEqual(Decimal('100.00'), self.account.balance)
+
+    @patch('manager.tasks.transaction_account.apply_async')
+    def test_create_transaction_ok(self, mock_apply_async):
+        created, account = create_transaction(
+            {'forma_pagamento': 'C', 'conta_id': self.account.pk, 'valor': 1000}
+        )
+
+        self.assertTrue(created)
+        self.assertEqual(Decimal('89.50'), account.balance)
+        transaction = Transaction.objects.get(account=self.account)
+        self.assertEqual(Decimal('10.00'), transaction.value)
+        self.assertEqual(Decimal('0.50'), transaction.tax)
+
+    def test_create_transaction_insufficient_balance(self):
+        created, account = create_transaction(
+            {'forma_pagamento': 'D', 'conta_id': self.account.pk, 'valor': 9900}
+        )
+
+        self.assertFalse(created)
+        self.assertIsNone(account)
+        self.assertFalse(Transaction.objects.exists())
+        self.assertEqual(Decimal('100.00'), Account.objects.get(pk=self.account.pk).balance)
+
+    @patch('manager.tasks.transaction_account.apply_async')
+    def test_transaction_account_cashback(self, mock_apply_async):
+        for forma_pagamento in ('C', 'D', 'P'):
+            transaction = baker.make(
+                'manager.Transaction',
+                account=self.account,
+                type=forma_pagamento,
+                value=10,
+                tax=0,
+            )
+            transaction_account(transaction.pk)
+
+        self.account.refresh_from_db()
+        self.assertEqual(Decimal('100.25'), self.account.balance)
+
+    @patch('manager.tasks.transaction_account.apply_async')
+    def test_transaction_account_cashback_once(self, mock_apply_async):
+        transaction = baker.make(
+            'manager.Transaction',
+            account=self.account,
+            type='P',
+            value=10,
+            tax=0,
+        )
+        transaction_account(transaction.pk)
+        transaction_account(transaction.pk)
+
+        self.account.refresh_from_db()
+        self.assertEqual(Decimal('100.10'), self.account.balance)
+
+    @override_settings(CASHBACK_MODE='batch', CASHBACK_BATCH_SIZE=2)
+    def test_cashback_consumer(self):
+        other_account = baker.make(
+            'manager.Account',
+            balance=0,
+        )
+        for account in (self.account, other_account, self.account, self.account, other_account):
+            baker.make(
+                'manager.Transaction',
+                account=account,
+                type='C',
+                value=100,
+                tax=5,
+            )
+
+        cashback_consumer()
+
+        self.account.refresh_from_db()
+        other_account.refresh_from_db()
+        self.assertEqual(Decimal('101.50'), self.account.balance)
+        self.assertEqual(Decimal('1.00'), other_account.balance)
+        self.assertFalse(Transaction.objects.filter(cashback_cents__isnull=True).exists())
+
+    @override_settings(CASHBACK_MODE='inline')
+    def test_create_transaction_inline_cashback(self):
+        created, account = create_transaction(
+            {'forma_pagamento': 'D', 'conta_id': self.account.pk, 'valor': 1000}
+        )
+
+        self.assertTrue(created)
+        self.assertEqual(Decimal('89.80'), account.balance)
+        transaction = Transaction.objects.get(account=self.account)
+        self.assertEqual(10, transaction.cashback_cents)
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    @override_settings(CASHBACK_MODE='inline')
+    def test_create_transaction_inline_cashback_insufficient_balance(self):
+        created, account = create_transaction(
+            {'forma_pagamento': 'P', 'conta_id': self.account.pk, 'valor': 10001}
+        )
+
+        self.assertFalse(created)
+        self.assertEqual(Decimal('100.00'), Account.objects.get(pk=self.account.pk).balance)
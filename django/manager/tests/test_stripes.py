@@ -0,0 +1,109 @@
+"""
+This module contains the unit tests for the striped balances in manager app.
+"""
+# Base imports
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+# Django imports
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import QuerySet
+from django.test import TestCase
+
+# Third party imports
+from model_bakery import baker
+
+# Project imports
+from manager.models import AccountStripe, Transaction
+from manager.serializers import AccountSerializer
+from manager.services import apply_cashback, apply_transactions, create_transaction, TRANSACTION_OK
+from manager.stripes import debit_stripes, get_total_balance, rebalance_stripes
+
+
+class AccountStripeTestCase(TestCase):
+    """All tests for the striped sub-balances of hot accounts."""
+
+    def setUp(self) -> None:
+        self.maxDiff = None
+        cache.clear()
+        self.account = baker.make(
+            'manager.Account',
+            balance=100,
+        )
+        self.account = rebalance_stripes(self.account.pk, 4)
+        return super().setUp()
+
+    def stripe_balances(self):
+        return list(AccountStripe.objects.filter(account=self.account).values_list('balance_cents', flat=True))
+
+    def test_rebalance_stripes(self):
+        self.assertEqual(0, self.account.balance_cents)
+        self.assertEqual([2500, 2500, 2500, 2500], self.stripe_balances())
+        self.assertEqual(10000, get_total_balance(self.account))
+
+        AccountStripe.objects.filter(account=self.account, index=0).update(balance_cents=1)
+        rebalance_stripes(self.account.pk, 3)
+        self.assertEqual([2501, 2500, 2500], self.stripe_balances())
+
+        account = rebalance_stripes(self.account.pk, 0)
+        self.assertEqual(0, account.stripes)
+        self.assertEqual(7501, account.balance_cents)
+        self.assertFalse(AccountStripe.objects.exists())
+
+    def test_debit_stripes_spread(self):
+        self.assertTrue(debit_stripes(self.account.pk, 4, 2000))
+        self.assertTrue(debit_stripes(self.account.pk, 4, 7000))
+        self.assertFalse(debit_stripes(self.account.pk, 4, 1001))
+
+        self.assertEqual(1000, sum(self.stripe_balances()))
+        self.assertTrue(all(balance >= 0 for balance in self.stripe_balances()))
+
+    @patch('manager.tasks.transaction_account.apply_async')
+    def test_create_transaction(self, mock_apply_async):
+        created, account = create_transaction(
+            {'forma_pagamento': 'C', 'conta_id': self.account.pk, 'valor': 1000}
+        )
+
+        self.assertTrue(created)
+        self.assertEqual(Decimal('89.50'), AccountSerializer(account).data['saldo'])
+        self.assertEqual((False, None), create_transaction(
+            {'forma_pagamento': 'P', 'conta_id': self.account.pk, 'valor': 9000}
+        ))
+
+    def test_apply_transactions_and_cashback(self):
+        results = apply_transactions([
+            {'forma_pagamento': 'P', 'conta_id': self.account.pk, 'valor': 6000},
+            {'forma_pagamento': 'P', 'conta_id': self.account.pk, 'valor': 6000},
+        ])
+
+        self.assertEqual(TRANSACTION_OK, results[0][0])
+        self.assertEqual(4000, results[0][1])
+        self.assertNotEqual(TRANSACTION_OK, results[1][0])
+
+        apply_cashback(Transaction.objects.all())
+        self.assertEqual(4060, get_total_balance(self.account))
+
+    def test_apply_transactions_striped_row_not_locked(self):
+        other = baker.make('manager.Account', balance=100)
+        loaded = []
+        in_bulk = QuerySet.in_bulk
+
+        def record_in_bulk(queryset, *args, **kwargs):
+            accounts = in_bulk(queryset, *args, **kwargs)
+            loaded.append((bool(queryset.query.select_for_update), set(accounts)))
+            return accounts
+
+        with patch.object(QuerySet, 'in_bulk', record_in_bulk):
+            results = apply_transactions([
+                {'forma_pagamento': 'P', 'conta_id': self.account.pk, 'valor': 10},
+                {'forma_pagamento': 'P', 'conta_id': other.pk, 'valor': 10},
+            ])
+
+        self.assertEqual([TRANSACTION_OK, TRANSACTION_OK], [result for result, _ in results])
+        self.assertEqual([(True, {other.pk}), (False, {self.account.pk})], loaded)
+
+    def test_stripe_account_command(self):
+        call_command('stripe_account', self.account.pk, '--stripes', '2', stdout=StringIO())
+        self.assertEqual([5000, 5000], self.stripe_balances())
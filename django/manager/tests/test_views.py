@@ -1,10 +1,15 @@
 # Base imports
 import json
+from decimal import Decimal
 from typing import List
 from unittest.mock import patch
 
 # Django imports
+from django.core.cache import cache
+from django.db import connection, IntegrityError
+from django.test import override_settings
 from django.urls import reverse
+from django.utils import timezone
 
 # Third party imports
 from rest_framework import status
@@ -12,6 +17,11 @@ from model_bakery import baker
 
 
 # Project imports
+from manager.balance_cache import balance_cache_key, cache_balance, get_cached_balance
+from manager.cache_utils import get_cache
+from manager.idempotency import delete_expired_keys
+from manager.ledger import take_balance_snapshots
+from manager.models import IdempotencyKey, OutboxEvent, Transaction
 from shared.tests import BaseAPITestCase
 
 
@@ -148,10 +158,9 @@ class TransactionViewSetTestCase(BaseAPITestCase):
     def setUp(self) -> None:
         super().setUp()
         self.url = reverse("transaction-list")
+        cache.clear()
 
-    @patch('manager.tasks.transaction_account.apply_async')
-    def test_create_ok(self, mock_apply_async):
-        mock_apply_async.return_value = None
+    def test_create_ok(self):
         account = baker.make(
             'manager.Account',
             balance=500,
@@ -195,6 +204,22 @@ class TransactionViewSetTestCase(BaseAPITestCase):
         content = json.loads(response.content)
         self.assertEqual(status.HTTP_201_CREATED, response.status_code)
         self.assertDictEqual({'conta_id': 1, 'saldo': 268.5}, content)
+        # One cashback task per transaction, written to the outbox with it
+        self.assertEqual(3, OutboxEvent.objects.count())
+
+    def test_create_invalid_amount(self):
+        account = baker.make('manager.Account', balance=500)
+
+        for value in ('inf', 'nan', '1e30'):
+            with self.subTest(value=value):
+                response = self.client.post(
+                    self.url,
+                    {"forma_pagamento": "D", "conta_id": account.pk, "valor": value},
+                )
+                self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+        account.refresh_from_db()
+        self.assertEqual(50000, account.balance_cents)
 
     def test_not_found_balance(self):
         account = baker.make(
@@ -250,3 +275,333 @@ class TransactionViewSetTestCase(BaseAPITestCase):
             {'forma_pagamento': ['"PA" is not a valid choice.']},
             content['description']['detail']
         )
+
+    def test_create_batch(self):
+        account = baker.make(
+            'manager.Account',
+            balance=100,
+        )
+
+        response = self.client.post(
+            reverse("transaction-batch"),
+            [
+                {"forma_pagamento": "D", "conta_id": account.pk, "valor": 50},
+                {"forma_pagamento": "P", "conta_id": 1111, "valor": 10},
+                {"forma_pagamento": "C", "conta_id": account.pk, "valor": 50},
+                {"forma_pagamento": "P", "conta_id": account.pk, "valor": 40},
+            ],
+            format='json'
+        )
+        content = json.loads(response.content)
+
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        self.assertEqual(
+            [
+                {'conta_id': account.pk, 'status': 'ok', 'saldo': 48.5},
+                {'conta_id': 1111, 'status': 'conta inexistente'},
+                {'conta_id': account.pk, 'status': 'saldo insuficiente'},
+                {'conta_id': account.pk, 'status': 'ok', 'saldo': 8.5},
+            ],
+            content
+        )
+        self.assertEqual(2, OutboxEvent.objects.count())
+
+    def test_create_batch_error_validate(self):
+        response = self.client.post(
+            reverse("transaction-batch"),
+            [{"forma_pagamento": "PA", "conta_id": 1, "valor": 50}],
+            format='json'
+        )
+        content = json.loads(response.content)
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual(
+            [{'forma_pagamento': ['"PA" is not a valid choice.']}],
+            content['description']['detail']
+        )
+
+    def test_create_idempotency_key(self):
+        account = baker.make(
+            'manager.Account',
+            balance=500,
+        )
+        data = {
+            "forma_pagamento": "P",
+            "conta_id": account.pk,
+            "valor": 100
+        }
+
+        for _ in range(2):
+            response = self.client.post(self.url, data, HTTP_IDEMPOTENCY_KEY='abc-123')
+            content = json.loads(response.content)
+
+            self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+            self.assertDictEqual({'conta_id': account.pk, 'saldo': 400.0}, content)
+
+        self.assertEqual(1, Transaction.objects.filter(account=account).count())
+
+        response = self.client.post(self.url, data, HTTP_IDEMPOTENCY_KEY='abc-456')
+        content = json.loads(response.content)
+
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        self.assertDictEqual({'conta_id': account.pk, 'saldo': 300.0}, content)
+        self.assertEqual(2, OutboxEvent.objects.count())
+
+    def test_create_idempotency_key_from_database(self):
+        account = baker.make(
+            'manager.Account',
+            balance=50,
+        )
+        data = {
+            "forma_pagamento": "P",
+            "conta_id": account.pk,
+            "valor": 100
+        }
+
+        response = self.client.post(self.url, data, HTTP_IDEMPOTENCY_KEY='abc-123')
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+        cache.clear()
+        response = self.client.post(self.url, data, HTTP_IDEMPOTENCY_KEY='abc-123')
+        content = json.loads(response.content)
+
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+        self.assertEqual("Saldo insuficiente", content)
+        self.assertEqual(1, IdempotencyKey.objects.count())
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_create_idempotency_key_other_payload(self):
+        account = baker.make('manager.Account', balance=500)
+        data = {"forma_pagamento": "P", "conta_id": account.pk, "valor": 100}
+
+        self.client.post(self.url, data, HTTP_IDEMPOTENCY_KEY='abc-123')
+        response = self.client.post(self.url, {**data, "valor": 200}, HTTP_IDEMPOTENCY_KEY='abc-123')
+        self.assertEqual(status.HTTP_422_UNPROCESSABLE_ENTITY, response.status_code)
+
+        # Also when the stored response is read from the database
+        cache.clear()
+        response = self.client.post(self.url, {**data, "valor": 200}, HTTP_IDEMPOTENCY_KEY='abc-123')
+        self.assertEqual(status.HTTP_422_UNPROCESSABLE_ENTITY, response.status_code)
+        self.assertEqual(1, Transaction.objects.filter(account=account).count())
+
+    def test_create_idempotency_key_expired(self):
+        account = baker.make('manager.Account', balance=500)
+        data = {"forma_pagamento": "P", "conta_id": account.pk, "valor": 100}
+
+        self.client.post(self.url, data, HTTP_IDEMPOTENCY_KEY='abc-123')
+        IdempotencyKey.objects.update(created_at=timezone.now() - timezone.timedelta(days=2))
+        cache.clear()
+
+        response = self.client.post(self.url, data, HTTP_IDEMPOTENCY_KEY='abc-123')
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        self.assertDictEqual({'conta_id': account.pk, 'saldo': 300.0}, json.loads(response.content))
+
+        IdempotencyKey.objects.update(created_at=timezone.now() - timezone.timedelta(days=2))
+        self.assertEqual(1, delete_expired_keys())
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    @override_settings(TRANSACTION_SEQUENCER_ENABLED=True)
+    @patch('manager.sequencer.get_sequencer')
+    def test_create_idempotency_key_sequencer(self, mock_get_sequencer):
+        account = baker.make('manager.Account', balance=500)
+        data = {"forma_pagamento": "P", "conta_id": account.pk, "valor": 100}
+
+        # The debit is rolled back with the key, never committed by the sequencer
+        with patch('manager.idempotency.IdempotencyKey.objects.create', side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                self.client.post(self.url, data, HTTP_IDEMPOTENCY_KEY='abc-123')
+
+        account.refresh_from_db()
+        self.assertEqual(50000, account.balance_cents)
+        self.assertFalse(Transaction.objects.exists())
+        mock_get_sequencer.assert_not_called()
+
+
+class AccountBalanceCacheTestCase(BaseAPITestCase):
+    """Test the write-through balance cache behind GET /v1/conta/?conta_id=."""
+
+    tests_to_perform: List = []
+
+    def setUp(self) -> None:
+        super().setUp()
+        cache.clear()
+        self.url = reverse("account-list")
+
+    def test_balance_cache_write_through(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {"conta_id": 100, "valor": 500})
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("transaction-list"),
+                {"forma_pagamento": "P", "conta_id": 100, "valor": 100},
+            )
+
+        # The user of the token comes from the authentication cache too
+        with self.assertNumQueries(0):
+            response = self.client.get(f'{self.url}?conta_id=100')
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual({'conta_id': 100, 'saldo': 400.0}, json.loads(response.content))
+
+    def test_balance_cache_miss(self):
+        account = baker.make('manager.Account', balance=500)
+
+        response = self.client.get(f'{self.url}?id={account.pk}')
+        self.assertEqual({'conta_id': account.pk, 'saldo': 500.0}, json.loads(response.content))
+        self.assertEqual(
+            {'conta_id': account.pk, 'saldo_cents': 50000, 'version': 0},
+            get_cache(balance_cache_key(account.pk))
+        )
+
+    def test_balance_cache_stale_write(self):
+        cache_balance(1, 300, version=2)
+        cache_balance(1, 500, version=1)
+
+        self.assertEqual({'conta_id': 1, 'saldo': Decimal('3.00')}, get_cached_balance(1))
+
+
+class AccountStatementTestCase(BaseAPITestCase):
+    """Test the keyset paginated GET /v1/conta/{id}/extrato/."""
+
+    tests_to_perform: List = []
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.client.post(reverse("account-list"), {"conta_id": 100, "valor": 500})
+        for _ in range(2):
+            self.client.post(reverse("transaction-list"), {"forma_pagamento": "P", "conta_id": 100, "valor": 100})
+        take_balance_snapshots(min_entries=1, delay=-1)
+        self.client.post(reverse("transaction-list"), {"forma_pagamento": "P", "conta_id": 100, "valor": 100})
+        self.url = reverse("account-statement", kwargs={'pk': 100})
+
+    def test_statement_pages(self):
+        response = self.client.get(self.url, {'page_size': 2})
+        content = json.loads(response.content)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            [(-100.0, 200.0), (-100.0, 300.0)],
+            [(row['valor'], row['saldo']) for row in content['results']]
+        )
+
+        response = self.client.get(content['next'])
+        content = json.loads(response.content)
+
+        self.assertEqual(
+            [(-100.0, 400.0), (500.0, 500.0)],
+            [(row['valor'], row['saldo']) for row in content['results']]
+        )
+        self.assertEqual(['D', 'O'], [row['tipo'] for row in content['results']])
+        self.assertIsNone(content['results'][1]['transacao_id'])
+        self.assertIsNone(content['next'])
+
+    def test_statement_invalid(self):
+        self.assertEqual(status.HTTP_404_NOT_FOUND, self.client.get(self.url, {'cursor': 'abc'}).status_code)
+        self.assertEqual(
+            status.HTTP_404_NOT_FOUND,
+            self.client.get(reverse("account-statement", kwargs={'pk': 999})).status_code
+        )
+
+
+class TransactionSearchTestCase(BaseAPITestCase):
+    """Test the filtered GET /v1/transacao/ of the back office."""
+
+    tests_to_perform: List = []
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.url = reverse("transaction-list")
+        self.account = baker.make('manager.Account', balance=500)
+        self.other_account = baker.make('manager.Account', balance=500)
+        for account, forma_pagamento, valor in (
+            (self.account, 'P', 10),
+            (self.account, 'D', 20),
+            (self.account, 'D', 30),
+            (self.other_account, 'D', 40),
+        ):
+            baker.make('manager.Transaction', account=account, type=forma_pagamento, value=valor, tax=0)
+
+    def test_list_filters(self):
+        response = self.client.get(
+            self.url,
+            {'conta_id': self.account.pk, 'forma_pagamento': 'D', 'valor_min': 15, 'valor_max': 25}
+        )
+        content = json.loads(response.content)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([20.0], [row['valor'] for row in content['results']])
+        self.assertEqual(self.account.pk, content['results'][0]['conta_id'])
+
+    def test_list_pages(self):
+        response = self.client.get(self.url, {'page_size': 3})
+        content = json.loads(response.content)
+        self.assertEqual([40.0, 30.0, 20.0], [row['valor'] for row in content['results']])
+
+        content = json.loads(self.client.get(content['next']).content)
+        self.assertEqual([10.0], [row['valor'] for row in content['results']])
+        self.assertIsNone(content['next'])
+
+    def test_list_validation_error(self):
+        response = self.client.get(self.url, {'data_inicio': 'ontem'})
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_query_plans(self):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+        queryset = Transaction.objects.filter(account=self.account, type='D', created_at__gte=timezone.now())
+        self.assertIn('transaction_account_type', queryset.order_by('-created_at').explain())
+
+        queryset = Transaction.objects.order_by('-created_at', '-id')[:10]
+        self.assertIn('transaction_created', queryset.explain())
+
+
+class AccountExportTestCase(BaseAPITestCase):
+    """Test the streaming GET /v1/conta/{id}/exportar/."""
+
+    tests_to_perform: List = []
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.account = baker.make('manager.Account', balance=500)
+        for forma_pagamento, valor, cashback in (('C', 10, None), ('P', 20, 20)):
+            baker.make(
+                'manager.Transaction',
+                account=self.account,
+                type=forma_pagamento,
+                value=valor,
+                tax=0.5,
+                cashback_cents=cashback
+            )
+        self.url = reverse("account-export", kwargs={'pk': self.account.pk})
+
+    def test_export_csv(self):
+        response = self.client.get(self.url)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual('text/csv', response['Content-Type'])
+        self.assertEqual('id,data,forma_pagamento,valor,taxa,cashback', lines[0])
+        self.assertEqual(['C', '10.00', '0.50', ''], lines[1].split(',')[2:])
+        self.assertEqual(['P', '20.00', '0.50', '0.20'], lines[2].split(',')[2:])
+
+    def test_export_ndjson(self):
+        response = self.client.get(self.url, {'formato': 'ndjson', 'forma_pagamento': 'P'})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+        self.assertEqual(1, len(rows))
+        self.assertEqual(
+            {'forma_pagamento': 'P', 'valor': '20.00', 'taxa': '0.50', 'cashback': '0.20'},
+            {key: rows[0][key] for key in ('forma_pagamento', 'valor', 'taxa', 'cashback')}
+        )
+
+    def test_export_invalid(self):
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, self.client.get(self.url, {'formato': 'xml'}).status_code)
+        self.assertEqual(
+            status.HTTP_404_NOT_FOUND,
+            self.client.get(reverse("account-export", kwargs={'pk': 999})).status_code
+        )
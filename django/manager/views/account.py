@@ -1,21 +1,32 @@
 # Django imports
 import django_filters.rest_framework
+from django.conf import settings
+from django.db import IntegrityError
+from django.http import StreamingHttpResponse
 from drf_yasg.utils import swagger_auto_schema
 
 # Third party imports
 from rest_framework import status
+from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError as RestFrameworkValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
 # Project imports
-from manager.cache_utils import set_cache, get_cache
-from manager.filters import AccountFilter
-from manager.models import Account
-from manager.serializers import AccountSerializer, AccountCreateSerializer
+from manager.account_index import account_exists, account_known_missing, remember_missing
+from manager.balance_cache import cache_balance, get_cached_balance
+from manager.export import EXPORT_FORMATS, export_rows
+from manager.fast_serializers import encode_account, validate_account_create
+from manager.filters import AccountFilter, TransactionFilter
+from manager.ledger import get_statement, set_running_balances
+from manager.models import Account, Transaction
+from manager.serializers import AccountSerializer, AccountCreateSerializer, StatementEntrySerializer
+from manager.services import create_account
+from shared.helpers import KeysetPagination
 from shared.views import BaseCollectionViewSet
 from shared.http.responses import (
-    api_exception_response
+    api_exception_response,
+    not_found_response
 )
 
 
@@ -29,6 +40,7 @@ class AccountViewSet(BaseCollectionViewSet):
     serializers = {
         'default': serializer_class,
         'create': AccountCreateSerializer,
+        'statement': StatementEntrySerializer,
     }
     permission_classes = [IsAuthenticated]
     filterset_class = AccountFilter
@@ -39,29 +51,34 @@ class AccountViewSet(BaseCollectionViewSet):
     @swagger_auto_schema(operation_summary="Create object")
     def create(self, request, *args, **kwargs):
         try:
-            serializer = self.get_serializer(data=request.data)
-            serializer.is_valid(raise_exception=True)
+            if settings.FAST_VALIDATION:
+                validated_data, headers = validate_account_create(request.data), {}
+            else:
+                serializer = self.get_serializer(data=request.data)
+                serializer.is_valid(raise_exception=True)
+                validated_data, headers = serializer.validated_data, self.get_success_headers(serializer.data)
 
-            if cached_data := get_cache(f'account_{serializer.validated_data.get("conta_id")}'):
-                return Response(cached_data, status=status.HTTP_400_BAD_REQUEST)
+            if account_exists(validated_data.get('conta_id')):
+                return Response({'conta_id': 'Conta já existente!'}, status=status.HTTP_400_BAD_REQUEST)
 
-            if Account.objects.filter(id=serializer.validated_data.get('conta_id')):
-                data = {'conta_id': 'Conta já existente!'}
-                set_cache(f'account_{serializer.validated_data.get("conta_id")}', data)
-                return Response(data, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                account = create_account(validated_data)
+            except IntegrityError:
+                # Created by a concurrent request since the check
+                return Response({'conta_id': 'Conta já existente!'}, status=status.HTTP_400_BAD_REQUEST)
 
-            account = Account.objects.create(
-                id=serializer.validated_data.get('conta_id'),
-                balance=serializer.validated_data.get('valor')
-            )
-            headers = self.get_success_headers(serializer.data)
-            return Response(AccountSerializer(account).data, status=status.HTTP_201_CREATED, headers=headers)
+            data = encode_account(account) if settings.FAST_VALIDATION else AccountSerializer(account).data
+            return Response(data, status=status.HTTP_201_CREATED, headers=headers)
 
         except RestFrameworkValidationError as validation_exception:
             return api_exception_response(exception=validation_exception)
 
     @swagger_auto_schema(operation_summary="List objects")
     def list(self, request, *args, **kwargs):
+        account_id = request.GET.get('conta_id') or request.GET.get('id')
+        if account_id and account_id.isdigit() and not request.GET.get('page_size'):
+            return self.balance(int(account_id))
+
         queryset = self.filter_queryset(self.get_queryset())
 
         page = self.paginate_queryset(queryset)
@@ -76,3 +93,68 @@ class AccountViewSet(BaseCollectionViewSet):
             return Response(response_data[0] if len(response_data) else {})
 
         return Response(response_data)
+
+    def balance(self, account_id: int) -> Response:
+        """
+        Balance lookup by conta_id, served from the write-through balance cache
+        """
+        if cached_data := get_cached_balance(account_id):
+            return Response(cached_data)
+
+        if account_known_missing(account_id):
+            return Response({})
+
+        account = Account.objects.filter(id=account_id).first()
+        if account is None:
+            remember_missing(account_id)
+            return Response({})
+
+        # Striped balances change without touching the account row, they are never cached
+        if not account.stripes:
+            cache_balance(account.id, account.balance_cents, account.version)
+        return Response(AccountSerializer(account).data)
+
+    @swagger_auto_schema(operation_summary="Account statement")
+    @action(detail=True, methods=['get'], url_path='extrato')
+    def statement(self, request, pk=None, *args, **kwargs):
+        """
+        Ledger entries of the account, newest first, with the balance after each entry.
+        Paginated by a (created_at, id) cursor instead of page numbers.
+        """
+        if not pk.isdigit() or not account_exists(int(pk)):
+            return not_found_response(custom_message='Conta inexistente')
+
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(get_statement(int(pk)), request, view=self)
+        set_running_balances(int(pk), page)
+
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @swagger_auto_schema(operation_summary="Export the account transactions")
+    @action(detail=True, methods=['get'], url_path='exportar')
+    def export(self, request, pk=None, *args, **kwargs):
+        """
+        Stream the transactions of the account, oldest first, as CSV or NDJSON (?formato=ndjson).
+        Accepts the filters of GET /v1/transacao/, e.g. data_inicio and data_fim for a full year.
+        """
+        if not pk.isdigit() or not account_exists(int(pk)):
+            return not_found_response(custom_message='Conta inexistente')
+
+        export_format = request.query_params.get('formato', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return api_exception_response(
+                exception=RestFrameworkValidationError({'formato': [f'Use {" ou ".join(EXPORT_FORMATS)}.']})
+            )
+
+        filterset = TransactionFilter(request.query_params, queryset=Transaction.objects.filter(account_id=pk))
+        if not filterset.is_valid():
+            return api_exception_response(exception=RestFrameworkValidationError(filterset.errors))
+
+        stream, content_type = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(
+            stream(export_rows(filterset.qs, settings.EXPORT_CHUNK_SIZE)),
+            content_type=content_type
+        )
+        response['Content-Disposition'] = f'attachment; filename="extrato_{pk}.{export_format}"'
+        return response
@@ -0,0 +1,170 @@
+# Base imports
+import io
+from functools import wraps
+
+# Django imports
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError
+from django.http import HttpResponse, HttpResponseNotAllowed
+
+# Third party imports
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotAuthenticated, ValidationError
+from rest_framework.response import Response
+
+# Project imports
+from authentication.authentication import CachedJWTAuthentication
+from manager.account_index import aaccount_exists, aaccount_known_missing, remember_missing
+from manager.balance_cache import aget_cached_balance, cache_balance
+from manager.idempotency import idempotent_function
+from manager.models import Account
+from manager.serializers import AccountCreateSerializer, AccountSerializer, TransactionBatchSerializer
+from manager.services import create_account, create_transaction
+from shared.http.parsers import ORJSONParser
+from shared.http.renderers import ORJSONRenderer
+from shared.http.responses import api_exception_response
+
+
+async def authenticate(request):
+    """
+    Return the user of the Bearer token of the request, or None when no token was sent.
+    Only JWT is accepted by the async endpoints.
+    """
+    authenticator = CachedJWTAuthentication()
+    header = authenticator.get_header(request)
+    if header is None:
+        return None
+
+    raw_token = authenticator.get_raw_token(header)
+    if raw_token is None:
+        return None
+
+    validated_token = authenticator.get_validated_token(raw_token)
+    return await sync_to_async(authenticator.get_user)(validated_token)
+
+
+def render_response(response: Response) -> HttpResponse:
+    """
+    Render a DRF Response in the event loop, Django would render it in a worker thread
+    """
+    return HttpResponse(
+        ORJSONRenderer().render(response.data),
+        status=response.status_code,
+        content_type=ORJSONRenderer.media_type,
+    )
+
+
+def get_data(request) -> dict:
+    if request.content_type == 'application/json':
+        return ORJSONParser().parse(io.BytesIO(request.body or b'{}'))
+
+    return request.POST.dict()
+
+
+def async_api_view(*methods):
+    """
+    Turn a coroutine into an authenticated JSON endpoint with the same responses as the DRF views.
+    Only Bearer tokens are accepted, never the session cookie, so the endpoints are exempt from CSRF.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return HttpResponseNotAllowed(methods)
+
+            try:
+                request.user = await authenticate(request)
+                if request.user is None:
+                    raise NotAuthenticated()
+            except APIException as exception:
+                response = render_response(
+                    Response({'detail': exception.detail}, status=exception.status_code)
+                )
+                response['WWW-Authenticate'] = CachedJWTAuthentication().authenticate_header(request)
+                return response
+
+            return render_response(await view(request, *args, **kwargs))
+
+        # What csrf_exempt sets, its wrapper is not async before Django 5.0
+        wrapper.csrf_exempt = True
+        return wrapper
+
+    return decorator
+
+
+@idempotent_function
+def _create_transaction(request, data) -> Response:
+    created, account = create_transaction(data)
+    if created:
+        return Response(AccountSerializer(account).data, status=status.HTTP_201_CREATED)
+
+    return Response('Saldo insuficiente', status=status.HTTP_404_NOT_FOUND)
+
+
+@async_api_view('POST')
+async def transaction_create(request) -> Response:
+    try:
+        serializer = TransactionBatchSerializer(data=get_data(request))
+        serializer.is_valid(raise_exception=True)
+
+        if not await aaccount_exists(serializer.validated_data.get('conta_id')):
+            raise ValidationError({'conta_id': ['Conta com conta_id não existe!']})
+
+        # The debit runs in its own thread, inside the database transaction of the service
+        return await sync_to_async(_create_transaction)(request, serializer.validated_data)
+
+    except APIException as exception:
+        return api_exception_response(exception=exception)
+
+
+@async_api_view('GET', 'POST')
+async def account(request) -> Response:
+    try:
+        if request.method == 'POST':
+            return await account_create(request)
+
+        account_id = request.GET.get('conta_id') or request.GET.get('id')
+        if not account_id or not account_id.isdigit():
+            raise ValidationError({'conta_id': ['A valid integer is required.']})
+
+        return await account_balance(int(account_id))
+
+    except APIException as exception:
+        return api_exception_response(exception=exception)
+
+
+async def account_create(request) -> Response:
+    serializer = AccountCreateSerializer(data=get_data(request))
+    serializer.is_valid(raise_exception=True)
+
+    if await aaccount_exists(serializer.validated_data.get('conta_id')):
+        return Response({'conta_id': 'Conta já existente!'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        account = await sync_to_async(create_account)(serializer.validated_data)
+    except IntegrityError:
+        return Response({'conta_id': 'Conta já existente!'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(AccountSerializer(account).data, status=status.HTTP_201_CREATED)
+
+
+async def account_balance(account_id: int) -> Response:
+    """
+    Balance lookup by conta_id, served from the write-through balance cache
+    """
+    if cached_data := await aget_cached_balance(account_id):
+        return Response(cached_data)
+
+    if await aaccount_known_missing(account_id):
+        return Response({})
+
+    account = await Account.objects.filter(id=account_id).afirst()
+    if account is None:
+        await sync_to_async(remember_missing)(account_id)
+        return Response({})
+
+    # Striped balances are a SUM over the stripes and are never cached
+    if account.stripes:
+        return Response(await sync_to_async(lambda: AccountSerializer(account).data)())
+
+    await sync_to_async(cache_balance)(account.id, account.balance_cents, account.version)
+    return Response(AccountSerializer(account).data)
@@ -1,50 +1,171 @@
+# Base imports
+import logging
+
 # Django imports
+import django_filters.rest_framework
+from django.conf import settings
 from django.db import IntegrityError
+from django.utils import timezone
+from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 
 # Third party imports
 from rest_framework import status
-from rest_framework.exceptions import ValidationError as RestFrameworkValidationError
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, ValidationError as RestFrameworkValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
 # Project imports
+from manager.archive import ARCHIVE_READ_ERRORS, ArchiveUnavailable, get_live_cutoff, read_archived_transactions
+from manager.fast_serializers import encode_account, validate_transaction
+from manager.filters import TransactionFilter
+from manager.idempotency import idempotent, IDEMPOTENCY_HEADER
 from manager.models import Transaction
-from manager.serializers import AccountSerializer, TransactionSerializer
-from manager.services import create_transaction
+from manager.sequencer import SequencerTimeout
+from manager.serializers import (
+    AccountSerializer,
+    TransactionBatchSerializer,
+    TransactionListSerializer,
+    TransactionSerializer,
+)
+from manager.services import create_transaction, create_transactions_batch
+from shared.helpers import KeysetPagination
 from shared.views import BaseCollectionViewSet
 from shared.http.responses import (
     api_exception_response,
 )
 
 
+LOGGER = logging.getLogger(__name__)
+
+
 class TransactionViewSet(BaseCollectionViewSet):
     """ A ViewSet for transaction. """
     model_class = Transaction
     queryset = model_class.objects.all()
     serializer_class = TransactionSerializer
-    http_method_names = ('post',)
+    http_method_names = ('get', 'post')
     search_fields = ('name',)
     serializers = {
         'default': serializer_class,
+        'batch': TransactionBatchSerializer,
+        'list': TransactionListSerializer,
+        'retrieve': TransactionListSerializer,
     }
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    filterset_class = TransactionFilter
+    filter_backends = (
+        django_filters.rest_framework.DjangoFilterBackend,
+    )
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return self.model_class.objects.none()  # pragma: no cover
+
+        # Without the DISTINCT of the base viewset, so the keyset pages are index range scans
+        return self.model_class.objects.all()
+
+    @swagger_auto_schema(operation_summary="List objects")
+    def list(self, request, *args, **kwargs):
+        """
+        Transactions newest first. The history of an account continues in the archive once
+        the live rows are exhausted, so the cursor pages through both transparently.
+        The archive is only read for pages before the live cutoff: a short page of newer rows
+        ends with a next link at the cutoff instead.
+        """
+        try:
+            queryset = self.filter_queryset(self.get_queryset())
+            page = self.paginate_queryset(queryset)
+
+            if not self.paginator.has_next and request.query_params.get('conta_id'):
+                page = self.extend_with_archive(queryset)
+
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        except APIException as exception:
+            return api_exception_response(exception=exception)
+
+    def extend_with_archive(self, queryset):
+        filterset = TransactionFilter(self.request.query_params, queryset=queryset)
+        filterset.is_valid()
+
+        start, end = filterset.form.cleaned_data.get('data_inicio'), filterset.form.cleaned_data.get('data_fim')
+        cutoff = get_live_cutoff(timezone.now().date())
+        if start and start >= cutoff:
+            return self.paginator.page
+
+        # Only transactions created before the cutoff are archived, (cutoff, 0) is the key right before it
+        boundary = (cutoff, 0)
+        position = self.paginator.get_position()
+        if end and (position is None or position > (end, 0)):
+            position = (end, 0)
+        if position is None or position > boundary:
+            self.paginator.continue_at(boundary)
+            return self.paginator.page
+
+        rows = read_archived_transactions(int(filterset.form.cleaned_data['conta_id']), position, start)
+        try:
+            return self.paginator.extend_page(
+                Transaction(**row) for row in rows if filterset.matches(row)
+            )
+        except ARCHIVE_READ_ERRORS as error:
+            LOGGER.exception('Error reading the transaction archive')
+            raise ArchiveUnavailable() from error
 
-    @swagger_auto_schema(operation_summary="Create object")
+    @swagger_auto_schema(
+        operation_summary="Create object",
+        manual_parameters=[
+            openapi.Parameter(IDEMPOTENCY_HEADER, openapi.IN_HEADER, type=openapi.TYPE_STRING)
+        ]
+    )
+    @idempotent
     def create(self, request, *args, **kwargs):
         try:
-            serializer = self.get_serializer(data=request.data)
-            serializer.is_valid(raise_exception=True)
+            if settings.FAST_VALIDATION:
+                validated_data, headers = validate_transaction(request.data), {}
+            else:
+                serializer = self.get_serializer(data=request.data)
+                serializer.is_valid(raise_exception=True)
+                validated_data, headers = serializer.validated_data, self.get_success_headers(serializer.data)
 
             created, account = create_transaction(
-                serializer.validated_data
+                validated_data
             )
 
             if created:
-                headers = self.get_success_headers(serializer.data)
-                return Response(AccountSerializer(account).data, status=status.HTTP_201_CREATED, headers=headers)
+                data = encode_account(account) if settings.FAST_VALIDATION else AccountSerializer(account).data
+                return Response(data, status=status.HTTP_201_CREATED, headers=headers)
 
             return Response('Saldo insuficiente', status=status.HTTP_404_NOT_FOUND)
 
         except RestFrameworkValidationError as validation_exception:
             return api_exception_response(exception=validation_exception)
+        except SequencerTimeout as timeout_exception:
+            return api_exception_response(exception=timeout_exception)
+
+    @swagger_auto_schema(
+        operation_summary="Create objects in batch",
+        request_body=TransactionBatchSerializer(many=True)
+    )
+    @action(detail=False, methods=['post'], url_path='lote')
+    def batch(self, request, *args, **kwargs):
+        try:
+            serializer = self.get_serializer(
+                data=request.data,
+                many=True,
+                allow_empty=False,
+                max_length=settings.TRANSACTION_BATCH_MAX_SIZE
+            )
+            serializer.is_valid(raise_exception=True)
+
+            results = create_transactions_batch(
+                serializer.validated_data
+            )
+
+            return Response(results, status=status.HTTP_201_CREATED)
+
+        except RestFrameworkValidationError as validation_exception:
+            return api_exception_response(exception=validation_exception)
@@ -3,9 +3,18 @@ try:
     from typing import TypedDict
 except ImportError:
     from typing_extensions import TypedDict
+import base64
+import binascii
+from itertools import islice
 from functools import partial
 import math
-from rest_framework.pagination import PageNumberPagination
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 sign = partial(math.copysign, 1)
@@ -20,3 +29,103 @@ class MyCustomPagination(PageNumberPagination):
     page_size = 1000
     page_query_param = 'page'
     page_size_query_param = 'page_size'
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on the (created_at, id) key, newest first.
+    Every page is one range scan of a (created_at, id) index, without OFFSET or COUNT,
+    so a deep page costs the same as the first one.
+    """
+    page_size = 50
+    max_page_size = 1000
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = _('Invalid cursor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        self.next_position = None
+        self.cursor = self.decode_cursor(request)
+        if cursor := self.cursor:
+            created_at, pk = cursor
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+        page = list(queryset.order_by('-created_at', '-id')[:self.page_size + 1])
+        self.has_next = len(page) > self.page_size
+        self.page = page[:self.page_size]
+        return self.page
+
+    def get_position(self):
+        """
+        Return the (created_at, id) key after which the next item of the page would be
+        """
+        if self.page:
+            return self.page[-1].created_at, self.page[-1].id
+        return self.cursor
+
+    def extend_page(self, items):
+        """
+        Complete a short page with items from another source, newest first, that come after get_position
+        """
+        self.page.extend(islice(items, self.page_size + 1 - len(self.page)))
+        self.has_next = len(self.page) > self.page_size
+        self.page = self.page[:self.page_size]
+        return self.page
+
+    def continue_at(self, position):
+        """
+        End a short page with a next link at a (created_at, id) key, for items of another source after it
+        """
+        self.has_next = True
+        self.next_position = position
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            created_at, pk = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii').split('|')
+            created_at = parse_datetime(created_at)
+            pk = int(pk)
+        except (TypeError, ValueError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+
+        return created_at, pk
+
+    def encode_cursor(self, position) -> str:
+        created_at, pk = position
+        cursor = f'{created_at.isoformat()}|{pk}'
+        return base64.urlsafe_b64encode(cursor.encode('ascii')).decode('ascii')
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.next_position or (self.page[-1].created_at, self.page[-1].id))
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
@@ -0,0 +1,39 @@
+# Base imports
+import codecs
+import io
+import re
+
+# Django imports
+from django.conf import settings
+
+# Third party imports
+import orjson
+from rest_framework.parsers import JSONParser
+
+# Project imports
+from shared.http.renderers import ORJSONRenderer
+
+
+# orjson reads integers beyond 64 bits as floats, bodies with such long numbers use the stock parser
+LONG_NUMBER = re.compile(rb'\d{19}')
+
+
+class ORJSONParser(JSONParser):
+    """
+    JSONParser parsing with orjson. Bodies orjson rejects are parsed again by the stock parser,
+    so they keep its result or its error message.
+    """
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        body = stream.read()
+
+        if self.strict and codecs.lookup(encoding).name == 'utf-8' and not LONG_NUMBER.search(body):
+            try:
+                return orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass
+
+        return super().parse(io.BytesIO(body), media_type, parser_context)
@@ -0,0 +1,41 @@
+# Base imports
+from decimal import Decimal
+
+# Third party imports
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer serializing with orjson, with the same output as the stock renderer.
+    Types orjson does not serialize natively, like Decimal, lazy translations and datetimes,
+    go through the DRF encoder. Indented output (browsable API, ?indent=) and non default
+    UNICODE_JSON, COMPACT_JSON or STRICT_JSON settings use the stock renderer.
+    """
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        if (
+            self.ensure_ascii or not self.compact or not self.strict or
+            self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        encoder_default = self.encoder_class().default
+
+        def default(obj):
+            # Balances are the most common non native type, skip the isinstance chain of the encoder
+            if type(obj) is Decimal:
+                return float(obj)
+            return encoder_default(obj)
+
+        ret = orjson.dumps(data, default=default, option=self.options)
+
+        # Same escaping of \u2028 and \u2029 as the stock renderer
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
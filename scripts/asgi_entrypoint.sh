@@ -0,0 +1,5 @@
+#!/bin/sh
+
+set -e
+
+uvicorn bank_manager.asgi:application --host 0.0.0.0 --port 8001 --workers ${ASGI_WORKERS:-2} --no-access-log